@@ -0,0 +1,199 @@
+"""
+Admission Control
+Limits concurrent calls per worker, queues a short burst, and sheds the rest
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: how late a periodic sleep wakes up
+
+    Lag is the best single signal that a worker is overloaded: every turn's
+    FSM decision, audio relay and TTS send waits behind it.
+    """
+
+    def __init__(self, interval: float = 0.1, smoothing: float = 0.3):
+        """
+        Args:
+            interval: Seconds between probes
+            smoothing: Weight of the newest sample in the moving average
+        """
+        self.interval = interval
+        self.smoothing = smoothing
+        self.lag = 0.0  # Seconds, exponentially smoothed
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._probe())
+
+    async def _probe(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            sample = max(0.0, time.perf_counter() - start - self.interval)
+            self.lag += self.smoothing * (sample - self.lag)
+            self.max_lag = max(self.max_lag, sample)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"lag_ms": round(self.lag * 1000, 2), "max_lag_ms": round(self.max_lag * 1000, 2)}
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class AdmissionRejected(Exception):
+    """The worker is saturated; the caller should retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(f"{reason} (retry after {retry_after}s)")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Gate in front of new calls
+
+    A call is admitted while fewer than `max_sessions` are active, event-loop
+    lag is under `max_lag` and `has_capacity()` reports upstream headroom
+    (warm Realtime connections, HTTP pool slots). Otherwise it waits in a
+    FIFO queue of at most `queue_size` callers, told its position as it
+    moves up, for at most `queue_timeout` seconds. A full queue or a timeout
+    rejects the call with a retry-after hint.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int,
+        queue_size: int,
+        queue_timeout: float,
+        max_lag: float,
+        retry_after: int,
+        lag_monitor: Optional[LoopLagMonitor] = None,
+        has_capacity: Callable[[], bool] = lambda: True,
+        poll_interval: float = 0.05,
+    ):
+        """
+        Args:
+            max_sessions: Concurrent calls on this worker
+            queue_size: Callers allowed to wait for a slot
+            queue_timeout: Seconds a caller may wait before being rejected
+            max_lag: Event-loop lag (seconds) above which no new call starts
+            retry_after: Seconds suggested to rejected callers
+            lag_monitor: Source of event-loop lag
+            has_capacity: True while upstream connections can take another call
+            poll_interval: Seconds between re-checks of lag and capacity while queued
+        """
+        self.max_sessions = max_sessions
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_lag = max_lag
+        self.retry_after = retry_after
+        self.lag_monitor = lag_monitor or LoopLagMonitor()
+        self.has_capacity = has_capacity
+        self.poll_interval = poll_interval
+
+        self.active = 0
+        self._waiters: Deque[object] = deque()
+        self._changed = asyncio.Event()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _blocked_by(self) -> Optional[str]:
+        """Why a new call cannot start right now, or None"""
+        if self.active >= self.max_sessions:
+            return "session limit reached"
+        if self.lag_monitor.lag > self.max_lag:
+            return "event loop lagging"
+        if not self.has_capacity():
+            return "upstream capacity exhausted"
+        return None
+
+    async def acquire(self, on_queued: Optional[Callable[[int], Awaitable[None]]] = None):
+        """
+        Take a call slot, waiting in the queue if needed
+
+        Args:
+            on_queued: Called with the caller's 1-based queue position whenever it changes
+
+        Raises:
+            AdmissionRejected: queue full, or no slot within queue_timeout
+        """
+        reason = self._blocked_by()
+        if reason is None and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after, reason or "queue full")
+
+        ticket = object()
+        self._waiters.append(ticket)
+        self.queued += 1
+        deadline = time.monotonic() + self.queue_timeout
+        position = 0
+        try:
+            while True:
+                current = self._waiters.index(ticket) + 1
+                if current != position:
+                    position = current
+                    if on_queued:
+                        await on_queued(position)
+                reason = self._blocked_by()
+                if position == 1 and reason is None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    self.timed_out += 1
+                    raise AdmissionRejected(self.retry_after, reason or "queue timeout")
+                try:
+                    await asyncio.wait_for(self._changed.wait(), min(remaining, self.poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(ticket)
+            self._notify()
+        self.active += 1
+        self.admitted += 1
+
+    def release(self):
+        """Give back the slot of a finished call"""
+        self.active -= 1
+        self._notify()
+
+    def _notify(self):
+        # Wake every waiter to re-check its position, then re-arm
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "max_sessions": self.max_sessions,
+            "waiting": len(self._waiters),
+            "blocked_by": self._blocked_by(),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -0,0 +1,155 @@
+"""
+Batch Eligibility Scoring
+Re-scores archived calls through the eligibility flow, e.g. after MIN_SALARY,
+ELIGIBLE_CITIES or ELIGIBILITY_QUESTIONS change
+
+Input is JSONL, one call per line:
+    {"session_id": "abc", "transcripts": ["yes", "haan", "no"]}
+
+Run: python batch_score.py calls.jsonl -o results.jsonl [--workers N]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from state_machine import EligibilityStateMachine
+
+logger = logging.getLogger(__name__)
+
+
+def score_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Replay one call's user transcripts through the flow and return its outcome"""
+    machine = EligibilityStateMachine()
+    machine.start()
+    machine.process_response("")  # greeting -> first question
+
+    result = None
+    turns = 0
+    invalid = 0
+    for text in record.get("transcripts", ()):
+        result = machine.process_response(text)
+        turns += 1
+        if not result.is_valid:
+            invalid += 1
+        if result.should_end:
+            break
+
+    return {
+        "session_id": record.get("session_id"),
+        "state": machine.get_current_state(),
+        "is_eligible": result.is_eligible if result else None,
+        "rejection_reason": machine.rejection_reason,
+        "complete": machine.is_complete(),
+        "turns": turns,
+        "invalid_answers": invalid,
+    }
+
+
+def outcome_label(outcome: Dict[str, Any]) -> str:
+    """Summary bucket for a scored call: eligible, a rejection reason, incomplete or error"""
+    if "error" in outcome:
+        return "error"
+    if outcome["is_eligible"] is None:
+        return "incomplete"
+    return "eligible" if outcome["is_eligible"] else outcome["rejection_reason"]
+
+
+def score_lines(lines: Sequence[str]) -> List[Tuple[str, str]]:
+    """
+    Score a chunk of JSONL lines
+
+    Returns:
+        (outcome label, JSON result line) per input line. Malformed lines give
+        an error record instead of failing the whole batch.
+    """
+    out = []
+    for line in lines:
+        try:
+            outcome = score_record(json.loads(line))
+        except (ValueError, TypeError, AttributeError) as e:
+            outcome = {"session_id": None, "error": f"{type(e).__name__}: {e}"}
+        out.append((outcome_label(outcome), json.dumps(outcome)))
+    return out
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk = []
+    for line in lines:
+        if line.strip():
+            chunk.append(line)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def score_stream(lines: Iterable[str], workers: int = 1, chunk_size: int = 2000) -> Iterator[Tuple[str, str]]:
+    """
+    Score JSONL lines, yielding (outcome label, JSON result line) per call in input order
+
+    With workers > 1, chunks of raw lines are parsed and scored in a process
+    pool; at most 2 chunks per worker are in flight, so memory stays bounded
+    on arbitrarily large inputs.
+    """
+    if workers <= 1:
+        for chunk in _chunks(lines, chunk_size):
+            yield from score_lines(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(score_lines, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-score archived calls against the current eligibility rules")
+    parser.add_argument("input", help="JSONL file of {session_id, transcripts} records ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Scoring processes")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Calls per worker task")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    outcomes: Counter = Counter()
+    scored = 0
+    start = time.perf_counter()
+    try:
+        for label, line in score_stream(source, workers=args.workers, chunk_size=args.chunk_size):
+            sink.write(line + "\n")
+            scored += 1
+            outcomes[label] += 1
+            if scored % 100_000 == 0:
+                logger.info(f"Scored {scored:,} calls ({scored / (time.perf_counter() - start):,.0f} calls/s)")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Scored {scored:,} calls in {elapsed:.2f}s "
+        f"({scored / elapsed if elapsed else 0:,.0f} calls/s, {args.workers} workers)"
+    )
+    for outcome, count in outcomes.most_common():
+        logger.info(f"  {outcome:<24} {count:>10,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
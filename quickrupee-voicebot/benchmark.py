@@ -0,0 +1,410 @@
+"""
+Micro-benchmarks for QuickRupee Voice Bot hot paths
+Run: python benchmark.py [name ...]   (no name runs all benchmarks)
+"""
+import asyncio
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark under name"""
+    def register(fn: Callable[[], None]) -> Callable[[], None]:
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def measure(fn: Callable[[], object], iterations: int) -> float:
+    """Average seconds per call of fn over iterations (after a short warm-up)"""
+    for _ in range(min(iterations, 100)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def report(label: str, seconds: float, baseline: float = None):
+    """Print one result line, with speed-up against baseline if given"""
+    line = f"  {label:<40} {seconds * 1e6:>10.2f} us/op"
+    if baseline:
+        line += f"   ({baseline / seconds:.1f}x)"
+    print(line)
+
+
+@benchmark("tts_payload")
+def bench_tts_payload():
+    """Cached-script turn path: per-turn base64 + send_json vs pre-encoded payload"""
+    import demo_server
+    from protocol import PROTOCOL_BINARY, PROTOCOL_JSON
+    from tts_cache import TTSCache
+
+    demo_server.tts_cache = TTSCache(tempfile.mkdtemp(), "alloy", "tts-1", "mp3")
+    text = "Are you currently a salaried employee?"
+    demo_server.tts_cache.put(text, os.urandom(100_000))  # ~6 s of 128 kbps MP3
+    iterations = 2_000
+
+    def old_path():
+        # Previous behaviour: encode the same cached bytes on every turn
+        audio = demo_server.tts_cache.get(text)
+        return json.dumps({"type": "audio_mp3", "data": base64.b64encode(audio).decode("utf-8")})
+
+    async def new_path_loop(protocol: str) -> float:
+        await demo_server.get_cached_payload(text, protocol)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await demo_server.get_cached_payload(text, protocol)
+        return (time.perf_counter() - start) / iterations
+
+    print("tts_payload: 100 KB cached MP3 per turn")
+    baseline = measure(old_path, iterations)
+    report("base64 + json.dumps per turn", baseline)
+    report("get_cached_payload (json)", asyncio.run(new_path_loop(PROTOCOL_JSON)), baseline)
+    report("get_cached_payload (binary)", asyncio.run(new_path_loop(PROTOCOL_BINARY)), baseline)
+    demo_server.tts_cache.close()
+
+
+@benchmark("vad")
+def bench_vad():
+    """Energy gate cost per browser mic chunk (4096 samples of PCM16)"""
+    import numpy as np
+    from vad import EnergyGate
+
+    rng = np.random.default_rng(0)
+    speech = (rng.standard_normal(4096) * 6000).astype("<i2").tobytes()
+    quiet = (rng.standard_normal(4096) * 20).astype("<i2").tobytes()
+    gate = EnergyGate()
+
+    print("vad: 4096-sample (170 ms) chunks at 24 kHz")
+    report("EnergyGate.process (speech)", measure(lambda: gate.process(speech), 5_000))
+    report("EnergyGate.process (silence)", measure(lambda: gate.process(quiet), 5_000))
+
+
+def legacy_parse_yes_no(text: str):
+    """The previous _parse_yes_no: pattern lists rebuilt per call, one re.search each"""
+    import re
+
+    yes_patterns = [
+        r'\byes\b', r'\byeah\b', r'\byep\b', r'\byup\b',
+        r'\bsure\b', r'\baffirmative\b', r'\bcorrect\b',
+        r'\bright\b', r'\bha\b', r'\bhaan\b'
+    ]
+    no_patterns = [
+        r'\bno\b', r'\bnope\b', r'\bnah\b', r'\bnegative\b',
+        r'\bnot\b', r'\bnahi\b', r'\bnahin\b'
+    ]
+    has_yes = any(re.search(p, text, re.IGNORECASE) for p in yes_patterns)
+    has_no = any(re.search(p, text, re.IGNORECASE) for p in no_patterns)
+    if has_yes and not has_no:
+        return (True, True)
+    elif has_no and not has_yes:
+        return (True, False)
+    return (False, False)
+
+
+def transcript_corpus(size: int, seed: int = 7):
+    """Synthetic Whisper-style answers: short yes/no, Hinglish, and rambling sentences"""
+    import random
+
+    rng = random.Random(seed)
+    answers = ["yes", "no", "yeah", "nope", "haan", "nahi", "sure", "not really", "yes i am",
+               "no i am not", "haan ji", "correct", "right", "nahin", "maybe", "i think so"]
+    filler = ["i", "am", "working", "as", "a", "software", "engineer", "in", "mumbai", "salary",
+              "is", "around", "thirty", "thousand", "per", "month", "okay", "so", "well", "um"]
+    corpus = []
+    for _ in range(size):
+        words = [rng.choice(answers)]
+        for _ in range(rng.choice((0, 0, 1, 3, 8, 15))):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(filler))
+        corpus.append(" ".join(words).lower().strip())
+    return corpus
+
+
+@benchmark("yes_no")
+def bench_yes_no():
+    """Legacy per-pattern re.search vs the compiled single-pass classifier"""
+    from state_machine import EligibilityStateMachine
+
+    corpus = transcript_corpus(200_000)
+    classify = EligibilityStateMachine._YES_NO.classify
+
+    mismatches = sum(1 for text in corpus if legacy_parse_yes_no(text) != classify(text))
+
+    start = time.perf_counter()
+    for text in corpus:
+        legacy_parse_yes_no(text)
+    legacy = (time.perf_counter() - start) / len(corpus)
+
+    start = time.perf_counter()
+    for text in corpus:
+        classify(text)
+    compiled = (time.perf_counter() - start) / len(corpus)
+
+    print(f"yes_no: {len(corpus):,} synthetic transcripts ({mismatches} result mismatches)")
+    report("legacy _parse_yes_no", legacy)
+    report("YesNoClassifier.classify", compiled, legacy)
+    print(f"  {'throughput':<40} {1 / compiled:>10,.0f} transcripts/s")
+
+
+@benchmark("sessions")
+def bench_sessions():
+    """Memory held per idle session and cost of one turn through the flow table"""
+    import tracemalloc
+    from state_machine import EligibilityStateMachine
+
+    count = 100_000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [EligibilityStateMachine() for _ in range(count)]
+    for machine in sessions:
+        machine.start()
+        machine.process_response("")
+    per_session = (tracemalloc.get_traced_memory()[0] - before) / count
+    tracemalloc.stop()
+
+    machine = sessions[0]
+
+    def turn():
+        machine.step = 2  # ask_employment
+        return machine.process_response("yes i am")
+
+    print(f"sessions: {count:,} idle sessions at the first question")
+    print(f"  {'memory per session':<40} {per_session:>10.0f} bytes")
+    report("process_response (one turn)", measure(turn, 100_000))
+
+
+# Tracing must stay well below a cached turn's ~1 ms of server work
+TRACE_OVERHEAD_BUDGET_US = 25.0
+
+
+@benchmark("tracing")
+def bench_tracing():
+    """Per-turn cost of span marks, histogram observes and sampled trace export"""
+    from metrics import TURN_EVENTS, TraceExporter, TurnTracer
+
+    trace_file = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    tracer = TurnTracer(exporter=TraceExporter(trace_file, sample_rate=0.01))
+
+    def turn():
+        trace = tracer.start("bench")
+        for event in TURN_EVENTS:
+            trace.mark(event)
+        trace.cache_hit = True
+        trace.finish()
+
+    seconds = measure(turn, 50_000)
+    tracer.exporter.close()
+    print("tracing: one full turn (5 spans, 1% sampled to file)")
+    report("TurnTrace marks + finish", seconds)
+    verdict = "within" if seconds * 1e6 <= TRACE_OVERHEAD_BUDGET_US else "OVER"
+    print(f"  {'budget':<40} {TRACE_OVERHEAD_BUDGET_US:>10.2f} us/op   ({verdict} budget)")
+
+
+def run_sync(coro):
+    """Drive a coroutine that never suspends without an event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+@benchmark("json")
+def bench_json():
+    """Per-event CPU: stdlib json + eager INFO logging vs the JSON codec + lazy DEBUG logging"""
+    import logging
+    from json_codec import codec
+    from openai_realtime import OpenAIRealtimeClient
+
+    # Production-like logging: INFO to a stream handler. It replaces the root handlers while
+    # the benchmark runs (importing demo_server adds a stderr one), so no terminal I/O is timed
+    root = logging.getLogger()
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    old_level, old_handlers = root.level, root.handlers[:]
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+    logger = logging.getLogger("openai_realtime")
+
+    async def legacy_handle(message: str):
+        # Previous _handle_message path for the same events
+        data = json.loads(message)
+        event_type = data.get("type")
+        if event_type == "conversation.item.input_audio_transcription.completed":
+            logger.info(f"User said: {data.get('transcript', '')}")
+        elif event_type == "input_audio_buffer.speech_stopped":
+            logger.info("Speech ended - user stopped speaking")
+
+    client = OpenAIRealtimeClient(url="ws://unused")
+    events = {
+        "speech_stopped": json.dumps({"type": "input_audio_buffer.speech_stopped", "audio_end_ms": 1830,
+                                      "item_id": "item_003"}),
+        "transcription": json.dumps({"type": "conversation.item.input_audio_transcription.completed",
+                                     "item_id": "item_003", "content_index": 0, "transcript": "Yes, I am."}),
+    }
+    control = {"type": "state_update", "state": "ask_salary", "should_end": False, "is_eligible": None}
+    control_in = '{"type":"playback_complete","played":3}'
+    iterations = 50_000
+
+    print(f"json: per-event cost (codec: {codec.name})")
+    for name, message in events.items():
+        before = measure(lambda: run_sync(legacy_handle(message)), iterations)
+        report(f"realtime {name} (json + INFO log)", before)
+        report(f"realtime {name} (_handle_message)", measure(lambda: run_sync(client._handle_message(message)), iterations), before)
+
+    before = measure(lambda: json.dumps(control, separators=(",", ":"), ensure_ascii=False), iterations)
+    report("control out (send_json's json.dumps)", before)
+    report("control out (codec.dumps)", measure(lambda: codec.dumps(control), iterations), before)
+    before = measure(lambda: json.loads(control_in), iterations)
+    report("control in (json.loads)", before)
+    report("control in (codec.loads)", measure(lambda: codec.loads(control_in), iterations), before)
+
+    root.handlers = old_handlers
+    root.setLevel(old_level)
+    handler.close()
+    handler.stream.close()
+
+
+@benchmark("telephony")
+def bench_telephony():
+    """Phone audio transcoding per 20 ms carrier frame, and per cached clip at preload"""
+    from array import array
+    import numpy as np
+    from telephony import ULAW_DECODE, PhoneDecoder, PhoneEncoder, pcm24k_to_ulaw, pcm16_to_ulaw
+
+    rng = np.random.default_rng(0)
+    speech = (rng.standard_normal(480) * 6000).astype("<i2")
+    frame_in = pcm16_to_ulaw(speech[::3])  # 160 bytes: 20 ms at 8 kHz
+    frame_out = speech.tobytes()  # 960 bytes: 20 ms of TTS "pcm" at 24 kHz
+    table = ULAW_DECODE.tolist()
+
+    def scalar_decode(frame: bytes) -> bytes:
+        out, last = array("h"), 0
+        for code in frame:
+            sample = table[code]
+            out.extend((last + (sample - last) // 3, last + 2 * (sample - last) // 3, sample))
+            last = sample
+        return out.tobytes()
+
+    print("telephony: 20 ms frames (160 B μ-law in, 960 B PCM16 out to the Realtime API)")
+    decoder, encoder = PhoneDecoder(), PhoneEncoder()
+    baseline = measure(lambda: scalar_decode(frame_in), 5_000)
+    report("inbound: per-sample Python loop", baseline)
+    inbound = measure(lambda: decoder.decode(frame_in), 20_000)
+    report("inbound: PhoneDecoder.decode", inbound, baseline)
+    outbound = measure(lambda: encoder.encode(frame_out), 20_000)
+    report("outbound: PhoneEncoder.encode (TTS miss)", outbound)
+    clip = np.tile(speech, 250).tobytes()  # 5 s script
+    report("preload: pcm24k_to_ulaw (5 s clip)", measure(lambda: pcm24k_to_ulaw(clip), 200))
+    print(f"  frames/s per core: inbound {1 / inbound:,.0f}, outbound {1 / outbound:,.0f}"
+          f" ({1 / inbound / 50:,.0f} concurrent calls' caller audio)")
+
+
+@benchmark("outcomes")
+def bench_outcomes():
+    """Lead outcome writes: one per call vs batched, per outcome"""
+    from outcome_sink import OutcomeSink, create_outcome_writer
+    from state_machine import EligibilityStateMachine
+
+    print("outcomes (per outcome)")
+    # A call rejected on salary, recorded the way demo_server records it
+    machine = EligibilityStateMachine()
+    machine.start()
+    machine.process_response("")
+    answers = []
+    for text in ("yes", "no"):
+        question = machine.get_current_state()
+        result = machine.process_response(text)
+        answers.append({"question": question, "answer": text, "valid": result.is_valid})
+    record = {
+        "session_id": "bench", "finished_at": time.time(), "is_eligible": result.is_eligible,
+        "rejection_reason": result.rejection_reason, "state": result.state, "resumed": False,
+        "answers": answers, "turn_latency_ms": [112.4, 98.1], "handle_time_s": 21.7,
+    }
+    batch = [record] * 200
+    directory = tempfile.mkdtemp()
+    for label, url in (("sqlite", f"sqlite:///{directory}/outcomes.db"), ("jsonl", f"jsonl:///{directory}/outcomes")):
+        writer = create_outcome_writer(url)
+        single = measure(lambda: writer.write_batch([record]), 500)
+        report(f"{label} write per outcome", single)
+        report(f"{label} write in batches of {len(batch)}", measure(lambda: writer.write_batch(batch), 50) / len(batch), single)
+        writer.close()
+
+    async def sink_run(count: int) -> dict:
+        sink = OutcomeSink(f"sqlite:///{directory}/sink.db", max_queue=count, flush_interval=0.01)
+        await sink.start()
+        start = time.perf_counter()
+        for _ in range(count):
+            sink.submit(record)
+        submit_seconds = (time.perf_counter() - start) / count
+        await sink.close()
+        report("OutcomeSink.submit (turn path)", submit_seconds)
+        return sink.stats()
+
+    stats = asyncio.run(sink_run(20_000))
+    print(f"  OutcomeSink sqlite throughput: {stats['write_records_per_s']:,} outcomes/s in {stats['batches']} batches")
+
+
+@benchmark("stitching")
+def bench_stitching():
+    """Parameterized prompt audio stitched from cached PCM segments vs a whole-clip cache hit"""
+    import numpy as np
+    from config import settings
+    from prompt_audio import PromptStitcher, trim_pcm, wav_clip
+    from protocol import PROTOCOL_BINARY, encode_mp3_message, encode_wav_message
+    from telephony import PROTOCOL_TELEPHONY, encode_ulaw_payload, pcm24k_to_ulaw
+    from tts_cache import TTSCache
+
+    stitcher = PromptStitcher([q["prompt"] for q in settings.ELIGIBILITY_QUESTIONS], settings.ELIGIBLE_CITIES)
+    directory = tempfile.mkdtemp()
+    rng = np.random.default_rng(0)
+    text = "Is your monthly in-hand salary above 1,75,000 rupees?"
+    print(f"stitching: {text!r} -> {stitcher.plan(text)}")
+
+    # 80 ms of audio per character: 24 kHz PCM16 segments, ~6 KB/s MP3 and 8 KB/s μ-law whole clips
+    segments = TTSCache(directory, "alloy", "tts-1", "pcm")
+    for segment in stitcher.segments():
+        segments.put(segment, rng.integers(-8000, 8000, len(segment) * 24000 * 8 // 100, dtype="<i2").tobytes())
+    for fmt, rate, protocol, message, convert in (
+        ("mp3", 6000, PROTOCOL_BINARY, lambda audio: encode_mp3_message(audio, PROTOCOL_BINARY),
+         lambda pcm: encode_wav_message(wav_clip(pcm), PROTOCOL_BINARY)),
+        ("ulaw", 8000, PROTOCOL_TELEPHONY, encode_ulaw_payload,
+         lambda pcm: encode_ulaw_payload(pcm24k_to_ulaw(pcm))),
+    ):
+        cache = TTSCache(directory, "alloy", "tts-1", fmt)
+        cache.put(text, rng.integers(0, 256, len(text) * rate * 8 // 100, dtype=np.uint8).tobytes())
+
+        whole = measure(lambda: cache.get_encoded(text, protocol, message), 20_000)
+        report(f"{fmt}: whole-clip cache hit (pre-encoded)", whole)
+        stitched = measure(lambda: convert(stitcher.stitch(text, segments.get)), 500)
+        report(f"{protocol}: stitch + encode (first turn)", stitched)
+        # Later turns: the stitched clip is kept under the prompt's text, its payload memoized
+        segments.put(text, stitcher.stitch(text, segments.get))
+        memo = measure(lambda: segments.get_encoded(text, protocol, convert), 20_000)
+        report(f"{protocol}: stitched, later turns", memo, stitched)
+        cache.close()
+
+    report("plan (template match + number words)", measure(lambda: stitcher.plan(text), 20_000))
+    silence = np.zeros(2400, dtype="<i2").tobytes()  # 100 ms either side
+    segment = silence + rng.integers(-8000, 8000, 12_000, dtype="<i2").tobytes() + silence
+    report("trim_pcm per segment (preload)", measure(lambda: trim_pcm(segment), 5_000))
+    segments.close()
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            sys.exit(1)
+        BENCHMARKS[name]()
@@ -1,7 +1,7 @@
 """
 Configuration management for QuickRupee Voice Bot - Demo Version
 """
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +11,22 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4o-realtime-preview-2024-12-17"
+    OPENAI_API_BASE: str = "https://api.openai.com/v1"
+    OPENAI_REALTIME_URL: str = "wss://api.openai.com/v1/realtime"
+
+    # Pre-warmed Realtime API connections (0 disables the pool)
+    REALTIME_POOL_SIZE: int = 2
+    REALTIME_POOL_MAX_IDLE: float = 300.0  # Seconds a warm socket may wait before it is retired
+    REALTIME_POOL_REFRESH_INTERVAL: float = 5.0
+
+    # Shared HTTP client for OpenAI REST calls
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # Seconds
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 30.0
+    HTTP_POOL_TIMEOUT: float = 5.0
+    HTTP_HTTP2: bool = True
 
     # Application Configuration
     HOST: str = "0.0.0.0"
@@ -21,13 +37,113 @@ class Settings(BaseSettings):
     MIN_SALARY: int = 25000
     ELIGIBLE_CITIES: List[str] = ["delhi", "mumbai", "bangalore"]
 
+    # Eligibility questions, asked in order; a "no" ends the call with rejection_reason.
+    # {min_salary} and {cities} in a prompt are filled from the criteria above.
+    ELIGIBILITY_QUESTIONS: List[Dict[str, str]] = [
+        {
+            "state": "ask_employment",
+            "prompt": "Are you currently a salaried employee?",
+            "rejection_reason": "not_salaried",
+        },
+        {
+            "state": "ask_salary",
+            "prompt": "Is your monthly in-hand salary above {min_salary} rupees?",
+            "rejection_reason": "salary_below_threshold",
+        },
+        {
+            "state": "ask_city",
+            "prompt": "Do you currently live in a metro city such as {cities}?",
+            "rejection_reason": "not_in_metro",
+        },
+    ]
+
+    # Extra yes/no vocabulary, e.g. Hindi/Hinglish ("haan ji", "bilkul", "nahi ji")
+    YES_WORDS_EXTRA: List[str] = []
+    NO_WORDS_EXTRA: List[str] = []
+
     # Voice Configuration
     VOICE: str = "alloy"  # OpenAI TTS voice options: alloy, echo, fable, onyx, nova, shimmer
     LANGUAGE: str = "en"
 
+    # TTS Configuration
+    TTS_MODEL: str = "tts-1"
+    TTS_FORMAT: str = "mp3"
+    TTS_CACHE_DIR: str = ".tts_cache"  # Shared by all workers on the host
+    TTS_PRELOAD_CONCURRENCY: int = 4
+    TTS_PRELOAD_RETRIES: int = 3
+    TTS_PRELOAD_BACKOFF: float = 0.5  # Seconds, doubled on each retry
+    # States whose scripts must be cached before sessions are accepted
+    TTS_CRITICAL_STATES: List[str] = ["greeting", "ask_employment"]
+
+    # Phone calls over /telephony/media (8 kHz μ-law); scripts are also cached pre-transcoded for them
+    TELEPHONY_ENABLED: bool = True
+
+    # Parameterized prompts ({min_salary}, {amount}, {city}, {cities}) stitched from cached segments on a TTS miss.
+    # ELIGIBILITY_QUESTIONS prompts are always templates: they are stitched until their whole clip is cached
+    PROMPT_STITCHING: bool = True
+    PROMPT_TEMPLATES: List[str] = []  # Extra app messages, rendered with str.format(amount=..., city=...)
+
+    # Upstream audio queue (browser -> Realtime API)
+    AUDIO_QUEUE_MAX_CHUNKS: int = 64
+    AUDIO_BATCH_MAX_BYTES: int = 48000  # 1 s of 24 kHz PCM16
+    AUDIO_BATCH_WINDOW_MS: int = 20  # Max time spent coalescing one append event
+    AUDIO_BACKPRESSURE_TIMEOUT: float = 0.5  # Seconds to wait on a full queue before dropping
+
+    # Voice activity gate (drops silent mic audio before the Realtime API)
+    VAD_ENABLED: bool = True
+    VAD_THRESHOLD_DBFS: float = -45.0
+    VAD_FRAME_MS: int = 20
+    VAD_PREROLL_MS: int = 300
+    # Must exceed the Realtime API's silence_duration_ms so it still detects end of speech
+    VAD_HANGOVER_MS: int = 800
+
+    # Speech-to-text model; gpt-4o(-mini)-transcribe stream incremental deltas, whisper-1 sends one
+    TRANSCRIPTION_MODEL: str = "whisper-1"
+    # Act on a confident yes/no in the partial transcript instead of waiting for the final one
+    EARLY_DECISIONS: bool = True
+    EARLY_DECISION_MAX_WORDS: int = 3
+
+    # Session actor mailbox (Realtime events awaiting FSM/TTS work); overflow is dropped, never blocks intake
+    SESSION_EVENT_QUEUE_SIZE: int = 16
+
+    # Turn timing: waits on protocol acknowledgements, capped by these timeouts
+    TURN_COMMIT_TIMEOUT: float = 0.3  # Seconds to wait for input_audio_buffer.committed
+    PLAYBACK_COMPLETE_TIMEOUT: float = 20.0  # Seconds to wait for the browser to finish playback
+
+    # Session store: snapshots of in-flight calls so a dropped caller can resume on any worker
+    # memory:// (this worker only), sqlite:///path/sessions.db (all workers on the host) or redis://host:6379/0
+    SESSION_STORE_URL: str = "memory://"
+    SESSION_TTL: int = 900  # Seconds a call can be resumed after its last turn
+    # Dropped calls parked on their worker (with the warm Realtime connection) for a fast resume
+    RESUME_GRACE_PERIOD: float = 30.0  # Seconds; 0 disables parking
+    RESUME_MAX_PARKED: int = 100
+    RESUME_KEEP_REALTIME: bool = True
+
+    # Admission control: per-worker call limit, short wait queue, then 1013 "try again later"
+    ADMISSION_MAX_SESSIONS: int = 100
+    ADMISSION_QUEUE_SIZE: int = 20
+    ADMISSION_QUEUE_TIMEOUT: float = 10.0  # Seconds a caller may wait for a slot
+    ADMISSION_MAX_LOOP_LAG_MS: float = 100.0  # No new calls start while the event loop lags more
+    ADMISSION_MAX_COLD_CONNECTS: int = 8  # Realtime handshakes in flight once the warm pool is empty
+    ADMISSION_RETRY_AFTER: int = 5  # Seconds suggested to rejected callers
+
+    # Lead outcomes: queued in memory and written in batches off the turn path
+    # sqlite:///path/outcomes.db (WAL, shared by workers) or jsonl:///path/dir (append-only segments)
+    OUTCOME_STORE_URL: str = "sqlite:///outcomes.db"
+    OUTCOME_QUEUE_MAX: int = 10000  # Outcomes held in memory; beyond this new ones are dropped
+    OUTCOME_BATCH_SIZE: int = 200
+    OUTCOME_FLUSH_INTERVAL: float = 0.5  # Max seconds an outcome waits to be written
+
     # Logging
     LOG_LEVEL: str = "INFO"
 
+    # JSON codec for WebSocket events: auto (orjson if installed), orjson, or json
+    JSON_CODEC: str = "auto"
+
+    # Turn tracing: stage histograms are always on at /metrics; sampled traces go to TRACE_FILE if set
+    TRACE_FILE: str = ""
+    TRACE_SAMPLE_RATE: float = 0.01
+
     class Config:
         env_file = ".env"
         case_sensitive = True
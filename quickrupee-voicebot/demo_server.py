@@ -4,90 +4,411 @@ Browser-based demo for local testing and interviews
 """
 import asyncio
 import logging
-import json
-import base64
-import httpx
+import functools
+import secrets
+import time
 from contextlib import asynccontextmanager
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 import uvicorn
 
 from config import settings
-from state_machine import EligibilityStateMachine
+from state_machine import EligibilityFlow, EligibilityStateMachine
 from openai_realtime import OpenAIRealtimeClient
+from tts_cache import TTSCache, preload
+from http_pool import HTTPPool
+from realtime_pool import RealtimePool
+from vad import EnergyGate
+from metrics import Histogram, TraceExporter, TurnTrace, TurnTracer, gauge, render
+from session_actor import EVENT_BUCKETS, SessionActor
+from admission import AdmissionController, AdmissionRejected, LoopLagMonitor
+from session_store import ParkingLot, SessionRegistry, create_store
+from outcome_sink import OutcomeSink
+from prompt_audio import PromptStitcher, trim_pcm, wav_clip
+from telephony import PROTOCOL_TELEPHONY, PhoneEncoder, TelephonyChannel, encode_ulaw_payload, pcm24k_to_ulaw
+from protocol import (
+    BrowserChannel,
+    ProtocolError,
+    PROTOCOL_BINARY,
+    PROTOCOL_JSON,
+    encode_mp3_message,
+    encode_wav_message,
+)
+
+
+# Shared pooled client for OpenAI REST calls (opened/closed in lifespan)
+http_pool = HTTPPool(
+    base_url=settings.OPENAI_API_BASE,
+    api_key=settings.OPENAI_API_KEY,
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+    read_timeout=settings.HTTP_READ_TIMEOUT,
+    pool_timeout=settings.HTTP_POOL_TIMEOUT,
+    http2=settings.HTTP_HTTP2,
+)
 
 
-async def text_to_speech(text: str) -> Optional[bytes]:
+async def text_to_speech(text: str, response_format: str = settings.TTS_FORMAT) -> Optional[bytes]:
     """Convert text to speech using OpenAI TTS API (reliable, non-realtime)"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.openai.com/v1/audio/speech",
-                headers={
-                    "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "tts-1",
-                    "input": text,
-                    "voice": settings.VOICE,
-                    "response_format": "mp3",
-                },
-                timeout=30.0,
-            )
-            if response.status_code == 200:
-                return response.content
-            else:
-                logging.error(f"TTS API error: {response.status_code} - {response.text}")
-                return None
+        response = await http_pool.post(
+            "/audio/speech",
+            json={
+                "model": settings.TTS_MODEL,
+                "input": text,
+                "voice": settings.VOICE,
+                "response_format": response_format,
+            },
+        )
+        if response.status_code == 200:
+            return response.content
+        else:
+            logging.error(f"TTS API error: {response.status_code} - {response.text}")
+            return None
     except Exception as e:
         logging.error(f"TTS error: {e}")
         return None
 
 
-# TTS Cache for pre-generated audio
-tts_cache: Dict[str, bytes] = {}
+async def stream_tts(text: str, response_format: str = settings.TTS_FORMAT) -> AsyncIterator[bytes]:
+    """
+    Stream TTS audio chunks as they arrive from the API
+    The complete clip is written to the TTS cache once the stream finishes
+    (TTS_FORMAT only; phone audio is cached after transcoding)
+    """
+    chunks: List[bytes] = []
+    try:
+        async with http_pool.stream(
+            "/audio/speech",
+            json={
+                "model": settings.TTS_MODEL,
+                "input": text,
+                "voice": settings.VOICE,
+                "response_format": response_format,
+            },
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                logging.error(f"TTS API error: {response.status_code} - {body[:200]!r}")
+                return
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                yield chunk
+    except Exception as e:
+        logging.error(f"TTS stream error: {e}")
+        return
+
+    if response_format == settings.TTS_FORMAT:
+        tts_cache.put(text, b"".join(chunks))
+
+
+# TTS Cache for pre-generated audio (persistent, shared by all workers)
+tts_cache = TTSCache(
+    cache_dir=settings.TTS_CACHE_DIR,
+    voice=settings.VOICE,
+    model=settings.TTS_MODEL,
+    response_format=settings.TTS_FORMAT,
+)
 
 
 async def get_cached_tts(text: str) -> Optional[bytes]:
     """Get TTS from cache or generate if not cached"""
-    if text in tts_cache:
-        return tts_cache[text]
+    audio = tts_cache.get(text)
+    if audio is not None:
+        return audio
 
     # Generate and cache
     audio = await text_to_speech(text)
     if audio:
-        tts_cache[text] = audio
+        tts_cache.put(text, audio)
     return audio
 
 
-async def preload_tts_cache():
-    """Pre-generate TTS for all known scripts at startup"""
-    from state_machine import EligibilityStateMachine, State
+# The same scripts as 8 kHz μ-law for phone calls, transcoded once from TTS "pcm" output
+ulaw_cache = TTSCache(
+    cache_dir=settings.TTS_CACHE_DIR,
+    voice=settings.VOICE,
+    model=settings.TTS_MODEL,
+    response_format="ulaw",
+)
+
+
+async def text_to_ulaw(text: str) -> Optional[bytes]:
+    """Synthesize 24 kHz PCM and transcode it to 8 kHz μ-law for phone calls"""
+    pcm = await text_to_speech(text, response_format="pcm")
+    return pcm24k_to_ulaw(pcm) if pcm else None
+
+
+def prompt_templates() -> List[str]:
+    """
+    Question prompts as written in config (with {slots}), as asked and as re-asked
+
+    The questions' {min_salary}/{cities} prompts are stitched whenever their
+    rendered clip isn't cached yet (cold cache, or MIN_SALARY/ELIGIBLE_CITIES
+    just changed): the segments don't depend on those values. PROMPT_TEMPLATES
+    adds app messages rendered with {amount}/{city}.
+    """
+    prompts = [q["prompt"] for q in settings.ELIGIBILITY_QUESTIONS] + settings.PROMPT_TEMPLATES
+    return prompts + [EligibilityFlow.CLARIFICATION + p for p in prompts]
+
+
+# Parameterized prompts spoken from cached segments (fixed text, number words, cities) on a TTS miss
+prompt_stitcher = PromptStitcher(prompt_templates(), settings.ELIGIBLE_CITIES)
+
+# Prompt segments as 24 kHz PCM16, silence trimmed so they join without gaps
+segment_cache = TTSCache(
+    cache_dir=settings.TTS_CACHE_DIR,
+    voice=settings.VOICE,
+    model=settings.TTS_MODEL,
+    response_format="pcm",
+)
+
+
+async def text_to_pcm_segment(text: str) -> Optional[bytes]:
+    """Trimmed 24 kHz PCM for a prompt segment"""
+    pcm = await text_to_speech(text, response_format="pcm")
+    return trim_pcm(pcm) if pcm else None
+
+
+def encode_stitched(pcm: memoryview, protocol: str) -> Union[bytes, str]:
+    """Outbound message for a stitched prompt: μ-law for phones, a WAV clip for the browser"""
+    if protocol == PROTOCOL_TELEPHONY:
+        return encode_ulaw_payload(pcm24k_to_ulaw(pcm))
+    return encode_wav_message(wav_clip(pcm), protocol)
+
+
+def get_stitched_payload(text: str, protocol: str) -> Optional[Union[bytes, str]]:
+    """
+    Ready-to-send message for a parameterized prompt stitched from cached segments
+    The stitched clip is kept under the prompt's text, so later turns reuse the encoded payload
+
+    Returns:
+        None if the prompt cannot be stitched
+    """
+    if not settings.PROMPT_STITCHING:
+        return None
+    encode = functools.partial(encode_stitched, protocol=protocol)
+    payload = segment_cache.get_encoded(text, protocol, encode)
+    if payload is None:
+        pcm = prompt_stitcher.stitch(text, segment_cache.get)
+        if pcm is None:
+            return None
+        segment_cache.put(text, pcm)
+        # Cached now, unless the disk write failed
+        payload = segment_cache.get_encoded(text, protocol, encode) or encode(pcm)
+    return payload
+
+
+# Outbound MP3 message encoder per wire protocol
+MP3_ENCODERS = {
+    protocol: functools.partial(encode_mp3_message, protocol=protocol)
+    for protocol in (PROTOCOL_JSON, PROTOCOL_BINARY)
+}
+
+
+async def get_cached_payload(text: str, protocol: str) -> Optional[Union[bytes, str]]:
+    """
+    Get the ready-to-send audio message for text in a wire protocol
+    Cache hits return a pre-serialized payload: no per-turn encoding or allocation
+    """
+    encode = MP3_ENCODERS[protocol]
+    payload = tts_cache.get_encoded(text, protocol, encode)
+    if payload is None:
+        audio = await get_cached_tts(text)
+        if not audio:
+            return None
+        # Cached now, unless the disk write failed
+        payload = tts_cache.get_encoded(text, protocol, encode) or encode(audio)
+    return payload
+
+
+async def send_phone_audio(channel: TelephonyChannel, text: str, trace: Optional[TurnTrace] = None) -> Optional[float]:
+    """
+    Send the bot's audio for text to a phone call as μ-law, followed by a playback mark
+
+    Cache hits are the clip transcoded and base64-encoded at preload. Misses
+    stream TTS "pcm" output through the transcoder chunk by chunk, and the
+    whole clip is cached for later calls.
+    """
+    start = time.perf_counter()
+    payload = ulaw_cache.get_encoded(text, PROTOCOL_TELEPHONY, encode_ulaw_payload)
+    if payload is not None:
+        await channel.send_ulaw(payload)
+        await channel.end_clip()
+        if trace:
+            trace.cache_hit = True
+            trace.mark("audio_sent")
+        return (time.perf_counter() - start) * 1000
+
+    stitched = get_stitched_payload(text, PROTOCOL_TELEPHONY)
+    if stitched is not None:
+        await channel.send_ulaw(stitched)
+        await channel.end_clip()
+        if trace:
+            trace.cache_hit = True
+            trace.mark("audio_sent")
+        return (time.perf_counter() - start) * 1000
+
+    first_byte_ms = None
+    encoder = PhoneEncoder()
+    clip: List[bytes] = []
+    async for chunk in stream_tts(text, response_format="pcm"):
+        ulaw = encoder.encode(chunk)
+        if not ulaw:
+            continue
+        if first_byte_ms is None:
+            first_byte_ms = (time.perf_counter() - start) * 1000
+            if trace:
+                trace.cache_hit = False
+                trace.mark("audio_sent")
+        clip.append(ulaw)
+        await channel.send_ulaw(encode_ulaw_payload(ulaw))
+    if first_byte_ms is not None:
+        await channel.end_clip()
+        ulaw_cache.put(text, b"".join(clip))
+    return first_byte_ms
+
+
+async def send_bot_audio(
+    channel: Union[BrowserChannel, TelephonyChannel], text: str, trace: Optional[TurnTrace] = None
+) -> Optional[float]:
+    """
+    Send the bot's audio for text to the browser (or phone line)
 
-    scripts_to_cache = [
-        EligibilityStateMachine.SCRIPTS[State.GREETING],
-        EligibilityStateMachine.SCRIPTS[State.ASK_EMPLOYMENT],
-        EligibilityStateMachine.SCRIPTS[State.ASK_SALARY],
-        EligibilityStateMachine.SCRIPTS[State.ASK_CITY],
-        EligibilityStateMachine.SCRIPTS[State.ELIGIBLE],
-        EligibilityStateMachine.SCRIPTS[State.NOT_ELIGIBLE],
-        # Invalid response clarification
-        "I'm sorry, I didn't understand. Please say Yes or No. " + EligibilityStateMachine.SCRIPTS[State.ASK_EMPLOYMENT],
-        "I'm sorry, I didn't understand. Please say Yes or No. " + EligibilityStateMachine.SCRIPTS[State.ASK_SALARY],
-        "I'm sorry, I didn't understand. Please say Yes or No. " + EligibilityStateMachine.SCRIPTS[State.ASK_CITY],
-    ]
+    Cache hits go out as one pre-encoded payload. A parameterized prompt not
+    in the cache is stitched from cached segments. Other misses are streamed
+    chunk by chunk as the TTS API produces them, so playback starts on the
+    first chunk.
 
+    Returns:
+        Time to first audio byte in milliseconds, or None if no audio was sent
+    """
+    start = time.perf_counter()
+    if trace:
+        trace.mark("tts_lookup")
+    if channel.protocol == PROTOCOL_TELEPHONY:
+        return await send_phone_audio(channel, text, trace)
+    payload = tts_cache.get_encoded(text, channel.protocol, MP3_ENCODERS[channel.protocol])
+    if payload is not None:
+        await channel.send_payload(payload)
+        if trace:
+            trace.cache_hit = True
+            trace.mark("audio_sent")
+        return (time.perf_counter() - start) * 1000
+
+    stitched = get_stitched_payload(text, channel.protocol)
+    if stitched is not None:
+        await channel.send_payload(stitched)
+        if trace:
+            trace.cache_hit = True
+            trace.mark("audio_sent")
+        return (time.perf_counter() - start) * 1000
+
+    first_byte_ms = None
+    async for chunk in stream_tts(text):
+        if first_byte_ms is None:
+            first_byte_ms = (time.perf_counter() - start) * 1000
+            if trace:
+                trace.cache_hit = False
+                trace.mark("audio_sent")
+        await channel.send_mp3_chunk(chunk)
+    if first_byte_ms is not None:
+        await channel.send_mp3_chunk(b"", final=True)
+    return first_byte_ms
+
+
+def tts_scripts() -> List[str]:
+    """All known scripts the bot can speak, including re-asked questions"""
+    return EligibilityStateMachine.FLOW.messages()
+
+
+def critical_tts_scripts() -> List[str]:
+    """Scripts that must be cached before sessions are accepted (greeting + first question)"""
+    return [EligibilityStateMachine.SCRIPTS[name] for name in settings.TTS_CRITICAL_STATES]
+
+
+async def preload_tts_cache(scripts_to_cache: List[str]):
+    """Pre-generate TTS for scripts with bounded concurrency and retries"""
     logging.info(f"Pre-loading TTS cache for {len(scripts_to_cache)} scripts...")
+    start = time.perf_counter()
+
+    results = await preload(
+        tts_cache,
+        scripts_to_cache,
+        synthesize=text_to_speech,
+        concurrency=settings.TTS_PRELOAD_CONCURRENCY,
+        retries=settings.TTS_PRELOAD_RETRIES,
+        backoff=settings.TTS_PRELOAD_BACKOFF,
+    )
 
-    for script in scripts_to_cache:
-        audio = await text_to_speech(script)
-        if audio:
-            tts_cache[script] = audio
-            logging.info(f"Cached: {script[:50]}...")
+    # Serialize outbound messages once per protocol so turns are a single write
+    for result in results:
+        if result.ok:
+            for protocol in (PROTOCOL_JSON, PROTOCOL_BINARY):
+                await get_cached_payload(result.text, protocol)
+
+    # Phone calls: transcode to μ-law here, once, not per turn
+    if settings.TELEPHONY_ENABLED:
+        phone_results = await preload(
+            ulaw_cache,
+            scripts_to_cache,
+            synthesize=text_to_ulaw,
+            concurrency=settings.TTS_PRELOAD_CONCURRENCY,
+            retries=settings.TTS_PRELOAD_RETRIES,
+            backoff=settings.TTS_PRELOAD_BACKOFF,
+        )
+        for result in phone_results:
+            if result.ok:
+                ulaw_cache.get_encoded(result.text, PROTOCOL_TELEPHONY, encode_ulaw_payload)
+            else:
+                logging.error(f"Failed to cache phone audio after {result.attempts} attempts: {result.text[:50]}...")
+
+    for result in results:
+        source = "disk" if result.from_disk else f"generated, {result.attempts} attempt(s)"
+        if result.ok:
+            logging.info(f"Cached in {result.elapsed * 1000:.0f} ms ({source}): {result.text[:50]}...")
+        else:
+            logging.error(f"Failed to cache after {result.attempts} attempts: {result.text[:50]}...")
+
+    from_disk = sum(1 for r in results if r.from_disk)
+    generated = sum(1 for r in results if r.ok and not r.from_disk)
+    logging.info(
+        f"TTS preload finished in {(time.perf_counter() - start) * 1000:.0f} ms "
+        f"({from_disk} from disk, {generated} generated, {len(results) - from_disk - generated} failed)"
+    )
+
+
+async def start_tts_preload() -> asyncio.Task:
+    """
+    Pre-load the TTS cache: wait for the critical scripts, fill the rest in the background
+
+    Returns:
+        The background task, cancelled on shutdown
+    """
+    critical_scripts = critical_tts_scripts()
+    await preload_tts_cache(critical_scripts)
+    return asyncio.create_task(preload_tts_cache([s for s in tts_scripts() if s not in critical_scripts]))
+
+
+async def preload_prompt_segments():
+    """Pre-generate every segment parameterized prompts are stitched from (one PCM clip serves both protocols)"""
+    segments = prompt_stitcher.segments()
+    logging.info(f"Pre-loading {len(segments)} prompt segments...")
+    results = await preload(
+        segment_cache,
+        segments,
+        synthesize=text_to_pcm_segment,
+        concurrency=settings.TTS_PRELOAD_CONCURRENCY,
+        retries=settings.TTS_PRELOAD_RETRIES,
+        backoff=settings.TTS_PRELOAD_BACKOFF,
+    )
+    failed = [r.text for r in results if not r.ok]
+    if failed:
+        logging.error(f"Failed to cache {len(failed)} prompt segments, those prompts fall back to TTS: {failed}")
 
-    logging.info(f"TTS cache loaded with {len(tts_cache)} entries")
 
 # Configure logging
 logging.basicConfig(
@@ -96,9 +417,170 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def log_tts_latency(session_id: str, first_byte_ms: Optional[float]):
+    """Report time to first audio byte for one bot turn"""
+    if first_byte_ms is None:
+        logger.warning("[%s] No TTS audio sent for turn", session_id)
+    else:
+        logger.info("[%s] TTS first byte in %.1f ms", session_id, first_byte_ms)
+
+
+# Pre-warmed Realtime API connections (started/closed in lifespan)
+realtime_pool = RealtimePool(
+    size=settings.REALTIME_POOL_SIZE,
+    max_idle=settings.REALTIME_POOL_MAX_IDLE,
+    refresh_interval=settings.REALTIME_POOL_REFRESH_INTERVAL,
+)
+
+
+def upstream_has_capacity() -> bool:
+    """Room upstream for another call: a warm Realtime client or a free handshake slot, and an HTTP connection"""
+    realtime = realtime_pool.stats()
+    if realtime["idle"] == 0 and realtime["cold_connecting"] >= settings.ADMISSION_MAX_COLD_CONNECTS:
+        return False
+    return http_pool.in_flight < http_pool.limits.max_connections
+
+
+# Event-loop lag probe (started in lifespan) and the gate in front of new calls
+lag_monitor = LoopLagMonitor()
+admission = AdmissionController(
+    max_sessions=settings.ADMISSION_MAX_SESSIONS,
+    queue_size=settings.ADMISSION_QUEUE_SIZE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    max_lag=settings.ADMISSION_MAX_LOOP_LAG_MS / 1000,
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+    lag_monitor=lag_monitor,
+    has_capacity=upstream_has_capacity,
+)
+
+# Max user audio held per session while the Realtime connection is set up (10 s of 24 kHz PCM16)
+MAX_PENDING_AUDIO_BYTES = 24000 * 2 * 10
+
 # Active sessions
 sessions: Dict[str, EligibilityStateMachine] = {}
 
+# FSM snapshots of in-flight calls, shared with other workers so a dropped caller can resume anywhere
+session_registry = SessionRegistry(create_store(settings.SESSION_STORE_URL), ttl=settings.SESSION_TTL)
+
+# Dropped calls held on this worker with their Realtime connection, for a fast resume
+parking_lot = ParkingLot(grace=settings.RESUME_GRACE_PERIOD, max_sessions=settings.RESUME_MAX_PARKED)
+
+# Finished screenings for the callback team, written in batches (started/drained in lifespan)
+outcome_sink = OutcomeSink(
+    settings.OUTCOME_STORE_URL,
+    max_queue=settings.OUTCOME_QUEUE_MAX,
+    batch_size=settings.OUTCOME_BATCH_SIZE,
+    flush_interval=settings.OUTCOME_FLUSH_INTERVAL,
+)
+
+# Call handling statistics for this worker
+call_stats = {"calls": 0, "handle_time_total": 0.0, "turns": 0, "turn_latency_total": 0.0}
+
+# Turns taken on a partial transcript, and whether the final transcript agreed
+early_stats = {"taken": 0, "confirmed": 0, "corrected": 0}
+
+
+def record_turn_latency(session_id: str, latency: float):
+    """Record time from transcript received to bot audio sent for one turn"""
+    call_stats["turns"] += 1
+    call_stats["turn_latency_total"] += latency
+    logger.info("[%s] Turn latency %.1f ms", session_id, latency * 1000)
+
+
+def call_summary() -> Dict[str, object]:
+    """Mean handle time and per-turn latency for /health"""
+    calls, turns = call_stats["calls"], call_stats["turns"]
+    return {
+        "completed_calls": calls,
+        "mean_handle_time_s": round(call_stats["handle_time_total"] / calls, 2) if calls else 0.0,
+        "turns": turns,
+        "mean_turn_latency_ms": round(call_stats["turn_latency_total"] / turns * 1000, 1) if turns else 0.0,
+    }
+
+
+class TurnEvents:
+    """
+    Protocol acknowledgements a session waits on instead of fixed sleeps
+
+    - committed: the Realtime API acknowledged input_audio_buffer.commit
+    - playback: the browser reports how many bot clips it has finished playing
+    """
+
+    def __init__(self):
+        self.committed = asyncio.Event()
+        self.clips_sent = 0
+        self.clips_played = 0
+        self._played = asyncio.Event()
+
+    def clip_sent(self):
+        self.clips_sent += 1
+        self._played.clear()
+
+    def playback_complete(self, clips_played: int):
+        self.clips_played = max(self.clips_played, clips_played)
+        if self.clips_played >= self.clips_sent:
+            self._played.set()
+
+    async def wait_committed(self, timeout: float) -> bool:
+        """Wait for the commit ack of the current turn, then re-arm for the next"""
+        try:
+            await asyncio.wait_for(self.committed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.committed.clear()
+
+    async def wait_playback(self, timeout: float) -> bool:
+        """Wait until the browser has played every clip sent so far"""
+        if self.clips_played >= self.clips_sent:
+            return True
+        try:
+            await asyncio.wait_for(self._played.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+# Per-turn stage spans for /metrics (sampled trace export is configured in lifespan)
+turn_tracer = TurnTracer()
+
+# Session actor mailbox wait and handler time, per event kind
+session_event_stages = Histogram(
+    "quickrupee_session_event_seconds",
+    "Session actor mailbox wait and handler time per event",
+    label="stage",
+    buckets=EVENT_BUCKETS,
+)
+
+# Voice activity gates for active sessions, plus totals from finished ones
+vad_gates: Dict[str, EnergyGate] = {}
+vad_totals = {"bytes_in": 0, "bytes_saved": 0}
+
+
+def new_vad_gate() -> EnergyGate:
+    """Create a per-session voice activity gate from settings"""
+    return EnergyGate(
+        sample_rate=24000,  # Browser captures 24 kHz PCM16
+        frame_ms=settings.VAD_FRAME_MS,
+        threshold_dbfs=settings.VAD_THRESHOLD_DBFS,
+        preroll_ms=settings.VAD_PREROLL_MS,
+        hangover_ms=settings.VAD_HANGOVER_MS,
+    )
+
+
+def vad_summary() -> Dict[str, object]:
+    """Upstream audio bytes received and saved by VAD gating in this worker"""
+    bytes_in = vad_totals["bytes_in"] + sum(g.bytes_in for g in vad_gates.values())
+    bytes_saved = vad_totals["bytes_saved"] + sum(g.bytes_saved for g in vad_gates.values())
+    return {
+        "enabled": settings.VAD_ENABLED,
+        "bytes_in": bytes_in,
+        "bytes_saved": bytes_saved,
+        "saved_ratio": round(bytes_saved / bytes_in, 3) if bytes_in else 0.0,
+    }
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -109,8 +591,21 @@ async def lifespan(app: FastAPI):
     logger.info(f"Min salary threshold: ₹{settings.MIN_SALARY}")
     logger.info(f"Eligible cities: {settings.ELIGIBLE_CITIES}")
 
-    # Pre-load TTS cache for instant responses
-    await preload_tts_cache()
+    await http_pool.start()
+    await lag_monitor.start()
+    await outcome_sink.start()
+
+    if settings.TRACE_FILE:
+        turn_tracer.exporter = TraceExporter(settings.TRACE_FILE, settings.TRACE_SAMPLE_RATE)
+        logger.info(f"Exporting {settings.TRACE_SAMPLE_RATE:.0%} of turn traces to {settings.TRACE_FILE}")
+
+    # Segments first: questions not yet cached whole are stitched meanwhile
+    segment_preload = asyncio.create_task(preload_prompt_segments()) if settings.PROMPT_STITCHING else None
+    background_preload = await start_tts_preload()
+
+    # Keep Realtime sessions warm so calls skip the handshake
+    await realtime_pool.start()
+    await parking_lot.start()
 
     logger.info("=" * 60)
     logger.info("🎙️  Demo Mode - No Twilio Required")
@@ -121,8 +616,21 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("QuickRupee Voice Bot Demo shutting down...")
+    background_preload.cancel()
+    if segment_preload:
+        segment_preload.cancel()
+    await lag_monitor.close()
+    await parking_lot.close()
+    await realtime_pool.close()
+    await http_pool.close()
     sessions.clear()
-    tts_cache.clear()
+    tts_cache.close()
+    ulaw_cache.close()
+    segment_cache.close()
+    await session_registry.close()
+    await outcome_sink.close()  # Writes every outcome still queued
+    if turn_tracer.exporter:
+        turn_tracer.exporter.close()
 
 
 # FastAPI app with lifespan
@@ -148,11 +656,47 @@ async def health_check():
     return {
         "status": "healthy",
         "active_sessions": len(sessions),
+        "cluster_active_sessions": await session_registry.active_count(),
         "openai_configured": bool(settings.OPENAI_API_KEY),
         "mode": "demo",
+        "http_pool": http_pool.stats(),
+        "realtime_pool": realtime_pool.stats(),
+        "parked_sessions": parking_lot.stats(),
+        "event_loop": lag_monitor.stats(),
+        "admission": admission.stats(),
+        "vad": vad_summary(),
+        "calls": call_summary(),
+        "early_decisions": early_stats,
+        "outcomes": outcome_sink.stats(),
+        "prompt_stitching": prompt_stitcher.stats(),
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: turn stage histograms plus pool and call counters"""
+    pool, realtime, calls = http_pool.stats(), realtime_pool.stats(), call_summary()
+    body = render([
+        gauge("quickrupee_active_sessions", "Open /demo/voice sessions", len(sessions)),
+        gauge("quickrupee_event_loop_lag_seconds", "Smoothed event-loop lag", round(lag_monitor.lag, 6)),
+        gauge("quickrupee_admission_waiting", "Callers queued for a session slot", admission.stats()["waiting"]),
+        gauge("quickrupee_admission_rejected_total", "Calls shed by admission control", admission.rejected, kind="counter"),
+        gauge("quickrupee_calls_total", "Completed calls", calls["completed_calls"], kind="counter"),
+        gauge("quickrupee_http_in_flight", "OpenAI REST requests in flight", pool.get("in_flight", 0)),
+        gauge("quickrupee_realtime_pool_idle", "Warm Realtime connections", realtime["idle"]),
+        gauge("quickrupee_realtime_pool_hits_total", "Calls served by a warm connection", realtime["hits"], kind="counter"),
+        gauge("quickrupee_vad_bytes_saved_total", "Upstream audio bytes dropped as silence", vad_summary()["bytes_saved"], kind="counter"),
+        gauge("quickrupee_early_decisions_total", "Turns taken on a partial transcript", early_stats["taken"], kind="counter"),
+        gauge("quickrupee_early_decisions_corrected_total", "Early decisions replayed after the final transcript", early_stats["corrected"], kind="counter"),
+        gauge("quickrupee_outcomes_queued", "Lead outcomes waiting to be written", outcome_sink.stats()["queued"]),
+        gauge("quickrupee_outcomes_written_total", "Lead outcomes written to the store", outcome_sink.written, kind="counter"),
+        gauge("quickrupee_outcomes_dropped_total", "Lead outcomes dropped (queue full or shutting down)", outcome_sink.dropped, kind="counter"),
+        turn_tracer.expose(),
+        session_event_stages.expose(),
+    ])
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
 @app.websocket("/demo/voice/{session_id}")
 async def demo_voice_stream(websocket: WebSocket, session_id: str):
     """
@@ -160,186 +704,508 @@ async def demo_voice_stream(websocket: WebSocket, session_id: str):
     Connects browser microphone directly to OpenAI Realtime API
     """
     await websocket.accept()
-    logger.info(f"Demo session started: {session_id}")
+    channel = BrowserChannel.from_websocket(websocket)
+    await run_voice_session(websocket, channel, session_id)
+
+
+@app.websocket("/telephony/media")
+async def telephony_media_stream(websocket: WebSocket):
+    """
+    WebSocket endpoint for carrier media streams (8 kHz μ-law phone calls)
+    Same session as the browser demo, transcoded at the edge
+    """
+    await websocket.accept()
+    if not settings.TELEPHONY_ENABLED:
+        await websocket.close(code=1008, reason="Telephony disabled")
+        return
+    channel = TelephonyChannel(websocket)
+    try:
+        session_id = await channel.start()
+    except WebSocketDisconnect:
+        logger.info("Media stream ended before start")
+        return
+    except ProtocolError as e:
+        logger.warning("Rejecting media stream: %s", e)
+        await websocket.close(code=1003, reason="Unsupported media format")
+        return
+    await run_voice_session(websocket, channel, session_id)
 
-    # Initialize state machine
-    state_machine = EligibilityStateMachine()
-    sessions[session_id] = state_machine
 
-    # OpenAI Realtime client
+async def run_voice_session(websocket: WebSocket, channel: Union[BrowserChannel, TelephonyChannel], session_id: str):
+    """Run one call over an accepted channel: admission, greeting, turns and cleanup"""
+    logger.info(f"Demo session started: {session_id} (protocol={channel.protocol})")
+
+    # Admission control: wait for a slot (told the queue position), or shed the call
+    async def report_queue_position(position: int):
+        await channel.send_control({"type": "queued", "position": position})
+
+    try:
+        await admission.acquire(on_queued=report_queue_position)
+    except AdmissionRejected as e:
+        logger.warning("[%s] Call rejected: %s", session_id, e)
+        await channel.send_control({
+            "type": "busy",
+            "message": "All our lines are busy. Please try again shortly.",
+            "retry_after": e.retry_after,
+        })
+        await websocket.close(code=1013, reason="Try again later")
+        return
+    except WebSocketDisconnect as e:
+        logger.info("[%s] Caller left the queue: %s", session_id, e)
+        return
+    except asyncio.CancelledError:
+        logger.info("[%s] Caller left the queue", session_id)
+        raise
+    except Exception:
+        logger.exception("[%s] Admission failed", session_id)
+        return
+
+    # From here on the call holds an admission slot, released in the finally below
+
+    # OpenAI Realtime client, connected concurrently with the greeting
     openai_client: Optional[OpenAIRealtimeClient] = None
+    upstream_ready = False
+    connect_task: Optional[asyncio.Task] = None
+
+    # Set once the call is resumed or started (None if setup fails)
+    resume_token = websocket.query_params.get("resume")
+    state_machine: Optional[EligibilityStateMachine] = None
+    resumed = False
+    ended_by_user = False
+
+    # Drop silence before it goes upstream
+    vad_gate = new_vad_gate() if settings.VAD_ENABLED else None
+    if vad_gate:
+        vad_gates[session_id] = vad_gate
+
+    # User audio that arrives before the Realtime connection is ready
+    pending_audio: List[bytes] = []
+    pending_bytes = 0
+    pending_commit = False  # audio_end arrived before the Realtime connection was up
+
+    # Per-session setup timing (ms since accept), shows greeting/connect overlap
+    session_start = time.perf_counter()
+    setup_timings: Dict[str, float] = {}
+
+    def mark(name: str):
+        setup_timings[name] = round((time.perf_counter() - session_start) * 1000, 1)
+
+    # Acknowledgements that drive turn timing
+    turn_events = TurnEvents()
 
     # Control when to process transcripts (ignore bot's own voice)
     listening_for_user = False
 
+    # Spans of the turn in progress (started at end of speech or at the transcript)
+    turn_trace: Optional[TurnTrace] = None
+
+    def trace_turn() -> TurnTrace:
+        nonlocal turn_trace
+        if turn_trace is None:
+            turn_trace = turn_tracer.start(session_id)
+        return turn_trace
+
+    # Runs turn work so the Realtime receive loop only parses and posts events
+    actor: Optional[SessionActor] = None
+
+    # (step before, answer) of a turn taken on a partial transcript, until its final transcript arrives
+    early_decision: Optional[Tuple[int, bool]] = None
+
+    # Answers and turn latencies on this connection, for the lead outcome record
+    answers: List[Dict[str, object]] = []
+    turn_latencies_ms: List[float] = []
+    outcome_recorded = False  # The call's outcome is submitted once, even if a late transcript replays a turn
+
     try:
-        # Callbacks for OpenAI events
+        # Resume a dropped call presenting its token: parked on this worker (with its
+        # Realtime connection) or from a snapshot saved by any worker; else start a new one
+        if resume_token:
+            parked = await parking_lot.claim(session_id, resume_token)
+            if parked is not None:
+                state_machine, openai_client = parked.machine, parked.client
+            else:
+                state_machine = await session_registry.load(session_id, resume_token)
+        resumed = state_machine is not None and not state_machine.is_complete()
+        if not resumed:
+            state_machine = EligibilityStateMachine()
+            resume_token = secrets.token_urlsafe(16)
+        sessions[session_id] = state_machine
+
+        # Callbacks for OpenAI events: they run on the Realtime receive loop, so they only post to the actor
         async def on_transcript(text: str):
-            """Handle transcribed user speech"""
-            nonlocal listening_for_user
+            """Accept the user's answer and hand it to the session actor"""
+            nonlocal listening_for_user, turn_trace, early_decision
+
+            logger.debug("Transcript received: %s", text)
 
-            logger.info(f"Transcript received: {text}")
+            # Final transcript of an answer already acted on early: check that it agrees
+            if early_decision is not None:
+                actor.post("reconcile", (text, early_decision[0]))
+                early_decision = None
+                return
 
             # Ignore transcripts until we're ready for user input
             if not listening_for_user:
-                logger.info("Ignoring transcript (not listening for user yet)")
+                logger.debug("Ignoring transcript (not listening for user yet)")
+                return
+
+            # One answer per turn: stop listening while the bot replies (ignores its own voice)
+            listening_for_user = False
+            # This turn's spans; a new trace starts at the next end of speech
+            trace = trace_turn()
+            turn_trace = None
+            trace.mark("transcript")
+            if not actor.post("transcript", (text, time.perf_counter(), trace)):
+                listening_for_user = True
+
+        async def on_partial_transcript(text: str):
+            """Take the turn on a confident yes/no in the running transcript, before the final one"""
+            nonlocal listening_for_user, turn_trace, early_decision
+
+            if not listening_for_user or early_decision is not None:
+                return
+            is_yes = state_machine.early_answer(text, settings.EARLY_DECISION_MAX_WORDS)
+            if is_yes is None:
+                return
+
+            listening_for_user = False
+            early_decision = (state_machine.step, is_yes)
+            trace = trace_turn()
+            turn_trace = None
+            trace.mark("transcript")
+            if actor.post("transcript", (text, time.perf_counter(), trace)):
+                early_stats["taken"] += 1
+            else:
+                listening_for_user = True
+                early_decision = None
+
+        async def on_transcription_failed():
+            """The turn taken early gets no final transcript: keep the early decision"""
+            nonlocal early_decision
+            if early_decision is not None:
+                early_stats["confirmed"] += 1
+                logger.info("[%s] Final transcript failed, keeping early decision", session_id)
+                early_decision = None
+
+        async def handle_transcript(event: tuple):
+            """Session actor: run the answer through the FSM and speak the reply"""
+            text, turn_start, trace = event
+            await run_turn(text, turn_start, trace)
+
+        async def handle_reconcile(event: tuple):
+            """Session actor: replay the turn if the final transcript disagrees with the early decision"""
+            nonlocal listening_for_user
+            text, step_before = event
+            if outcome_recorded:
+                logger.info("[%s] Final transcript %r arrived after the call ended, not replayed", session_id, text)
+                return
+            replay = EligibilityStateMachine(step_before)
+            replay.process_response(text)
+            if replay.step == state_machine.step:
+                early_stats["confirmed"] += 1
+                logger.debug("[%s] Final transcript confirms early decision: %s", session_id, text)
                 return
 
-            logger.info(f"User said: {text}")
+            early_stats["corrected"] += 1
+            logger.info("[%s] Final transcript %r overrides early decision, replaying turn", session_id, text)
+            listening_for_user = False
+            await channel.send_control({"type": "cancel_audio"})
+            state_machine.step = step_before
+            if answers:
+                answers.pop()
+            trace = turn_tracer.start(session_id)
+            trace.mark("transcript")
+            await run_turn(text, time.perf_counter(), trace, wait_commit=False)
+
+        async def run_turn(text: str, turn_start: float, trace: TurnTrace, wait_commit: bool = True):
+            """Run the user's answer through the FSM and speak the bot's reply"""
+            nonlocal listening_for_user, outcome_recorded
+            logger.info("[%s] User said: %s", session_id, text)
+
+            # Process through state machine
+            question = state_machine.get_current_state()
+            result = state_machine.process_response(text)
+            trace.mark("fsm_decision")
+            trace.state = result.state
+            answers.append({"question": question, "answer": text, "valid": result.is_valid})
 
             # Send transcript to frontend
-            await websocket.send_json({
+            await channel.send_control({
                 "type": "transcript",
                 "text": text,
                 "role": "user"
             })
 
-            # Process through state machine
-            result = state_machine.process_response(text)
-
-            if not result.get('is_valid', True):
-                logger.info(f"Invalid response received: '{text}' - Re-asking question")
+            if not result.is_valid:
+                logger.info("Invalid response received: '%s' - Re-asking question", text)
             else:
-                logger.info(f"Valid response - State: {result['state']}, Should end: {result['should_end']}")
+                logger.info("Valid response - State: %s, Should end: %s", result.state, result.should_end)
 
             # Send state update to frontend
-            await websocket.send_json({
+            await channel.send_control({
                 "type": "state_update",
-                "state": result['state'],
-                "should_end": result['should_end'],
-                "is_eligible": result.get('is_eligible')
+                "state": result.state,
+                "should_end": result.should_end,
+                "is_eligible": result.is_eligible
             })
 
-            # Wait a brief moment for OpenAI to finish processing user's audio input
-            await asyncio.sleep(0.3)
-
-            # Temporarily stop listening while bot speaks
-            listening_for_user = False
-            logger.info("Bot speaking - temporarily stopped listening")
+            # Make sure OpenAI has committed the user's audio before clearing the buffer
+            if wait_commit and not await turn_events.wait_committed(settings.TURN_COMMIT_TIMEOUT):
+                logger.debug("[%s] No commit ack within %ss", session_id, settings.TURN_COMMIT_TIMEOUT)
 
             # Tell frontend to mute microphone while bot speaks
-            await websocket.send_json({"type": "mute_mic"})
+            await channel.send_control({"type": "mute_mic"})
 
             # Clear any audio in OpenAI's buffer
             await openai_client.clear_audio_buffer()
+            if vad_gate:
+                vad_gate.reset()
 
             # Send bot response via TTS (using standard TTS API, not Realtime)
-            if result["message"]:
+            if result.message:
                 # Send message text to frontend
-                await websocket.send_json({
+                await channel.send_control({
                     "type": "bot_message",
-                    "text": result["message"]
+                    "text": result.message
                 })
 
-                # Get TTS from cache (instant) or generate
-                audio_data = await get_cached_tts(result["message"])
-                if audio_data:
-                    # Send MP3 audio to frontend
-                    await websocket.send_json({
-                        "type": "audio_mp3",
-                        "data": base64.b64encode(audio_data).decode('utf-8')
-                    })
+                # Send MP3 audio to frontend: pre-encoded from cache, or streamed on a miss
+                first_byte_ms = await send_bot_audio(channel, result.message, trace=trace)
+                log_tts_latency(session_id, first_byte_ms)
+                if first_byte_ms is not None:
+                    turn_events.clip_sent()
+                latency = time.perf_counter() - turn_start
+                record_turn_latency(session_id, latency)
+                turn_latencies_ms.append(round(latency * 1000, 1))
 
                 # Resume listening for next user input (if conversation continues)
-                if not result["should_end"]:
+                if not result.should_end:
                     # Tell frontend to unmute after audio finishes
-                    await websocket.send_json({"type": "unmute_mic"})
+                    await channel.send_control({"type": "unmute_mic"})
                     listening_for_user = True
-                    logger.info("✅ Bot finished generating speech - will listen after playback")
+                    logger.debug("Bot finished generating speech - will listen after playback")
+
+            # Persist progress off the latency path, once the answer has been spoken
+            if not result.should_end:
+                await session_registry.save(session_id, state_machine, resume_token)
+            trace.finish()
 
             # End call if conversation is complete
-            if result["should_end"]:
-                await asyncio.sleep(5)  # Wait for TTS to complete
-                await websocket.send_json({
+            if result.should_end:
+                if not outcome_recorded:
+                    outcome_recorded = True
+                    outcome_sink.submit({
+                        "session_id": session_id,
+                        "finished_at": time.time(),
+                        "is_eligible": result.is_eligible,
+                        "rejection_reason": result.rejection_reason,
+                        "state": result.state,
+                        "resumed": resumed,
+                        "answers": list(answers),
+                        "turn_latency_ms": list(turn_latencies_ms),
+                        "handle_time_s": round(time.perf_counter() - session_start, 3),
+                    })
+
+                # Wait for the browser to finish playing the closing message
+                if not await turn_events.wait_playback(settings.PLAYBACK_COMPLETE_TIMEOUT):
+                    logger.warning(f"[{session_id}] No playback_complete within {settings.PLAYBACK_COMPLETE_TIMEOUT}s")
+                await channel.send_control({
                     "type": "end_conversation",
-                    "is_eligible": result.get('is_eligible')
+                    "is_eligible": result.is_eligible
                 })
 
+        async def on_committed():
+            """Realtime API acknowledged the committed audio buffer"""
+            turn_events.committed.set()
+
+        async def on_speech_stopped():
+            """Server VAD detected the end of the user's answer"""
+            if listening_for_user:
+                trace_turn().mark("speech_stopped")
+
         async def on_error(error: str):
             """Handle OpenAI errors"""
             logger.error(f"OpenAI error: {error}")
-            await websocket.send_json({
+            actor.post("error", error)
+
+        async def handle_error(error: str):
+            """Session actor: report an OpenAI error to the browser"""
+            await channel.send_control({
                 "type": "error",
                 "message": error
             })
 
-        # Connect to OpenAI Realtime API (STT only)
-        openai_client = OpenAIRealtimeClient(
+        async def connect_upstream():
+            """Connect to the Realtime API while the greeting plays, then flush buffered audio"""
+            nonlocal openai_client, upstream_ready, pending_bytes, pending_commit
+            try:
+                # Connect to OpenAI Realtime API (STT only), from the warm pool when possible
+                openai_client = await realtime_pool.acquire(**callbacks)
+            except Exception as e:
+                logger.error(f"[{session_id}] Realtime connection failed: {e}")
+                await channel.send_control({
+                    "type": "error",
+                    "message": "Speech recognition is unavailable. Please try again later."
+                })
+                await websocket.close()
+                return
+            mark("upstream_ready")
+
+            flushed = len(pending_audio)
+            while pending_audio:
+                await openai_client.send_audio(pending_audio.pop(0))
+            pending_bytes = 0
+            upstream_ready = True
+            if pending_commit:
+                pending_commit = False
+                await openai_client.commit_audio()
+            mark("upstream_flushed")
+
+            logger.info(
+                f"[{session_id}] Setup timings (ms): {setup_timings} "
+                f"- {flushed} buffered audio chunk(s) flushed"
+            )
+
+        actor = SessionActor(
+            session_id,
+            {"transcript": handle_transcript, "reconcile": handle_reconcile, "error": handle_error},
+            maxsize=settings.SESSION_EVENT_QUEUE_SIZE,
+            stages=session_event_stages,
+        )
+        actor.start()
+
+        callbacks = dict(
             on_transcript=on_transcript,
             on_error=on_error,
+            on_committed=on_committed,
+            on_speech_stopped=on_speech_stopped,
+            on_partial_transcript=on_partial_transcript if settings.EARLY_DECISIONS else None,
+            on_transcription_failed=on_transcription_failed,
         )
-        await openai_client.connect()
+        if openai_client is not None and openai_client.is_connected:
+            # Reattach the parked Realtime session: no handshake on resume
+            openai_client.attach(**callbacks)
+            await openai_client.clear_audio_buffer()
+            upstream_ready = True
+            mark("upstream_ready")
+        else:
+            if openai_client is not None:
+                await openai_client.close()  # Parked connection dropped meanwhile
+                openai_client = None
+            # Start the Realtime connection; greeting audio does not need it
+            connect_task = asyncio.create_task(connect_upstream())
 
         # Send ready signal to frontend
-        await websocket.send_json({
+        await channel.send_control({
             "type": "ready",
-            "message": "Connected to voice bot"
+            "message": "Connected to voice bot",
+            "protocol": channel.protocol,
+            "resumed": resumed,
+            "resume_token": resume_token,
         })
 
         # Mute mic during initial bot speech
-        await websocket.send_json({"type": "mute_mic"})
+        await channel.send_control({"type": "mute_mic"})
 
-        # Clear any audio buffer
-        await openai_client.clear_audio_buffer()
-
-        # Start conversation with greeting
-        greeting = state_machine.start()
-        await websocket.send_json({
-            "type": "bot_message",
-            "text": greeting
-        })
-
-        # Get TTS for greeting from cache (instant)
-        greeting_audio = await get_cached_tts(greeting)
-        if greeting_audio:
-            await websocket.send_json({
-                "type": "audio_mp3",
-                "data": base64.b64encode(greeting_audio).decode('utf-8')
+        if resumed:
+            # Skip the greeting and ask the pending question again (served from the TTS cache)
+            logger.info("[%s] Resuming call at %s", session_id, state_machine.get_current_state())
+            question = state_machine.current_prompt()
+            await channel.send_control({
+                "type": "bot_message",
+                "text": question
             })
-
-        # Transition from GREETING to ASK_EMPLOYMENT
-        first_question = state_machine.process_response("")
-        if first_question["message"]:
-            await websocket.send_json({
+            question_ms = await send_bot_audio(channel, question)
+            log_tts_latency(session_id, question_ms)
+            if question_ms is not None:
+                turn_events.clip_sent()
+            mark("question_replayed")
+            await session_registry.save(session_id, state_machine, resume_token)
+            await channel.send_control({"type": "unmute_mic"})
+            listening_for_user = True
+        else:
+            # Start conversation with greeting
+            greeting = state_machine.start()
+            await channel.send_control({
                 "type": "bot_message",
-                "text": first_question["message"]
+                "text": greeting
             })
 
-            # Get TTS for first question from cache (instant)
-            question_audio = await get_cached_tts(first_question["message"])
-            if question_audio:
-                await websocket.send_json({
-                    "type": "audio_mp3",
-                    "data": base64.b64encode(question_audio).decode('utf-8')
+            # Get TTS for greeting from cache (instant)
+            greeting_ms = await send_bot_audio(channel, greeting)
+            log_tts_latency(session_id, greeting_ms)
+            if greeting_ms is not None:
+                turn_events.clip_sent()
+            mark("greeting_sent")
+
+            # Transition from GREETING to ASK_EMPLOYMENT
+            first_question = state_machine.process_response("")
+            if first_question.message:
+                await channel.send_control({
+                    "type": "bot_message",
+                    "text": first_question.message
                 })
 
-            # Tell frontend to unmute after audio finishes playing
-            await websocket.send_json({"type": "unmute_mic"})
-            listening_for_user = True
-            logger.info("✅ First question sent - will listen after playback")
+                # Get TTS for first question from cache (instant)
+                question_ms = await send_bot_audio(channel, first_question.message)
+                log_tts_latency(session_id, question_ms)
+                if question_ms is not None:
+                    turn_events.clip_sent()
+                mark("first_question_sent")
+                await session_registry.save(session_id, state_machine, resume_token)
+
+                # Tell frontend to unmute after audio finishes playing
+                await channel.send_control({"type": "unmute_mic"})
+                listening_for_user = True
+                logger.info("✅ First question sent - will listen after playback")
 
         # Process incoming messages from browser
         while True:
-            message = await websocket.receive_json()
-            msg_type = message.get("type")
+            try:
+                message, audio_bytes = await channel.receive()
+            except ProtocolError as e:
+                logger.warning("Dropping malformed frame: %s", e)
+                continue
 
-            if msg_type == "audio":
+            if audio_bytes is not None:
                 # Incoming audio from browser microphone
-                audio_b64 = message.get("data", "")
-                if audio_b64:
-                    audio_bytes = base64.b64decode(audio_b64)
+                if vad_gate:
+                    audio_bytes = vad_gate.process(audio_bytes)
+                if not audio_bytes:
+                    continue
+                if upstream_ready:
                     await openai_client.send_audio(audio_bytes)
+                else:
+                    # Hold audio until the Realtime connection is up (bounded)
+                    pending_audio.append(bytes(audio_bytes))
+                    pending_bytes += len(audio_bytes)
+                    while pending_bytes > MAX_PENDING_AUDIO_BYTES:
+                        pending_bytes -= len(pending_audio.pop(0))
+                continue
 
-            elif msg_type == "audio_end":
+            msg_type = message.get("type")
+
+            if msg_type == "audio_end":
                 # User stopped speaking
-                await openai_client.commit_audio()
+                if listening_for_user:
+                    trace_turn().mark("speech_stopped")
+                if upstream_ready:
+                    await openai_client.commit_audio()
+                else:
+                    # Commit once the buffered audio has been flushed upstream
+                    pending_commit = True
+
+            elif msg_type == "playback_complete":
+                # Browser finished playing all queued bot audio
+                turn_events.playback_complete(int(message.get("played", 0)))
 
             elif msg_type == "ping":
                 # Keep-alive
-                await websocket.send_json({"type": "pong"})
+                await channel.send_control({"type": "pong"})
 
             elif msg_type == "end":
                 # User ended conversation
+                ended_by_user = True
                 break
 
     except WebSocketDisconnect:
@@ -348,10 +1214,38 @@ async def demo_voice_stream(websocket: WebSocket, session_id: str):
         logger.error(f"Error in demo session: {e}", exc_info=True)
     finally:
         # Cleanup
-        if openai_client:
-            await openai_client.close()
+        admission.release()
+        if actor:
+            await actor.close()
+            logger.debug("[%s] Session events: %s", session_id, actor.stats())
+        if connect_task and not connect_task.done():
+            connect_task.cancel()
         if session_id in sessions:
             del sessions[session_id]
+        # Finished calls are forgotten; dropped ones are parked for the grace period
+        # and stay resumable from the session store until SESSION_TTL. A call that
+        # failed before it started leaves any saved snapshot alone.
+        started = state_machine is not None
+        dropped = started and not (state_machine.is_complete() or ended_by_user)
+        keep_client = openai_client if upstream_ready and settings.RESUME_KEEP_REALTIME else None
+        if dropped and await parking_lot.park(session_id, resume_token, state_machine, keep_client):
+            logger.info("[%s] Parked for %ss awaiting reconnect", session_id, settings.RESUME_GRACE_PERIOD)
+        else:
+            keep_client = None
+        if openai_client and openai_client is not keep_client:
+            logger.info(f"[{session_id}] Upstream audio: {openai_client.get_audio_stats()}")
+            await openai_client.close()
+        if dropped:
+            await session_registry.release(session_id)
+        elif started:
+            await session_registry.discard(session_id)
+        call_stats["calls"] += 1
+        call_stats["handle_time_total"] += time.perf_counter() - session_start
+        if vad_gate:
+            vad_gates.pop(session_id, None)
+            vad_totals["bytes_in"] += vad_gate.bytes_in
+            vad_totals["bytes_saved"] += vad_gate.bytes_saved
+            logger.info(f"[{session_id}] VAD gate: {vad_gate.stats()}")
         logger.info(f"Cleaned up demo session: {session_id}")
 
 
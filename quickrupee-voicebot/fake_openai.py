@@ -0,0 +1,259 @@
+"""
+Local stand-ins for the OpenAI APIs
+Used by tests (and local load runs) so nothing talks to api.openai.com
+"""
+import asyncio
+import base64
+import random
+from typing import List, Optional, Set, Tuple, Union
+import numpy as np
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+
+def fake_mp3(text: str) -> bytes:
+    """Deterministic stand-in audio for a piece of text"""
+    return b"ID3FAKE" + text.encode("utf-8")
+
+
+def fake_pcm(text: str) -> bytes:
+    """Deterministic stand-in for TTS "pcm" output: 24 kHz PCM16, 2 ms per character"""
+    t = np.arange(48 * len(text)) / 24000
+    return (6000 * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes()
+
+
+class FakeOpenAI:
+    """
+    Minimal fake of the OpenAI endpoints the bot uses: TTS over REST and
+    transcription over the Realtime WebSocket
+
+    Records every request so tests can assert on call counts and on how many
+    distinct client connections were used.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        fail_first: int = 0,
+        chunk_size: int = 0,
+        chunk_delay: float = 0.0,
+        transcript: str = "yes",
+        handshake_latency: float = 0.0,
+        partials: bool = False,
+        server_vad: bool = False,
+    ):
+        """
+        Args:
+            latency: Seconds added to every response
+            jitter: Extra random delay in [0, jitter) seconds
+            fail_first: Number of initial TTS requests answered with HTTP 500
+            chunk_size: Stream TTS audio in chunks of this many bytes (0 = one body)
+            chunk_delay: Seconds between streamed chunks
+            transcript: Realtime transcript returned on commit when none is scripted
+            handshake_latency: Seconds before a Realtime WebSocket is accepted
+            partials: Stream each transcript word by word as delta events right
+                after the commit; the completed event still follows `latency`
+            server_vad: Also end a turn without a commit, like the real server
+                VAD: speech followed by an appended chunk ending in silence
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_first = fail_first
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.handshake_latency = handshake_latency
+        self.partials = partials
+        self.server_vad = server_vad
+        self.tts_requests: List[str] = []
+        self.client_ports: Set[int] = set()
+
+        self.default_transcript = transcript
+        # Scripted transcripts, consumed in order; a (partial, final) pair streams
+        # `partial` as deltas but completes with `final` (a None final fails the transcription)
+        self.transcripts: List[Union[str, Tuple[str, Optional[str]]]] = []
+        self.items = 0
+        self.realtime_connections = 0
+        self.open_realtime = 0
+        self.append_events = 0
+        self.audio_bytes = 0
+        self.app = self._build_app()
+
+    def next_transcript(self) -> Tuple[str, Optional[str]]:
+        """(partial, final) text for the next committed turn"""
+        transcript = self.transcripts.pop(0) if self.transcripts else self.default_transcript
+        return transcript if isinstance(transcript, tuple) else (transcript, transcript)
+
+    async def _delay(self):
+        delay = self.latency + (random.random() * self.jitter if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/audio/speech")
+        async def speech(request: Request):
+            body = await request.json()
+            self.client_ports.add(request.client.port)
+            self.tts_requests.append(body["input"])
+            await self._delay()
+            if len(self.tts_requests) <= self.fail_first:
+                return Response(status_code=500, content=b"fake failure")
+            if body.get("response_format") == "pcm":
+                audio, media_type = fake_pcm(body["input"]), "audio/pcm"
+            else:
+                audio, media_type = fake_mp3(body["input"]), "audio/mpeg"
+            if not self.chunk_size:
+                return Response(content=audio, media_type=media_type)
+
+            async def chunks():
+                for i in range(0, len(audio), self.chunk_size):
+                    if i:
+                        await asyncio.sleep(self.chunk_delay)
+                    yield audio[i:i + self.chunk_size]
+
+            return StreamingResponse(chunks(), media_type=media_type)
+
+        @app.websocket("/v1/realtime")
+        async def realtime(websocket: WebSocket):
+            if self.handshake_latency:
+                await asyncio.sleep(self.handshake_latency)
+            await websocket.accept()
+            self.realtime_connections += 1
+            self.open_realtime += 1
+            heard_speech = False
+
+            async def complete_turn():
+                self.items += 1
+                item_id = f"item_{self.items}"
+                partial, final = self.next_transcript()
+                await websocket.send_json({"type": "input_audio_buffer.committed", "item_id": item_id})
+                if self.partials:
+                    for i, word in enumerate(partial.split()):
+                        await websocket.send_json({
+                            "type": "conversation.item.input_audio_transcription.delta",
+                            "item_id": item_id,
+                            "delta": word if i == 0 else f" {word}",
+                        })
+                await self._delay()
+                if final is None:
+                    await websocket.send_json({
+                        "type": "conversation.item.input_audio_transcription.failed",
+                        "item_id": item_id,
+                        "error": {"message": "fake transcription failure"},
+                    })
+                    return
+                await websocket.send_json({
+                    "type": "conversation.item.input_audio_transcription.completed",
+                    "item_id": item_id,
+                    "transcript": final,
+                })
+
+            try:
+                await websocket.send_json({"type": "session.created"})
+                while True:
+                    event = await websocket.receive_json()
+                    event_type = event.get("type")
+
+                    if event_type == "session.update":
+                        await self._delay()
+                        await websocket.send_json({"type": "session.updated"})
+
+                    elif event_type == "input_audio_buffer.append":
+                        audio = base64.b64decode(event["audio"])
+                        self.append_events += 1
+                        self.audio_bytes += len(audio)
+                        if self.server_vad:
+                            samples = np.abs(np.frombuffer(audio[: len(audio) // 2 * 2], dtype="<i2").astype(np.int32))
+                            heard_speech = heard_speech or bool(len(samples) and samples.max() > 1000)
+                            if heard_speech and len(samples) and samples[-480:].max() < 100:  # Last 20 ms silent
+                                heard_speech = False
+                                await websocket.send_json({"type": "input_audio_buffer.speech_stopped"})
+                                await complete_turn()
+
+                    elif event_type == "input_audio_buffer.commit":
+                        await complete_turn()
+
+                    elif event_type == "input_audio_buffer.clear":
+                        await websocket.send_json({"type": "input_audio_buffer.cleared"})
+
+            except WebSocketDisconnect:
+                pass
+            finally:
+                self.open_realtime -= 1
+
+        return app
+
+
+class _Server(uvicorn.Server):
+    """uvicorn server that leaves the caller's signal handlers alone"""
+
+    def install_signal_handlers(self):
+        pass
+
+
+class LocalServer:
+    """
+    Run an ASGI app on a free localhost port inside the current event loop
+
+    Usage:
+        async with LocalServer(fake.app) as server:
+            url = server.url
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1"):
+        self.app = app
+        self.host = host
+        self.port: Optional[int] = None
+        self._server: Optional[_Server] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def __aenter__(self) -> "LocalServer":
+        config = uvicorn.Config(self.app, host=self.host, port=0, log_level="warning", lifespan="off")
+        self._server = _Server(config)
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._server.should_exit = True
+        await self._task
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake OpenAI TTS + Realtime server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay in [0, jitter) seconds")
+    parser.add_argument("--chunk-size", type=int, default=0, help="Stream TTS audio in chunks of this many bytes")
+    parser.add_argument("--transcript", default="yes", help="Transcript returned for every committed turn")
+    parser.add_argument("--partials", action="store_true", help="Stream transcripts as delta events before completion")
+    parser.add_argument("--server-vad", action="store_true", help="End turns on trailing silence as well as on commit")
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(
+        latency=args.latency,
+        jitter=args.jitter,
+        chunk_size=args.chunk_size,
+        transcript=args.transcript,
+        partials=args.partials,
+        server_vad=args.server_vad,
+    )
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,188 @@
+"""
+Shared HTTP Client for OpenAI REST calls
+One long-lived, pooled (HTTP/2 when available) client per worker
+"""
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPPool:
+    """
+    Pooled HTTP client for OpenAI REST endpoints
+    Started and closed by the FastAPI lifespan so connections are reused
+    across requests instead of paying a TCP+TLS handshake per call
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        pool_timeout: float = 5.0,
+        http2: bool = True,
+    ):
+        """
+        Initialize pool settings (the client itself is created in start())
+
+        Args:
+            base_url: Base URL for OpenAI REST calls
+            api_key: Bearer token sent with every request
+            max_connections: Hard limit on open connections
+            max_keepalive_connections: Idle connections kept for reuse
+            keepalive_expiry: Seconds an idle connection is kept alive
+            connect_timeout: Seconds allowed to establish a connection
+            read_timeout: Default seconds allowed to read a response
+            pool_timeout: Seconds to wait for a free connection from the pool
+            http2: Negotiate HTTP/2 when the server and `h2` support it
+        """
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=read_timeout,
+            pool=pool_timeout,
+        )
+        self.http2 = http2 and _http2_available()
+        if http2 and not self.http2:
+            logger.warning("HTTP/2 requested but 'h2' is not installed - using HTTP/1.1")
+
+        self.client: Optional[httpx.AsyncClient] = None
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self._latency_total = 0.0
+
+    async def start(self):
+        """Create the shared client"""
+        if self.client is not None:
+            return
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=self.limits,
+            timeout=self.timeout,
+            http2=self.http2,
+        )
+        logger.info(f"HTTP pool started (http2={self.http2}, limits={self.limits})")
+
+    async def post(self, path: str, timeout: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+        """
+        POST to an OpenAI endpoint over the shared client
+
+        Args:
+            path: Path relative to base_url (e.g. "/audio/speech")
+            timeout: Per-request read timeout override in seconds
+        """
+        if self.client is None:
+            await self.start()
+        self._apply_timeout(kwargs, timeout)
+
+        self.requests_total += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            return await self.client.post(path, **kwargs)
+        except httpx.HTTPError:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._latency_total += time.perf_counter() - start
+
+    @asynccontextmanager
+    async def stream(self, path: str, timeout: Optional[float] = None, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """
+        POST to an OpenAI endpoint and stream the response body
+
+        Usage:
+            async with pool.stream("/audio/speech", json=...) as response:
+                async for chunk in response.aiter_bytes():
+                    ...
+        """
+        if self.client is None:
+            await self.start()
+        self._apply_timeout(kwargs, timeout)
+
+        self.requests_total += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            async with self.client.stream("POST", path, **kwargs) as response:
+                yield response
+        except httpx.HTTPError:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._latency_total += time.perf_counter() - start
+
+    def _apply_timeout(self, kwargs: Dict[str, Any], timeout: Optional[float]):
+        """Turn a per-request read timeout override into an httpx.Timeout"""
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(
+                connect=self.timeout.connect,
+                read=timeout,
+                write=self.timeout.write,
+                pool=self.timeout.pool,
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics for /health"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            **self._connection_stats(),
+            "in_flight": self.in_flight,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "avg_latency_ms": round(self._latency_total / self.requests_total * 1000, 2)
+            if self.requests_total else 0.0,
+        }
+
+    def _connection_stats(self) -> Dict[str, Optional[int]]:
+        """
+        Open and idle pooled connections, or None for both if they can't be read
+
+        httpx does not expose pool state publicly; it is read from httpcore
+        internals, which may change between releases.
+        """
+        if self.client is None:
+            return {"open_connections": 0, "idle_connections": 0}
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        try:
+            connections = list(pool.connections)
+            idle = sum(1 for c in connections if c.is_idle())
+        except (AttributeError, TypeError):
+            return {"open_connections": None, "idle_connections": None}
+        return {"open_connections": len(connections), "idle_connections": idle}
+
+    async def close(self):
+        """Close the shared client and all pooled connections"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+            logger.info("HTTP pool closed")
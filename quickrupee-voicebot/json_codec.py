@@ -0,0 +1,58 @@
+"""
+JSON Codec
+Fast JSON for per-event paths: orjson when installed, the standard library otherwise
+"""
+import json
+from typing import Any, Callable, Dict, NamedTuple, Union
+from config import settings
+
+
+class JSONCodec(NamedTuple):
+    """A pair of compact JSON functions working on text (WebSocket text frames)"""
+    name: str
+    dumps: Callable[[Any], str]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+def _stdlib_codec() -> JSONCodec:
+    # Same output as Starlette's send_json: compact, UTF-8 kept as-is
+    encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+    return JSONCodec("json", encoder.encode, json.loads)
+
+
+def _orjson_codec() -> JSONCodec:
+    import orjson
+
+    orjson_dumps = orjson.dumps
+    return JSONCodec("orjson", lambda obj: orjson_dumps(obj).decode("utf-8"), orjson.loads)
+
+
+CODECS: Dict[str, Callable[[], JSONCodec]] = {
+    "json": _stdlib_codec,
+    "orjson": _orjson_codec,
+}
+
+
+def get_codec(name: str = "auto") -> JSONCodec:
+    """
+    Build a codec by name; "auto" prefers orjson and falls back to json
+
+    Raises:
+        ValueError: for an unknown codec name
+        ImportError: if an explicitly requested backend is not installed
+    """
+    if name == "auto":
+        try:
+            return _orjson_codec()
+        except ImportError:
+            return _stdlib_codec()
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec: {name} (available: auto, {', '.join(CODECS)})")
+    return CODECS[name]()
+
+
+# Process-wide codec selected by JSON_CODEC. Decode errors from either backend
+# subclass ValueError.
+codec = get_codec(settings.JSON_CODEC)
+dumps = codec.dumps
+loads = codec.loads
@@ -0,0 +1,417 @@
+"""
+Load Test Harness for /demo/voice
+Drives many concurrent browser sessions through full eligibility flows against
+a demo server backed by the fake OpenAI server, and reports latency
+percentiles plus server CPU and memory per session
+
+Run: python load_test.py --sessions 500 --concurrency 500 --latency 0.15 --jitter 0.1
+     python load_test.py --find-max --slo-ms 500        (max sustainable concurrency)
+     python load_test.py --url ws://host:8000 ...       (existing server, no CPU/memory stats)
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import websockets
+
+# The harness only shares wire-protocol helpers with the server; no real key is needed
+os.environ.setdefault("OPENAI_API_KEY", "load-test-key")
+
+from protocol import KIND_MP3, KIND_MP3_CHUNK, KIND_PCM16, decode_frame, encode_frame
+
+SAMPLE_RATE = 24000
+FRAME_MS = 100
+
+
+def synthetic_speech(duration_ms: int, seed: int = 0) -> List[bytes]:
+    """PCM16 frames (FRAME_MS each) of a noisy voiced tone that passes the VAD gate"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(SAMPLE_RATE * duration_ms // 1000) / SAMPLE_RATE
+    wave = 6000 * np.sin(2 * np.pi * 180 * t) + rng.standard_normal(t.size) * 800
+    pcm = wave.astype("<i2").tobytes()
+    frame_bytes = SAMPLE_RATE * FRAME_MS // 1000 * 2
+    return [pcm[i:i + frame_bytes] for i in range(0, len(pcm), frame_bytes)]
+
+
+@dataclass
+class SessionResult:
+    """Timings for one simulated call"""
+    time_to_greeting: Optional[float] = None
+    turn_latencies: List[float] = field(default_factory=list)
+    completed: bool = False
+    rejected: bool = False  # Shed by admission control ("busy")
+    queue_position: Optional[int] = None  # First position reported while queued
+    error: Optional[str] = None
+
+
+class SimulatedCaller:
+    """
+    Plays the browser's part of a call: receives bot audio, acknowledges
+    playback, and answers every question with synthetic speech
+    """
+
+    def __init__(self, ws_url: str, session_id: str, speech: List[bytes], paced: bool = False, think_time: float = 0.0):
+        self.url = f"{ws_url}/demo/voice/{session_id}?protocol=binary"
+        self.speech = speech
+        self.paced = paced
+        self.think_time = think_time
+        self.played = 0
+        self.result = SessionResult()
+
+    async def _bot_turn(self, ws, start: float, timeout: float) -> Tuple[Optional[float], bool]:
+        """
+        Read until the bot hands the turn back (unmute_mic) or ends the call
+
+        Returns:
+            (seconds from start to the first bot audio, whether the call ended)
+        """
+        first_audio = None
+        while True:
+            message = await asyncio.wait_for(ws.recv(), timeout)
+            if isinstance(message, bytes):
+                kind, flags, _ = decode_frame(message)
+                if first_audio is None and kind in (KIND_MP3, KIND_MP3_CHUNK):
+                    first_audio = time.perf_counter() - start
+                if kind == KIND_MP3 or (kind == KIND_MP3_CHUNK and flags):
+                    self.played += 1
+                    await ws.send(json.dumps({"type": "playback_complete", "played": self.played}))
+                continue
+            control = json.loads(message)
+            if control["type"] == "queued" and self.result.queue_position is None:
+                self.result.queue_position = control["position"]
+            if control["type"] == "busy":
+                self.result.rejected = True
+                return first_audio, True
+            if control["type"] == "unmute_mic":
+                return first_audio, False
+            if control["type"] == "end_conversation":
+                return first_audio, True
+
+    async def run(self, timeout: float = 10.0) -> SessionResult:
+        try:
+            start = time.perf_counter()
+            async with websockets.connect(self.url, max_size=None) as ws:
+                self.result.time_to_greeting, ended = await self._bot_turn(ws, start, timeout)
+                while not ended:
+                    if self.think_time:
+                        await asyncio.sleep(self.think_time)
+                    for frame in self.speech:
+                        await ws.send(encode_frame(KIND_PCM16, frame))
+                        if self.paced:
+                            await asyncio.sleep(FRAME_MS / 1000)
+                    await ws.send(json.dumps({"type": "audio_end"}))
+                    latency, ended = await self._bot_turn(ws, time.perf_counter(), timeout)
+                    if latency is not None:
+                        self.result.turn_latencies.append(latency)
+            self.result.completed = not self.result.rejected
+        except Exception as e:
+            self.result.error = f"{type(e).__name__}: {e}"
+        return self.result
+
+
+class ProcessSampler:
+    """CPU time and peak RSS of a server process, read from /proc (Linux)"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def cpu_seconds(self) -> float:
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # utime + stime
+
+    def rss_bytes(self) -> int:
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    async def _sample(self):
+        while True:
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.peak_rss = self.rss_bytes()
+        self._task = asyncio.create_task(self._sample())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 in milliseconds"""
+    if not values:
+        return {"p50": float("nan"), "p95": float("nan"), "p99": float("nan")}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99}
+
+
+async def run_load(
+    ws_url: str,
+    sessions: int,
+    concurrency: int,
+    speech: List[bytes],
+    ramp: float = 0.0,
+    paced: bool = False,
+    think_time: float = 0.0,
+    timeout: float = 10.0,
+    sampler: Optional[ProcessSampler] = None,
+    prefix: str = "load",
+) -> Dict[str, Any]:
+    """
+    Run `sessions` simulated calls with at most `concurrency` open at once
+
+    Returns:
+        Summary with latency percentiles, error count, and server CPU/memory
+        per session when a sampler for the server process is given
+    """
+    limit = asyncio.Semaphore(concurrency)
+    results: List[SessionResult] = []
+
+    async def one(i: int):
+        if ramp:
+            await asyncio.sleep(ramp * i / sessions)
+        async with limit:
+            caller = SimulatedCaller(ws_url, f"{prefix}-{i}", speech, paced=paced, think_time=think_time)
+            results.append(await caller.run(timeout))
+
+    cpu_before = rss_before = 0
+    if sampler:
+        cpu_before, rss_before = sampler.cpu_seconds(), sampler.rss_bytes()
+        sampler.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    completed = [r for r in results if r.completed]
+    errors = [r.error for r in results if r.error]
+    summary: Dict[str, Any] = {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "completed": len(completed),
+        "errors": len(errors),
+        "rejected": sum(1 for r in results if r.rejected),
+        "queued": sum(1 for r in results if r.queue_position is not None),
+        "first_error": errors[0] if errors else None,
+        "elapsed_s": elapsed,
+        "calls_per_s": len(completed) / elapsed if elapsed else 0.0,
+        "time_to_greeting_ms": percentiles([r.time_to_greeting for r in completed if r.time_to_greeting is not None]),
+        "turn_latency_ms": percentiles([t for r in completed for t in r.turn_latencies]),
+    }
+    if sampler:
+        await sampler.stop()
+        cpu = sampler.cpu_seconds() - cpu_before
+        summary["server_cpu_ms_per_session"] = cpu * 1000 / max(1, len(results))
+        summary["server_cpu_utilization"] = cpu / elapsed if elapsed else 0.0
+        summary["server_rss_kb_per_session"] = max(0, sampler.peak_rss - rss_before) / 1024 / min(concurrency, sessions)
+        summary["server_peak_rss_mb"] = sampler.peak_rss / 1024 / 1024
+    return summary
+
+
+def print_summary(summary: Dict[str, Any]):
+    print(
+        f"concurrency {summary['concurrency']}: {summary['completed']}/{summary['sessions']} calls completed, "
+        f"{summary['errors']} errors, {summary['rejected']} shed, {summary['queued']} queued, "
+        f"{summary['elapsed_s']:.1f} s ({summary['calls_per_s']:.1f} calls/s)"
+    )
+    for name in ("time_to_greeting_ms", "turn_latency_ms"):
+        p = summary[name]
+        print(f"  {name:<26} p50 {p['p50']:8.1f}   p95 {p['p95']:8.1f}   p99 {p['p99']:8.1f}")
+    if "server_cpu_ms_per_session" in summary:
+        print(
+            f"  {'server cpu':<26} {summary['server_cpu_ms_per_session']:.1f} ms/session "
+            f"({summary['server_cpu_utilization']:.0%} of one core)"
+        )
+        print(
+            f"  {'server memory':<26} {summary['server_rss_kb_per_session']:.1f} KB/session "
+            f"(peak RSS {summary['server_peak_rss_mb']:.0f} MB)"
+        )
+    if summary["first_error"]:
+        print(f"  first error: {summary['first_error']}")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(url: str, path: str = "/health", timeout: float = 30.0):
+    """Poll url + path until it answers 200"""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(f"{url}{path}")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} not healthy after {timeout}s")
+            await asyncio.sleep(0.2)
+
+
+class LocalStack:
+    """
+    Fake OpenAI server and one demo server worker, each in its own process,
+    so the load generator and the fake do not count against the server's CPU
+    """
+
+    def __init__(
+        self,
+        latency: float,
+        jitter: float,
+        pool_size: int,
+        log_level: str,
+        partials: bool = False,
+        early_decisions: bool = True,
+        max_sessions: int = 100_000,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.pool_size = pool_size
+        self.log_level = log_level
+        self.partials = partials
+        self.early_decisions = early_decisions
+        self.max_sessions = max_sessions
+        self.processes: List[subprocess.Popen] = []
+        self.server: Optional[subprocess.Popen] = None
+        self.url = ""
+
+    async def __aenter__(self) -> "LocalStack":
+        here = os.path.dirname(os.path.abspath(__file__))
+        fake_port, server_port = free_port(), free_port()
+        self.processes.append(subprocess.Popen(
+            [sys.executable, "fake_openai.py", "--port", str(fake_port),
+             "--latency", str(self.latency), "--jitter", str(self.jitter)]
+            + (["--partials"] if self.partials else []),
+            cwd=here,
+        ))
+        await wait_ready(f"http://127.0.0.1:{fake_port}", path="/docs")
+        env = dict(
+            os.environ,
+            OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "load-test-key"),
+            OPENAI_API_BASE=f"http://127.0.0.1:{fake_port}/v1",
+            OPENAI_REALTIME_URL=f"ws://127.0.0.1:{fake_port}/v1/realtime",
+            TTS_CACHE_DIR=tempfile.mkdtemp(prefix="load_tts_"),
+            OUTCOME_STORE_URL=f"jsonl:///{tempfile.mkdtemp(prefix='load_outcomes_')}",
+            REALTIME_POOL_SIZE=str(self.pool_size),
+            LOG_LEVEL=self.log_level,
+            EARLY_DECISIONS=str(self.early_decisions).lower(),
+            ADMISSION_MAX_SESSIONS=str(self.max_sessions),
+        )
+        self.server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "demo_server:app", "--port", str(server_port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=here, env=env,
+        )
+        self.processes.append(self.server)
+        self.url = f"http://127.0.0.1:{server_port}"
+        await wait_ready(self.url)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # Stop the demo server before the fake it depends on
+        for process in reversed(self.processes):
+            process.terminate()
+            process.wait(timeout=10)
+
+    @property
+    def ws_url(self) -> str:
+        return self.url.replace("http://", "ws://", 1)
+
+
+def raise_file_limit():
+    """Thousands of sessions need two sockets each (caller and upstream)"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def main(args):
+    raise_file_limit()
+    speech = synthetic_speech(args.speech_ms)
+    options = dict(ramp=args.ramp, paced=args.paced, think_time=args.think_time, timeout=args.timeout)
+
+    async def run_levels(ws_url: str, sampler: Optional[ProcessSampler]):
+        if not args.find_max:
+            summary = await run_load(ws_url, args.sessions, args.concurrency, speech, sampler=sampler, **options)
+            print_summary(summary)
+            return
+
+        # Double concurrency until errors (incl. shed calls) exceed 1% or p95 turn latency breaks the SLO
+        level, sustainable = args.start_concurrency, None
+        while level <= args.max_concurrency:
+            summary = await run_load(ws_url, level, level, speech, sampler=sampler, prefix=f"c{level}", **options)
+            print_summary(summary)
+            failed = summary["errors"] + summary["rejected"]
+            ok = failed <= level * 0.01 and summary["turn_latency_ms"]["p95"] <= args.slo_ms
+            if not ok:
+                break
+            sustainable = level
+            level *= 2
+        print(f"max sustainable concurrency per worker: {sustainable or 'below ' + str(args.start_concurrency)} "
+              f"(p95 turn latency <= {args.slo_ms:.0f} ms, errors <= 1%)")
+
+    if args.url:
+        await run_levels(args.url.rstrip("/"), None)
+        return
+
+    stack = LocalStack(
+        args.latency,
+        args.jitter,
+        args.pool_size,
+        args.server_log_level,
+        partials=args.partials,
+        early_decisions=args.early_decisions == "on",
+        max_sessions=args.max_sessions,
+    )
+    async with stack:
+        await run_levels(stack.ws_url, ProcessSampler(stack.server.pid))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /demo/voice against fake OpenAI servers")
+    parser.add_argument("--url", help="ws:// URL of a running server (default: start a local stack)")
+    parser.add_argument("--sessions", type=int, default=200, help="Calls to run")
+    parser.add_argument("--concurrency", type=int, default=200, help="Calls open at once")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which call starts are spread")
+    parser.add_argument("--latency", type=float, default=0.1, help="Fake OpenAI response latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Fake OpenAI extra random latency (s)")
+    parser.add_argument("--pool-size", type=int, default=2, help="REALTIME_POOL_SIZE for the server")
+    parser.add_argument("--speech-ms", type=int, default=600, help="Synthetic speech per answer")
+    parser.add_argument("--paced", action="store_true", help="Send speech in real time instead of as fast as possible")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause before each answer (s)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Max wait for a bot turn (s)")
+    parser.add_argument("--partials", action="store_true",
+                        help="Fake streams transcript deltas before the final transcript (arrives after --latency)")
+    parser.add_argument("--early-decisions", choices=("on", "off"), default="on",
+                        help="EARLY_DECISIONS for the server: compare on/off with --partials for the turn-latency saving")
+    parser.add_argument("--max-sessions", type=int, default=100_000,
+                        help="ADMISSION_MAX_SESSIONS for the server (default: effectively unlimited)")
+    parser.add_argument("--server-log-level", default="WARNING", help="LOG_LEVEL for the server")
+    parser.add_argument("--find-max", action="store_true", help="Search for the max sustainable concurrency")
+    parser.add_argument("--start-concurrency", type=int, default=50)
+    parser.add_argument("--max-concurrency", type=int, default=6400)
+    parser.add_argument("--slo-ms", type=float, default=500.0, help="p95 turn latency budget for --find-max")
+    asyncio.run(main(parser.parse_args()))
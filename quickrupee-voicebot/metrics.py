@@ -0,0 +1,176 @@
+"""
+Turn Tracing and Prometheus Metrics
+Per-turn stage spans aggregated into histograms for /metrics, with optional
+sampled trace export to a local JSONL file
+"""
+import json
+import random
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, IO, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; spans from sub-millisecond FSM decisions to multi-second transcriptions
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Turn events in order, and the stage each pair of consecutive events measures
+TURN_EVENTS = ("speech_stopped", "transcript", "fsm_decision", "tts_lookup", "audio_sent")
+TURN_STAGES = {
+    "transcript": "transcription",  # speech_stopped -> transcript received
+    "fsm_decision": "fsm",  # transcript -> FSM decision
+    "tts_lookup": "control",  # FSM decision -> TTS lookup (state update, commit ack, mic mute)
+    "audio_sent": "tts",  # TTS lookup -> first bot audio sent; split into tts_hit / tts_miss
+}
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label value"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, List] = {}  # label value -> [bucket counts..., sum, count]
+
+    def observe(self, label_value: str, value: float):
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, label_value: str) -> int:
+        series = self._series.get(label_value)
+        return series[-1] if series else 0
+
+    def expose(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for label_value, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f'{self.name}_bucket{{{self.label}="{label_value}",le="{bound}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {series[-1]}'
+            yield f'{self.name}_sum{{{self.label}="{label_value}"}} {series[-2]:.6f}'
+            yield f'{self.name}_count{{{self.label}="{label_value}"}} {series[-1]}'
+
+
+class TraceExporter:
+    """Appends a sampled fraction of finished turn traces to a JSONL file"""
+
+    def __init__(self, path: str, sample_rate: float, flush_every: int = 50):
+        self.sample_rate = sample_rate
+        self.flush_every = flush_every
+        self._file: IO[str] = open(path, "a", encoding="utf-8")
+        self._unflushed = 0
+        self.exported = 0
+
+    def sampled(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def export(self, trace: Dict[str, object]):
+        self._file.write(json.dumps(trace) + "\n")
+        self.exported += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self._file.flush()
+            self._unflushed = 0
+
+    def close(self):
+        self._file.close()
+
+
+class TurnTracer:
+    """
+    Aggregates turn spans for one worker
+
+    Each turn records monotonic timestamps for the TURN_EVENTS it reaches;
+    when it finishes, the duration of every stage and of the whole turn is
+    observed into the stage histogram. A turn costs a handful of
+    perf_counter calls and bisects, well under the budget checked by
+    `python benchmark.py tracing`.
+    """
+
+    def __init__(self, exporter: Optional[TraceExporter] = None, clock: Callable[[], float] = time.perf_counter):
+        self.exporter = exporter
+        self.clock = clock
+        self.stages = Histogram(
+            "quickrupee_turn_stage_seconds",
+            "Duration of each stage of a conversational turn",
+            label="stage",
+        )
+        self.turns_total = 0
+
+    def start(self, session_id: str) -> "TurnTrace":
+        return TurnTrace(self, session_id)
+
+    def _finish(self, trace: "TurnTrace"):
+        events = trace.events
+        previous: Optional[Tuple[str, float]] = None
+        for name in TURN_EVENTS:
+            at = events.get(name)
+            if at is None:
+                continue
+            if previous is not None:
+                stage = TURN_STAGES[name]
+                if stage == "tts" and trace.cache_hit is not None:
+                    stage = "tts_hit" if trace.cache_hit else "tts_miss"
+                self.stages.observe(stage, at - previous[1])
+            previous = (name, at)
+        first = events.get("speech_stopped", events.get("transcript"))
+        last = events.get("audio_sent")
+        if first is not None and last is not None:
+            self.stages.observe("turn", last - first)
+        self.turns_total += 1
+
+        if self.exporter and self.exporter.sampled():
+            origin = min(events.values())
+            self.exporter.export({
+                "session_id": trace.session_id,
+                "state": trace.state,
+                "cache_hit": trace.cache_hit,
+                "events_ms": {name: round((at - origin) * 1000, 3) for name, at in events.items()},
+            })
+
+    def expose(self) -> Iterable[str]:
+        yield "# HELP quickrupee_turns_total Conversational turns traced"
+        yield "# TYPE quickrupee_turns_total counter"
+        yield f"quickrupee_turns_total {self.turns_total}"
+        yield from self.stages.expose()
+
+
+class TurnTrace:
+    """Span timestamps for one turn of one session"""
+
+    __slots__ = ("tracer", "session_id", "events", "cache_hit", "state")
+
+    def __init__(self, tracer: TurnTracer, session_id: str):
+        self.tracer = tracer
+        self.session_id = session_id
+        self.events: Dict[str, float] = {}
+        self.cache_hit: Optional[bool] = None
+        self.state: Optional[str] = None
+
+    def mark(self, event: str):
+        """Record an event the first time it happens in this turn"""
+        if event not in self.events:
+            self.events[event] = self.tracer.clock()
+
+    def finish(self):
+        self.tracer._finish(self)
+
+
+def render(sections: Iterable[Iterable[str]]) -> str:
+    """Join exposition lines from several sources into a /metrics body"""
+    return "\n".join(line for section in sections for line in section) + "\n"
+
+
+def gauge(name: str, help_text: str, value: float, kind: str = "gauge") -> Iterable[str]:
+    """Exposition lines for a single unlabelled gauge or counter"""
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} {kind}"
+    yield f"{name} {value}"
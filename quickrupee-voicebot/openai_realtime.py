@@ -3,12 +3,13 @@ OpenAI Realtime API Integration
 Handles WebSocket communication with OpenAI's Realtime API for speech-to-text
 """
 import asyncio
-import json
 import base64
 import logging
-from typing import Optional, Callable
+import time
+from typing import Any, Dict, List, Optional, Callable, Tuple
 import websockets
 from config import settings
+from json_codec import dumps, loads
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +18,20 @@ class OpenAIRealtimeClient:
     """
     Client for OpenAI Realtime API (STT only)
     TTS is handled by standard OpenAI TTS API for reliability
+
+    Callbacks are awaited on the receive loop, so they should return quickly:
+    no further upstream events are read until they do.
     """
 
     def __init__(
         self,
         on_transcript: Optional[Callable[[str], None]] = None,
         on_error: Optional[Callable[[str], None]] = None,
+        url: Optional[str] = None,
+        on_committed: Optional[Callable[[], None]] = None,
+        on_speech_stopped: Optional[Callable[[], None]] = None,
+        on_partial_transcript: Optional[Callable[[str], None]] = None,
+        on_transcription_failed: Optional[Callable[[], None]] = None,
     ):
         """
         Initialize Realtime API client for speech-to-text
@@ -30,28 +39,58 @@ class OpenAIRealtimeClient:
         Args:
             on_transcript: Callback for transcribed text
             on_error: Callback for errors
+            url: Realtime WebSocket URL (defaults to OPENAI_REALTIME_URL + model)
+            on_committed: Callback when the input audio buffer is committed
+            on_speech_stopped: Callback when server VAD detects the end of speech
+            on_partial_transcript: Callback with the running text of a transcription in progress
+            on_transcription_failed: Callback when a committed turn gets no transcript
         """
+        self.url = url or f"{settings.OPENAI_REALTIME_URL}?model={settings.OPENAI_MODEL}"
         self.ws: Optional[websockets.WebSocketClientProtocol] = None
         self.on_transcript = on_transcript
         self.on_error = on_error
+        self.on_committed = on_committed
+        self.on_speech_stopped = on_speech_stopped
+        self.on_partial_transcript = on_partial_transcript
+        self.on_transcription_failed = on_transcription_failed
         self.is_connected = False
+        self._partials: Dict[str, str] = {}  # item_id -> running transcript from delta events
+        self.connected_at: Optional[float] = None
         self._receive_task: Optional[asyncio.Task] = None
 
+        # Outbound audio: bounded queue drained by one sender task that
+        # coalesces chunks into larger input_audio_buffer.append events
+        self._audio_queue: "asyncio.Queue[Tuple[float, bytes]]" = asyncio.Queue(
+            maxsize=settings.AUDIO_QUEUE_MAX_CHUNKS
+        )
+        self._send_task: Optional[asyncio.Task] = None
+        self._audio_generation = 0  # Bumped by clear_audio_buffer to discard in-flight batches
+        self.audio_stats: Dict[str, Any] = {
+            "chunks_queued": 0,
+            "chunks_dropped": 0,
+            "batches_sent": 0,
+            "bytes_sent": 0,
+            "max_queue_depth": 0,
+            "send_latency_total": 0.0,
+            "send_latency_max": 0.0,
+        }
+
     async def connect(self):
         """Establish WebSocket connection to OpenAI Realtime API"""
         try:
-            url = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-12-17"
             headers = {
                 "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
                 "OpenAI-Beta": "realtime=v1",
             }
 
-            self.ws = await websockets.connect(url, extra_headers=headers)
+            self.ws = await websockets.connect(self.url, extra_headers=headers)
             self.is_connected = True
+            self.connected_at = time.monotonic()
             logger.info("Connected to OpenAI Realtime API")
 
             await self._configure_session()
             self._receive_task = asyncio.create_task(self._receive_messages())
+            self._send_task = asyncio.create_task(self._send_audio_loop())
 
         except Exception as e:
             logger.error(f"Failed to connect to OpenAI Realtime API: {e}")
@@ -59,6 +98,23 @@ class OpenAIRealtimeClient:
                 await self.on_error(str(e))
             raise
 
+    def attach(
+        self,
+        on_transcript: Optional[Callable[[str], None]] = None,
+        on_error: Optional[Callable[[str], None]] = None,
+        on_committed: Optional[Callable[[], None]] = None,
+        on_speech_stopped: Optional[Callable[[], None]] = None,
+        on_partial_transcript: Optional[Callable[[str], None]] = None,
+        on_transcription_failed: Optional[Callable[[], None]] = None,
+    ):
+        """Bind session callbacks to an already-connected (e.g. pre-warmed) client"""
+        self.on_transcript = on_transcript
+        self.on_error = on_error
+        self.on_committed = on_committed
+        self.on_speech_stopped = on_speech_stopped
+        self.on_partial_transcript = on_partial_transcript
+        self.on_transcription_failed = on_transcription_failed
+
     async def _configure_session(self):
         """Configure the Realtime API session for transcription only"""
         config = {
@@ -70,7 +126,7 @@ class OpenAIRealtimeClient:
                 "input_audio_format": "pcm16",
                 "output_audio_format": "pcm16",
                 "input_audio_transcription": {
-                    "model": "whisper-1"
+                    "model": settings.TRANSCRIPTION_MODEL
                 },
                 "turn_detection": {
                     "type": "server_vad",
@@ -82,7 +138,7 @@ class OpenAIRealtimeClient:
                 "temperature": 0.6,
             },
         }
-        await self.ws.send(json.dumps(config))
+        await self.ws.send(dumps(config))
         logger.info("Session configured for transcription")
 
     async def _receive_messages(self):
@@ -101,55 +157,170 @@ class OpenAIRealtimeClient:
     async def _handle_message(self, message: str):
         """Handle incoming message from OpenAI"""
         try:
-            data = json.loads(message)
+            data = loads(message)
             event_type = data.get("type")
 
-            if event_type == "conversation.item.input_audio_transcription.completed":
+            # Per-event logs are DEBUG with lazy %-formatting: nothing is built
+            # unless the level is enabled
+            if event_type == "conversation.item.input_audio_transcription.delta":
+                # Incremental transcription: report the running text so far
+                item_id = data.get("item_id", "")
+                running = self._partials.get(item_id, "") + data.get("delta", "")
+                self._partials[item_id] = running
+                if self.on_partial_transcript:
+                    await self.on_partial_transcript(running)
+
+            elif event_type == "conversation.item.input_audio_transcription.completed":
                 transcript = data.get("transcript", "")
-                logger.info(f"User said: {transcript}")
+                self._partials.pop(data.get("item_id", ""), None)
+                logger.debug("User said: %s", transcript)
                 if self.on_transcript:
                     await self.on_transcript(transcript)
 
+            elif event_type == "conversation.item.input_audio_transcription.failed":
+                self._partials.pop(data.get("item_id", ""), None)
+                logger.warning("Transcription failed: %s", data.get("error", {}).get("message", "unknown error"))
+                if self.on_transcription_failed:
+                    await self.on_transcription_failed()
+
             elif event_type == "error":
                 error_msg = data.get("error", {}).get("message", "Unknown error")
-                logger.error(f"OpenAI error: {error_msg}")
+                logger.error("OpenAI error: %s", error_msg)
                 if self.on_error:
                     await self.on_error(error_msg)
 
             elif event_type == "session.created":
-                logger.info("Session created successfully")
+                logger.debug("Session created successfully")
 
             elif event_type == "session.updated":
-                logger.info("Session updated successfully")
+                logger.debug("Session updated successfully")
 
             elif event_type == "input_audio_buffer.speech_started":
-                logger.info("Speech detected - user started speaking")
+                logger.debug("Speech detected - user started speaking")
 
             elif event_type == "input_audio_buffer.speech_stopped":
-                logger.info("Speech ended - user stopped speaking")
+                logger.debug("Speech ended - user stopped speaking")
+                if self.on_speech_stopped:
+                    await self.on_speech_stopped()
 
             elif event_type == "input_audio_buffer.committed":
-                logger.info("Audio buffer committed for transcription")
+                logger.debug("Audio buffer committed for transcription")
+                if self.on_committed:
+                    await self.on_committed()
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse message: {e}")
+        except ValueError as e:
+            logger.error("Failed to parse message: %s", e)
         except Exception as e:
             logger.error(f"Error handling message: {e}")
 
     async def send_audio(self, audio_data: bytes):
-        """Send audio data to OpenAI for transcription"""
+        """
+        Queue audio for transcription
+
+        Blocks while the outbound queue is full, which pushes back on the
+        browser socket. If the queue stays full for longer than
+        AUDIO_BACKPRESSURE_TIMEOUT the chunk is dropped and counted.
+        """
         if not self.is_connected or not self.ws:
+            self.audio_stats["chunks_dropped"] += 1
             return
 
         try:
-            audio_b64 = base64.b64encode(audio_data).decode("utf-8")
-            event = {
-                "type": "input_audio_buffer.append",
-                "audio": audio_b64,
-            }
-            await self.ws.send(json.dumps(event))
+            await asyncio.wait_for(
+                self._audio_queue.put((time.perf_counter(), bytes(audio_data))),
+                timeout=settings.AUDIO_BACKPRESSURE_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            self.audio_stats["chunks_dropped"] += 1
+            logger.warning("Upstream audio queue full - dropping chunk")
+            return
+
+        self.audio_stats["chunks_queued"] += 1
+        depth = self._audio_queue.qsize()
+        if depth > self.audio_stats["max_queue_depth"]:
+            self.audio_stats["max_queue_depth"] = depth
+
+    async def _send_audio_loop(self):
+        """Drain the audio queue, coalescing chunks up to a size or time budget"""
+        max_bytes = settings.AUDIO_BATCH_MAX_BYTES
+        window = settings.AUDIO_BATCH_WINDOW_MS / 1000
+
+        try:
+            while True:
+                enqueued_at, chunk = await self._audio_queue.get()
+                generation = self._audio_generation
+                batch: List[bytes] = [chunk]
+                oldest = enqueued_at
+                size = len(chunk)
+
+                # Give small chunks a short window to accumulate, then take
+                # everything already queued up to the size budget
+                if window and size < max_bytes and self._audio_queue.empty():
+                    await asyncio.sleep(window)
+                if generation != self._audio_generation:
+                    # Buffer was cleared while waiting: drop the stale chunk but
+                    # keep audio queued since (phone lines never go quiet)
+                    self._audio_queue.task_done()
+                    continue
+                while size < max_bytes and not self._audio_queue.empty():
+                    _, chunk = self._audio_queue.get_nowait()
+                    batch.append(chunk)
+                    size += len(chunk)
+
+                try:
+                    await self._send_append(b"".join(batch))
+                finally:
+                    for _ in batch:
+                        self._audio_queue.task_done()
+
+                latency = time.perf_counter() - oldest
+                stats = self.audio_stats
+                stats["batches_sent"] += 1
+                stats["bytes_sent"] += size
+                stats["send_latency_total"] += latency
+                if latency > stats["send_latency_max"]:
+                    stats["send_latency_max"] = latency
+
+        except asyncio.CancelledError:
+            raise
+        except websockets.exceptions.ConnectionClosed as e:
+            self.is_connected = False
+            logger.error(f"Realtime connection closed while sending audio: {e}")
+            if self.on_error:
+                await self.on_error("Speech recognition connection lost")
         except Exception as e:
             logger.error(f"Error sending audio: {e}")
+            if self.on_error:
+                await self.on_error(str(e))
+
+    async def _send_append(self, audio: bytes):
+        """Send one input_audio_buffer.append event"""
+        # Base64 output never needs JSON escaping, so build the event
+        # directly instead of going through a dict and json.dumps
+        audio_b64 = base64.b64encode(audio).decode("ascii")
+        await self.ws.send('{"type":"input_audio_buffer.append","audio":"' + audio_b64 + '"}')
+
+    async def flush_audio(self, timeout: float = 1.0):
+        """Wait until all queued audio has been handed to the socket"""
+        try:
+            await asyncio.wait_for(self._audio_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Audio queue not drained within {timeout}s")
+
+    def get_audio_stats(self) -> Dict[str, Any]:
+        """Outbound audio queue depth and send-latency metrics"""
+        stats = self.audio_stats
+        batches = stats["batches_sent"]
+        return {
+            "queue_depth": self._audio_queue.qsize(),
+            "max_queue_depth": stats["max_queue_depth"],
+            "chunks_queued": stats["chunks_queued"],
+            "chunks_dropped": stats["chunks_dropped"],
+            "batches_sent": batches,
+            "bytes_sent": stats["bytes_sent"],
+            "avg_send_latency_ms": round(stats["send_latency_total"] / batches * 1000, 2) if batches else 0.0,
+            "max_send_latency_ms": round(stats["send_latency_max"] * 1000, 2),
+        }
 
     async def commit_audio(self):
         """Signal that audio input is complete"""
@@ -157,8 +328,10 @@ class OpenAIRealtimeClient:
             return
 
         try:
+            # Audio still queued locally must reach the buffer before the commit
+            await self.flush_audio()
             event = {"type": "input_audio_buffer.commit"}
-            await self.ws.send(json.dumps(event))
+            await self.ws.send(dumps(event))
         except Exception as e:
             logger.error(f"Error committing audio: {e}")
 
@@ -168,8 +341,13 @@ class OpenAIRealtimeClient:
             return
 
         try:
+            # Discard audio not yet sent, including any batch being assembled
+            self._audio_generation += 1
+            while not self._audio_queue.empty():
+                self._audio_queue.get_nowait()
+                self._audio_queue.task_done()
             event = {"type": "input_audio_buffer.clear"}
-            await self.ws.send(json.dumps(event))
+            await self.ws.send(dumps(event))
         except Exception as e:
             logger.error(f"Error clearing audio buffer: {e}")
 
@@ -177,6 +355,8 @@ class OpenAIRealtimeClient:
         """Close the WebSocket connection"""
         if self._receive_task:
             self._receive_task.cancel()
+        if self._send_task:
+            self._send_task.cancel()
 
         if self.ws:
             await self.ws.close()
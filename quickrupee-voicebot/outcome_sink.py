@@ -0,0 +1,216 @@
+"""
+Lead Outcome Sink
+Durable record of every finished screening for the callback team, written in
+batches off the turn path
+
+Stores, by OUTCOME_STORE_URL:
+    sqlite:///path/outcomes.db   one table, WAL mode, shared by all workers on the host
+    jsonl:///path/outcomes       append-only JSONL segments, rotated by size
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, IO, List, Optional
+
+from json_codec import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteOutcomeWriter:
+    """Writes outcome batches to SQLite, one transaction per batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " session_id TEXT, finished_at REAL, is_eligible INTEGER, rejection_reason TEXT,"
+            " record TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS outcomes_eligible ON outcomes (is_eligible, finished_at)")
+        self._db.commit()
+
+    def write_batch(self, records: List[Dict[str, Any]]):
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO outcomes (session_id, finished_at, is_eligible, rejection_reason, record)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (r.get("session_id"), r.get("finished_at"), r.get("is_eligible"), r.get("rejection_reason"),
+                     dumps(r))
+                    for r in records
+                ],
+            )
+
+    def close(self):
+        self._db.close()
+
+
+class JSONLOutcomeWriter:
+    """
+    Appends outcome batches to JSONL segment files in a directory
+
+    Each worker writes its own segments (named by start time and pid), so
+    workers never share a file; a segment is closed once it passes
+    `segment_bytes`.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._file: Optional[IO[str]] = None
+        self._segments = 0
+
+    def _segment(self) -> IO[str]:
+        if self._file is not None and self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            self._segments += 1
+            name = f"outcomes-{int(time.time())}-{os.getpid()}-{self._segments:04d}.jsonl"
+            self._file = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+        return self._file
+
+    def write_batch(self, records: List[Dict[str, Any]]):
+        segment = self._segment()
+        segment.write("".join(dumps(r) + "\n" for r in records))
+        segment.flush()
+        os.fsync(segment.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def create_outcome_writer(url: str):
+    """
+    Build a writer from a URL (sqlite:///path or jsonl:///directory)
+
+    Raises:
+        ValueError: for an unsupported scheme
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteOutcomeWriter(url[len("sqlite:///"):])
+    if url.startswith("jsonl:///"):
+        return JSONLOutcomeWriter(url[len("jsonl:///"):])
+    raise ValueError(f"Unsupported OUTCOME_STORE_URL: {url}")
+
+
+class OutcomeSink:
+    """
+    Bounded in-memory queue of lead outcomes, flushed to a store in batches
+
+    submit() never blocks a turn: it enqueues or, when `max_queue` records
+    are already waiting, drops the record and counts it. A background task
+    writes up to `batch_size` records at a time, at least every
+    `flush_interval` seconds, in a worker thread. close() stops intake and
+    drains everything queued before shutdown.
+    """
+
+    def __init__(self, url: str, max_queue: int = 10_000, batch_size: int = 200, flush_interval: float = 0.5):
+        """
+        Args:
+            url: Store URL, opened on start()
+            max_queue: Outcomes held in memory before new ones are dropped
+            batch_size: Outcomes per write
+            flush_interval: Max seconds an outcome waits before it is written
+        """
+        self.url = url
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.writer = None
+        self._queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize=max_queue)  # None stops
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.write_seconds = 0.0
+
+    async def start(self):
+        """Open the store and start the flusher"""
+        if self._task is None:
+            self.writer = create_outcome_writer(self.url)
+            self._task = asyncio.create_task(self._flush_loop())
+            logger.info("Outcome sink started (%s)", self.url)
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """Queue an outcome for the next batch; False if dropped (queue full or shutting down)"""
+        if self._closing:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error("Outcome queue full, dropped outcome for %s", record.get("session_id"))
+            return False
+        self.submitted += 1
+        return True
+
+    def _take_batch(self, first: Dict[str, Any]) -> List[Dict[str, Any]]:
+        batch = [first]
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.writer.write_batch, batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error("Failed to write %d outcomes: %s", len(batch), e)
+            return
+        self.write_seconds += time.perf_counter() - start
+        self.written += len(batch)
+        self.batches += 1
+
+    async def _flush_loop(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            # Give a burst a moment to fill the batch before writing
+            if first is not None and not self._closing and self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+            batch = self._take_batch(first)
+            stopping = None in batch
+            batch = [record for record in batch if record is not None]
+            if batch:
+                await self._write(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "write_records_per_s": round(self.written / self.write_seconds) if self.write_seconds else 0,
+        }
+
+    async def close(self):
+        """Stop intake, write everything still queued, then close the store"""
+        self._closing = True
+        if self._task:
+            await self._queue.put(None)  # Behind everything already queued
+            await self._task
+            self._task = None
+        elif not self._queue.empty():
+            logger.warning("Outcome sink was never started, %d outcomes not written", self._queue.qsize())
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
@@ -0,0 +1,224 @@
+"""
+Prompt Audio Stitching
+Speaks parameterized prompts (amounts, cities) from cached audio segments instead of per-call TTS
+
+A template such as "Is your monthly in-hand salary above {min_salary} rupees?"
+is split into fixed text segments and slots. Every segment it can need is
+synthesized once: the fixed text, the number words an amount is spoken with
+("twenty", "five", "thousand", ...) and the configured cities. A rendered
+prompt is then matched back to its template and its audio is the
+concatenation of cached segments.
+
+Segments are cached as 24 kHz PCM16 (TTS "pcm" output) with leading and
+trailing silence trimmed, so they join sample for sample without gaps.
+MP3 clips can't be trimmed without decoding, so one stitched PCM clip is
+wrapped as WAV for the browser or transcoded to μ-law for phone calls.
+"""
+import logging
+import re
+import struct
+from typing import Callable, Dict, Iterable, List, Optional, Union
+import numpy as np
+
+from telephony import REALTIME_RATE
+
+logger = logging.getLogger(__name__)
+
+Audio = Union[bytes, memoryview]
+
+# Slot name -> kind of value it holds
+SLOT_KINDS = {
+    "min_salary": "number",
+    "amount": "number",
+    "city": "city",
+    "cities": "cities",
+}
+
+ONES = (
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen",
+)
+TENS = ("", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety")
+# Indian numbering: amounts in rupees are spoken in lakhs and crores
+SCALES = ((10_000_000, "crore"), (100_000, "lakh"), (1_000, "thousand"), (100, "hundred"))
+MAX_NUMBER = 100 * 10_000_000 - 1
+
+
+def speakable(text: str) -> bool:
+    """False for fixed text that is only punctuation (e.g. the "?" after a slot)"""
+    return re.search(r"\w", text) is not None
+
+
+def number_words(n: int) -> List[str]:
+    """Words an amount is spoken with, e.g. 150000 -> ["one", "lakh", "fifty", "thousand"]"""
+    if not 0 <= n <= MAX_NUMBER:
+        raise ValueError(f"Number out of range: {n}")
+    if n == 0:
+        return [ONES[0]]
+    words: List[str] = []
+    for value, name in SCALES:
+        if n >= value:
+            words += number_words(n // value) + [name]
+            n %= value
+    if n >= 20:
+        words.append(TENS[n // 10])
+        n %= 10
+    if n:
+        words.append(ONES[n])
+    return words
+
+
+def number_vocabulary() -> List[str]:
+    """Every word number_words() can produce"""
+    return list(ONES) + [t for t in TENS if t] + [name for _, name in SCALES]
+
+
+class PromptTemplate:
+    """
+    A prompt with {slots}, compiled to a regex that recovers slot values from rendered text
+    """
+
+    def __init__(self, template: str, cities: Iterable[str]):
+        """
+        Raises:
+            ValueError: for a slot name not in SLOT_KINDS
+        """
+        self.template = template
+        city = "(?:" + "|".join(re.escape(c) for c in sorted(cities, key=len, reverse=True)) + ")"
+        slot_patterns = {
+            "number": r"\d[\d,]*",
+            "city": city,
+            "cities": rf"{city}(?:, {city})*(?:,? or {city})?",
+        }
+        # Alternating fixed text and slot names: [text, slot, text, slot, ..., text]
+        self.parts: List[str] = re.split(r"\{(\w+)\}", template)
+        pattern = ""
+        for i, part in enumerate(self.parts):
+            if i % 2:
+                if part not in SLOT_KINDS:
+                    raise ValueError(f"Unknown slot {{{part}}} in prompt template: {template}")
+                pattern += f"(?P<{part}>{slot_patterns[SLOT_KINDS[part]]})"
+            else:
+                pattern += re.escape(part)
+        self.regex = re.compile(pattern)
+
+    def fixed_segments(self) -> List[str]:
+        return [text for text in (p.strip() for p in self.parts[::2]) if speakable(text)]
+
+    def plan(self, text: str) -> Optional[List[str]]:
+        """Segment texts that speak `text`, or None if it was not rendered from this template"""
+        match = self.regex.fullmatch(text)
+        if match is None:
+            return None
+        segments: List[str] = []
+        for i, part in enumerate(self.parts):
+            if not i % 2:
+                part = part.strip()
+                if speakable(part):
+                    segments.append(part)
+                continue
+            value = match.group(part)
+            kind = SLOT_KINDS[part]
+            if kind == "number":
+                amount = int(value.replace(",", ""))
+                if amount > MAX_NUMBER:
+                    return None
+                segments += number_words(amount)
+            elif kind == "city":
+                segments.append(value)
+            else:
+                *head, last = re.split(r",? or |, ", value)
+                segments += head + (["or"] if " or " in value else []) + [last]
+        return segments
+
+
+class PromptStitcher:
+    """
+    Builds audio for parameterized prompts from cached segments
+
+    Use segments() to preload the vocabulary; stitch() returns None (fall
+    back to TTS) when no template matches or a segment is not cached.
+    """
+
+    def __init__(self, templates: Iterable[str], cities: Iterable[str]):
+        self.cities = [c.title() for c in cities]
+        self.templates: List[PromptTemplate] = []
+        for template in dict.fromkeys(templates):
+            if "{" not in template:
+                continue
+            try:
+                self.templates.append(PromptTemplate(template, self.cities))
+            except ValueError as e:
+                logger.error("Skipping prompt template: %s", e)
+
+        self.stitched = 0
+        self.missing_segments = 0
+
+    def segments(self) -> List[str]:
+        """Every segment text a prompt can be stitched from"""
+        texts: List[str] = []
+        for template in self.templates:
+            texts += template.fixed_segments()
+        texts += number_vocabulary() + self.cities + ["or"]
+        return list(dict.fromkeys(texts))
+
+    def plan(self, text: str) -> Optional[List[str]]:
+        for template in self.templates:
+            segments = template.plan(text)
+            if segments is not None:
+                return segments
+        return None
+
+    def stitch(self, text: str, lookup: Callable[[str], Optional[Audio]]) -> Optional[bytes]:
+        """
+        Concatenate cached segment audio for a rendered prompt
+
+        Args:
+            text: The prompt as the FSM speaks it
+            lookup: Cached, trimmed PCM16 for a segment (see trim_pcm), None on a miss
+        """
+        segments = self.plan(text)
+        if segments is None:
+            return None
+        clips = []
+        for segment in segments:
+            audio = lookup(segment)
+            if audio is None:
+                self.missing_segments += 1
+                logger.debug("Segment not cached, cannot stitch: %r", segment)
+                return None
+            clips.append(audio)
+        self.stitched += 1
+        return b"".join(clips)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "templates": len(self.templates),
+            "segments": len(self.segments()),
+            "stitched": self.stitched,
+            "missing_segments": self.missing_segments,
+        }
+
+
+def trim_pcm(pcm: bytes, threshold: int = 300, pad_ms: int = 40, rate: int = REALTIME_RATE) -> bytes:
+    """Cut leading/trailing silence from a PCM16 segment, keeping `pad_ms` either side"""
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    loud = np.flatnonzero(np.abs(samples.astype(np.int32)) > threshold)
+    if not len(loud):
+        return pcm
+    pad = rate * pad_ms // 1000
+    return pcm[max(0, loud[0] - pad) * 2:(loud[-1] + 1 + pad) * 2]
+
+
+# RIFF header of a mono PCM16 WAV file: sizes, rate and byte rate filled in per clip
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+def wav_clip(pcm: bytes, rate: int = REALTIME_RATE) -> bytes:
+    """Wrap mono PCM16 as a WAV file the browser can play like an MP3 clip"""
+    header = WAV_HEADER.pack(
+        b"RIFF", WAV_HEADER.size - 8 + len(pcm), b"WAVE",
+        b"fmt ", 16, 1, 1, rate, rate * 2, 2, 16,
+        b"data", len(pcm),
+    )
+    return header + pcm
@@ -0,0 +1,147 @@
+"""
+Browser WebSocket Protocol
+Binary frames carry audio; JSON text frames carry control messages only
+
+Binary frame layout (2-byte header + payload):
+    byte 0: kind  (KIND_PCM16, KIND_MP3, KIND_MP3_CHUNK, KIND_WAV)
+    byte 1: flags (FLAG_FINAL on the last chunk of a streamed clip)
+    byte 2+: raw audio bytes
+
+Clients opt in with `?protocol=binary` on the WebSocket URL; without it the
+legacy JSON protocol (base64 audio inside JSON) is used.
+"""
+import base64
+import struct
+from typing import Any, Dict, Optional, Tuple, Union
+from fastapi import WebSocket, WebSocketDisconnect
+from json_codec import dumps, loads
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+
+FRAME_HEADER = struct.Struct("!BB")  # kind, flags
+
+KIND_PCM16 = 0x01  # browser -> server: 24 kHz mono PCM16 (little-endian)
+KIND_MP3 = 0x02    # server -> browser: one complete MP3 clip
+KIND_MP3_CHUNK = 0x03  # server -> browser: part of an MP3 clip streamed from TTS
+KIND_WAV = 0x04    # server -> browser: one complete WAV clip (prompts stitched from PCM segments)
+
+FLAG_FINAL = 0x01  # Last chunk of a streamed clip (payload may be empty)
+
+
+class ProtocolError(ValueError):
+    """Raised for malformed frames from the browser"""
+
+
+def encode_frame(kind: int, payload: bytes, flags: int = 0) -> bytes:
+    """Build a binary frame from a header and raw payload"""
+    return FRAME_HEADER.pack(kind, flags) + payload
+
+
+def decode_frame(data: bytes) -> Tuple[int, int, memoryview]:
+    """
+    Split a binary frame into (kind, flags, payload)
+    The payload is a zero-copy view into data
+    """
+    if len(data) < FRAME_HEADER.size:
+        raise ProtocolError(f"Frame too short: {len(data)} bytes")
+    kind, flags = FRAME_HEADER.unpack_from(data)
+    return kind, flags, memoryview(data)[FRAME_HEADER.size:]
+
+
+def encode_mp3_message(audio: bytes, protocol: str) -> Union[bytes, str]:
+    """
+    Serialize a complete MP3 clip into the outbound message for a protocol
+
+    Returns:
+        bytes (binary frame) for PROTOCOL_BINARY, str (JSON text) otherwise
+    """
+    if protocol == PROTOCOL_BINARY:
+        return encode_frame(KIND_MP3, audio)
+    # Base64 output never needs JSON escaping, so no json.dumps round trip
+    return '{"type":"audio_mp3","data":"' + base64.b64encode(audio).decode("ascii") + '"}'
+
+
+def encode_wav_message(audio: bytes, protocol: str) -> Union[bytes, str]:
+    """Serialize a complete WAV clip for a protocol"""
+    if protocol == PROTOCOL_BINARY:
+        return encode_frame(KIND_WAV, audio)
+    return '{"type":"audio_wav","data":"' + base64.b64encode(audio).decode("ascii") + '"}'
+
+
+def encode_mp3_chunk_message(chunk: bytes, final: bool, protocol: str) -> Union[bytes, str]:
+    """Serialize one chunk of a streamed MP3 clip for a protocol"""
+    if protocol == PROTOCOL_BINARY:
+        return encode_frame(KIND_MP3_CHUNK, chunk, FLAG_FINAL if final else 0)
+    return (
+        '{"type":"audio_mp3_chunk","final":' + ("true" if final else "false")
+        + ',"data":"' + base64.b64encode(chunk).decode("ascii") + '"}'
+    )
+
+
+class BrowserChannel:
+    """
+    Wraps the browser WebSocket and hides which wire protocol is in use
+    """
+
+    def __init__(self, websocket: WebSocket, protocol: str = PROTOCOL_JSON):
+        self.websocket = websocket
+        self.binary = protocol == PROTOCOL_BINARY
+
+    @classmethod
+    def from_websocket(cls, websocket: WebSocket) -> "BrowserChannel":
+        """Pick the protocol requested in the WebSocket URL query string"""
+        return cls(websocket, websocket.query_params.get("protocol", PROTOCOL_JSON))
+
+    @property
+    def protocol(self) -> str:
+        return PROTOCOL_BINARY if self.binary else PROTOCOL_JSON
+
+    async def send_control(self, message: Dict[str, Any]):
+        """Send a JSON control/signalling message"""
+        await self.websocket.send_text(dumps(message))
+
+    async def send_mp3(self, audio: bytes):
+        """Send one complete MP3 clip in the negotiated format"""
+        await self.send_payload(encode_mp3_message(audio, self.protocol))
+
+    async def send_mp3_chunk(self, chunk: bytes, final: bool = False):
+        """Send one chunk of a streamed MP3 clip; the browser plays from the first chunk"""
+        await self.send_payload(encode_mp3_chunk_message(chunk, final, self.protocol))
+
+    async def send_payload(self, payload: Union[bytes, str]):
+        """Send a pre-serialized message as a single write"""
+        if isinstance(payload, str):
+            await self.websocket.send_text(payload)
+        else:
+            await self.websocket.send_bytes(payload)
+
+    async def receive(self) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+        """
+        Receive the next browser message
+
+        Returns:
+            (control, audio): exactly one is set. Audio is raw PCM16 bytes
+            regardless of which protocol carried it.
+
+        Raises:
+            WebSocketDisconnect: when the browser goes away
+            ProtocolError: for malformed binary frames
+        """
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        data = message.get("bytes")
+        if data is not None:
+            kind, _, payload = decode_frame(data)
+            if kind != KIND_PCM16:
+                raise ProtocolError(f"Unexpected frame kind from browser: {kind:#x}")
+            return None, payload
+
+        control = loads(message.get("text") or "{}")
+        if control.get("type") == "audio":
+            # Legacy JSON protocol: base64 PCM16 inside JSON
+            audio_b64 = control.get("data", "")
+            return None, base64.b64decode(audio_b64) if audio_b64 else b""
+        return control, None
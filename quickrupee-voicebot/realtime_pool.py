@@ -0,0 +1,179 @@
+"""
+Pre-warmed Realtime API Connections
+Keeps configured Realtime sessions ready so a call does not wait on the handshake
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+from openai_realtime import OpenAIRealtimeClient
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimePool:
+    """
+    Pool of connected, session-configured OpenAIRealtimeClient instances
+
+    A background task keeps `size` idle clients warm, replacing any that were
+    handed out, closed by the server, or left idle longer than `max_idle`.
+    Clients are never returned to the pool: each call gets a fresh session.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_idle: float = 300.0,
+        refresh_interval: float = 5.0,
+        client_factory: Callable[[], OpenAIRealtimeClient] = OpenAIRealtimeClient,
+    ):
+        """
+        Args:
+            size: Number of warm clients to keep (0 disables pre-warming)
+            max_idle: Seconds a warm client may wait before it is retired
+            refresh_interval: Seconds between maintenance passes
+            client_factory: Builds a new, unconnected client
+        """
+        self.size = size
+        self.max_idle = max_idle
+        self.refresh_interval = refresh_interval
+        self.client_factory = client_factory
+
+        self._idle: Deque[OpenAIRealtimeClient] = deque()
+        self._connecting = 0
+        self.cold_connecting = 0  # On-demand handshakes for calls that found no warm client
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.retired = 0
+        self.connect_failures = 0
+
+    async def start(self):
+        """Start background replenishment"""
+        if self.size > 0 and self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+            logger.info(f"Realtime pool started (size={self.size})")
+
+    async def acquire(
+        self,
+        on_transcript: Optional[Callable[[str], None]] = None,
+        on_error: Optional[Callable[[str], None]] = None,
+        on_committed: Optional[Callable[[], None]] = None,
+        on_speech_stopped: Optional[Callable[[], None]] = None,
+        on_partial_transcript: Optional[Callable[[str], None]] = None,
+        on_transcription_failed: Optional[Callable[[], None]] = None,
+    ) -> OpenAIRealtimeClient:
+        """
+        Get a connected client for a new call
+
+        Uses a warm client when one is available, otherwise connects on demand.
+        """
+        callbacks = dict(
+            on_transcript=on_transcript,
+            on_error=on_error,
+            on_committed=on_committed,
+            on_speech_stopped=on_speech_stopped,
+            on_partial_transcript=on_partial_transcript,
+            on_transcription_failed=on_transcription_failed,
+        )
+        while self._idle:
+            client = self._idle.popleft()
+            if self._is_usable(client):
+                self.hits += 1
+                client.attach(**callbacks)
+                self._wakeup.set()
+                return client
+            await self._retire(client)
+
+        self.misses += 1
+        self._wakeup.set()
+        client = self.client_factory()
+        client.attach(**callbacks)
+        self.cold_connecting += 1
+        try:
+            await client.connect()
+        finally:
+            self.cold_connecting -= 1
+        return client
+
+    def _is_usable(self, client: OpenAIRealtimeClient) -> bool:
+        """A warm client is usable if still connected and not idle too long"""
+        if not client.is_connected or client.connected_at is None:
+            return False
+        return time.monotonic() - client.connected_at < self.max_idle
+
+    async def _retire(self, client: OpenAIRealtimeClient):
+        self.retired += 1
+        try:
+            await client.close()
+        except Exception as e:
+            logger.debug(f"Error closing retired Realtime client: {e}")
+
+    async def _maintain(self):
+        """Retire stale clients and top the pool back up to size"""
+        backoff = 1.0
+        while True:
+            for client in [c for c in self._idle if not self._is_usable(c)]:
+                self._idle.remove(client)
+                await self._retire(client)
+
+            missing = self.size - len(self._idle) - self._connecting
+            if missing > 0:
+                results = await asyncio.gather(
+                    *(self._warm_one() for _ in range(missing)), return_exceptions=True
+                )
+                if any(isinstance(r, Exception) for r in results):
+                    # Upstream unavailable: back off instead of hammering it
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+                    continue
+                backoff = 1.0
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _warm_one(self):
+        self._connecting += 1
+        try:
+            client = self.client_factory()
+            await client.connect()
+            self._idle.append(client)
+        except Exception as e:
+            self.connect_failures += 1
+            logger.warning(f"Failed to pre-warm Realtime connection: {e}")
+            raise
+        finally:
+            self._connecting -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and hit rate for /health"""
+        acquired = self.hits + self.misses
+        return {
+            "target_size": self.size,
+            "idle": len(self._idle),
+            "connecting": self._connecting,
+            "cold_connecting": self.cold_connecting,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / acquired, 3) if acquired else 0.0,
+            "retired": self.retired,
+            "connect_failures": self.connect_failures,
+        }
+
+    async def close(self):
+        """Stop replenishing and close all warm clients"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._idle:
+            await self._idle.popleft().close()
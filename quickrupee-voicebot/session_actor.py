@@ -0,0 +1,113 @@
+"""
+Session Actor
+Runs a call's turn work (FSM, control messages, TTS) off the Realtime receive loop
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Seconds; from near-instant queue hand-offs to turns that wait on playback
+EVENT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class SessionEvent(NamedTuple):
+    """A typed event posted by the Realtime receive loop"""
+
+    kind: str  # e.g. "transcript", "error"
+    payload: Any
+    posted_at: float
+
+
+class SessionActor:
+    """
+    Bounded mailbox plus one consumer task per call
+
+    Realtime callbacks only post events, so the client's receive loop goes
+    straight back to reading upstream (errors, commit acks, later
+    transcripts) while a turn waits on TTS or playback. Events are handled
+    one at a time, in order, by the handler registered for their kind. When
+    the mailbox is full the new event is dropped and counted rather than
+    blocking intake. Time spent waiting in the mailbox and in each handler is
+    observed into `stages` as "<kind>_wait" and "<kind>_handle".
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        handlers: Dict[str, Callable[[Any], Awaitable[None]]],
+        maxsize: int,
+        stages: Optional[Histogram] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.session_id = session_id
+        self.handlers = handlers
+        self.stages = stages
+        self.clock = clock
+        self._mailbox: "asyncio.Queue[SessionEvent]" = asyncio.Queue(maxsize=maxsize)
+        self._task: Optional[asyncio.Task] = None
+
+        self.posted = 0
+        self.dropped = 0
+        self.handled = 0
+        self.failed = 0
+        self.max_depth = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume())
+
+    def post(self, kind: str, payload: Any = None) -> bool:
+        """Queue an event without waiting; False if the mailbox is full and it was dropped"""
+        try:
+            self._mailbox.put_nowait(SessionEvent(kind, payload, self.clock()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("[%s] Session mailbox full, dropped %s event", self.session_id, kind)
+            return False
+        self.posted += 1
+        self.max_depth = max(self.max_depth, self._mailbox.qsize())
+        return True
+
+    async def _consume(self):
+        while True:
+            event = await self._mailbox.get()
+            started = self.clock()
+            handler = self.handlers.get(event.kind)
+            try:
+                if handler is None:
+                    logger.warning("[%s] No handler for %s event", self.session_id, event.kind)
+                else:
+                    await handler(event.payload)
+                    self.handled += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error("[%s] Error handling %s event: %s", self.session_id, event.kind, e, exc_info=True)
+            if self.stages is not None:
+                self.stages.observe(f"{event.kind}_wait", started - event.posted_at)
+                self.stages.observe(f"{event.kind}_handle", self.clock() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "posted": self.posted,
+            "dropped": self.dropped,
+            "handled": self.handled,
+            "failed": self.failed,
+            "max_depth": self.max_depth,
+        }
+
+    async def close(self):
+        """Stop the consumer, abandoning any turn in progress"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,415 @@
+"""
+Session Store
+Shared registry of in-flight calls so any worker can resume a call mid-flow
+
+Backends speak the small subset of the Redis command set the registry uses
+(get, set with ex, delete, zadd, zrem, zremrangebyscore, zcard), so a
+redis.asyncio client can be dropped in for multi-node deployments:
+    memory://              this process only (default)
+    sqlite:///path/to.db   shared by all workers on one host
+    redis://host:6379/0    shared across nodes (needs the redis package)
+"""
+import asyncio
+import logging
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from json_codec import dumps, loads
+from state_machine import EligibilityStateMachine
+
+logger = logging.getLogger(__name__)
+
+Value = Union[str, bytes]
+
+
+def _to_bytes(value: Value) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else bytes(value)
+
+
+class MemoryStore:
+    """In-process store with Redis-style key expiry; sessions are not shared"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._zsets: Dict[str, Dict[str, float]] = {}
+
+    async def get(self, name: str) -> Optional[bytes]:
+        item = self._values.get(name)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self._values[name]
+            return None
+        return value
+
+    async def set(self, name: str, value: Value, ex: Optional[float] = None) -> bool:
+        self._values[name] = (_to_bytes(value), time.time() + ex if ex else None)
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum(1 for name in names if self._values.pop(name, None) is not None)
+
+    async def zadd(self, name: str, mapping: Dict[str, float]) -> int:
+        zset = self._zsets.setdefault(name, {})
+        added = sum(1 for member in mapping if member not in zset)
+        zset.update(mapping)
+        return added
+
+    async def zrem(self, name: str, *members: str) -> int:
+        zset = self._zsets.get(name, {})
+        return sum(1 for member in members if zset.pop(member, None) is not None)
+
+    async def zremrangebyscore(self, name: str, min: float, max: float) -> int:
+        zset = self._zsets.get(name, {})
+        stale = [member for member, score in zset.items() if min <= score <= max]
+        for member in stale:
+            del zset[member]
+        return len(stale)
+
+    async def zcard(self, name: str) -> int:
+        return len(self._zsets.get(name, ()))
+
+    async def close(self):
+        pass
+
+
+class SQLiteStore:
+    """
+    Store in a local SQLite file (WAL mode), shared by every worker process
+    on the host
+
+    Queries run in a worker thread so a busy database never blocks the
+    event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS zmembers ("
+            " name TEXT NOT NULL, member TEXT NOT NULL, score REAL NOT NULL, PRIMARY KEY (name, member))"
+        )
+        self._lock = threading.Lock()
+
+    def _execute(self, sql: str, params: tuple = ()) -> Tuple[List[tuple], int]:
+        """Run one statement and read its results under the lock, so no cursor outlives it"""
+        with self._lock:
+            cursor = self._db.execute(sql, params)
+            return cursor.fetchall(), cursor.rowcount
+
+    async def _run(self, sql: str, params: tuple = ()) -> Tuple[List[tuple], int]:
+        """(rows, rowcount) of a statement, run in a worker thread"""
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def get(self, name: str) -> Optional[bytes]:
+        rows, _ = await self._run("SELECT value, expires_at FROM kv WHERE key = ?", (name,))
+        if not rows:
+            return None
+        value, expires_at = rows[0]
+        if expires_at is not None and expires_at <= time.time():
+            await self._run("DELETE FROM kv WHERE key = ? AND expires_at <= ?", (name, time.time()))
+            return None
+        return value
+
+    async def set(self, name: str, value: Value, ex: Optional[float] = None) -> bool:
+        await self._run(
+            "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+            (name, _to_bytes(value), time.time() + ex if ex else None),
+        )
+        return True
+
+    async def delete(self, *names: str) -> int:
+        _, deleted = await self._run(
+            f"DELETE FROM kv WHERE key IN ({', '.join('?' * len(names))})", names
+        )
+        return deleted
+
+    async def zadd(self, name: str, mapping: Dict[str, float]) -> int:
+        added = 0
+        for member, score in mapping.items():
+            _, inserted = await self._run(
+                "INSERT OR IGNORE INTO zmembers (name, member, score) VALUES (?, ?, ?)", (name, member, score)
+            )
+            if not inserted:
+                await self._run("UPDATE zmembers SET score = ? WHERE name = ? AND member = ?", (score, name, member))
+            added += inserted
+        return added
+
+    async def zrem(self, name: str, *members: str) -> int:
+        _, removed = await self._run(
+            f"DELETE FROM zmembers WHERE name = ? AND member IN ({', '.join('?' * len(members))})",
+            (name, *members),
+        )
+        return removed
+
+    async def zremrangebyscore(self, name: str, min: float, max: float) -> int:
+        _, removed = await self._run(
+            "DELETE FROM zmembers WHERE name = ? AND score BETWEEN ? AND ?", (name, min, max)
+        )
+        return removed
+
+    async def zcard(self, name: str) -> int:
+        rows, _ = await self._run("SELECT COUNT(*) FROM zmembers WHERE name = ?", (name,))
+        return rows[0][0]
+
+    async def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def create_store(url: str):
+    """
+    Build a store from a URL (memory://, sqlite:///path, redis://...)
+
+    Raises:
+        ValueError: for an unsupported scheme
+        ImportError: for redis:// without the redis package installed
+    """
+    if url.startswith("memory://"):
+        return MemoryStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis.asyncio as redis
+
+        return redis.from_url(url)
+    raise ValueError(f"Unsupported SESSION_STORE_URL: {url}")
+
+
+class SessionRegistry:
+    """
+    In-flight calls across all workers sharing a store
+
+    Each call's FSM snapshot is saved after every turn under session:<id>
+    with a TTL, so a dropped browser can reconnect to any worker and carry
+    on from the current question. A snapshot is only handed back with the
+    resume token issued to the call's browser. Open connections are tracked in the
+    sessions:live sorted set, scored by their last save, for cluster-wide
+    counts; entries a dead worker never released age out after the TTL.
+    Store errors are logged and never fail a call.
+    """
+
+    ACTIVE = "sessions:live"
+
+    def __init__(self, store, ttl: float):
+        self.store = store
+        self.ttl = ttl
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    async def save(self, session_id: str, machine: EligibilityStateMachine, token: str):
+        """Store the call's current snapshot and mark it active"""
+        now = time.time()
+        snapshot = dict(machine.snapshot(), token=token, worker=self.worker, updated_at=now)
+        try:
+            await self.store.set(self._key(session_id), dumps(snapshot), ex=self.ttl)
+            await self.store.zadd(self.ACTIVE, {session_id: now})
+        except Exception as e:
+            logger.warning("[%s] Could not save session snapshot: %s", session_id, e)
+
+    async def load(self, session_id: str, token: str) -> Optional[EligibilityStateMachine]:
+        """
+        Rebuild a call's state machine
+
+        Returns None if the call is unknown or expired, the token does not
+        match, or the snapshot is from a different flow.
+        """
+        try:
+            data = await self.store.get(self._key(session_id))
+        except Exception as e:
+            logger.warning("[%s] Could not load session snapshot: %s", session_id, e)
+            return None
+        if data is None:
+            return None
+        try:
+            snapshot = loads(data)
+            if not secrets.compare_digest(str(snapshot.get("token", "")), token):
+                logger.warning("[%s] Resume token mismatch", session_id)
+                return None
+            return EligibilityStateMachine.from_snapshot(snapshot)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("[%s] Ignoring unreadable session snapshot: %s", session_id, e)
+            return None
+
+    async def release(self, session_id: str):
+        """The connection closed mid-call: keep the snapshot (until TTL) for a resume"""
+        try:
+            await self.store.zrem(self.ACTIVE, session_id)
+        except Exception as e:
+            logger.warning("[%s] Could not release session: %s", session_id, e)
+
+    async def discard(self, session_id: str):
+        """The call finished: drop its snapshot"""
+        try:
+            await self.store.delete(self._key(session_id))
+            await self.store.zrem(self.ACTIVE, session_id)
+        except Exception as e:
+            logger.warning("[%s] Could not discard session: %s", session_id, e)
+
+    async def active_count(self) -> Optional[int]:
+        """Open calls across every worker sharing the store (None if unavailable)"""
+        try:
+            # Calls not saved within the TTL were left behind by a worker that died
+            await self.store.zremrangebyscore(self.ACTIVE, float("-inf"), time.time() - self.ttl)
+            return await self.store.zcard(self.ACTIVE)
+        except Exception as e:
+            logger.warning("Could not count active sessions: %s", e)
+            return None
+
+    async def close(self):
+        close = getattr(self.store, "aclose", None) or self.store.close
+        await close()
+
+
+@dataclass
+class ParkedSession:
+    """A dropped call held by this worker, waiting for its browser to reconnect"""
+
+    token: str
+    machine: EligibilityStateMachine
+    client: Optional[Any]  # Connected OpenAIRealtimeClient, reattached on resume
+    parked_at: float
+
+
+class ParkingLot:
+    """
+    Dropped calls kept warm on this worker for a short grace period
+
+    A flaky mobile network should not cost the caller their progress or the
+    Realtime handshake: the state machine and the connected Realtime client
+    are parked under the session id and handed back to a reconnect that
+    presents the call's resume token. Memory is bounded by `max_sessions`
+    (the oldest call is evicted first) and by `grace`; evicted Realtime
+    clients are closed. The session store still allows a slower resume,
+    without the warm client, until SESSION_TTL.
+    """
+
+    def __init__(
+        self,
+        grace: float,
+        max_sessions: int,
+        sweep_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            grace: Seconds a dropped call stays parked (0 disables parking)
+            max_sessions: Parked calls held at once
+            sweep_interval: Seconds between expiry sweeps
+            clock: Monotonic time source
+        """
+        self.grace = grace
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._parked: "OrderedDict[str, ParkedSession]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+        self.parked_total = 0
+        self.resumed = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._parked)
+
+    async def start(self):
+        """Start the background expiry sweep"""
+        if self.grace > 0 and self._task is None:
+            self._task = asyncio.create_task(self._sweep())
+
+    async def park(self, session_id: str, token: str, machine: EligibilityStateMachine, client=None) -> bool:
+        """
+        Hold a dropped call for the grace period
+
+        Returns:
+            False if parking is disabled (the caller still owns `client`)
+        """
+        if self.grace <= 0 or self.max_sessions <= 0:
+            return False
+        if client is not None:
+            client.attach()  # Nobody is listening while parked
+        previous = self._parked.pop(session_id, None)
+        if previous is not None:
+            await self._close(previous)
+        while len(self._parked) >= self.max_sessions:
+            _, oldest = self._parked.popitem(last=False)
+            self.evicted += 1
+            await self._close(oldest)
+        self._parked[session_id] = ParkedSession(token, machine, client, self.clock())
+        self.parked_total += 1
+        return True
+
+    async def claim(self, session_id: str, token: str) -> Optional[ParkedSession]:
+        """Hand a parked call back to its reconnecting browser (None if unknown, expired or wrong token)"""
+        entry = self._parked.get(session_id)
+        if entry is None or not secrets.compare_digest(entry.token, token):
+            return None
+        del self._parked[session_id]
+        if self.clock() - entry.parked_at > self.grace:
+            self.expired += 1
+            await self._close(entry)
+            return None
+        self.resumed += 1
+        return entry
+
+    async def evict_expired(self) -> int:
+        """Drop calls parked longer than the grace period"""
+        deadline = self.clock() - self.grace
+        expired = []
+        # Parking order is expiry order
+        while self._parked and next(iter(self._parked.values())).parked_at <= deadline:
+            expired.append(self._parked.popitem(last=False)[1])
+        for entry in expired:
+            await self._close(entry)
+        self.expired += len(expired)
+        return len(expired)
+
+    async def _close(self, entry: ParkedSession):
+        if entry.client is None:
+            return
+        try:
+            await entry.client.close()
+        except Exception as e:
+            logger.debug("Error closing parked Realtime client: %s", e)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.evict_expired()
+            except Exception as e:
+                logger.error("Parked session sweep failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "parked": len(self._parked),
+            "with_realtime": sum(1 for e in self._parked.values() if e.client is not None),
+            "parked_total": self.parked_total,
+            "resumed": self.resumed,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        while self._parked:
+            await self._close(self._parked.popitem(last=False)[1])
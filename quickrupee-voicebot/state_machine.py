@@ -3,14 +3,15 @@ State Machine for QuickRupee Eligibility Flow
 Implements a simple finite state machine for fast, deterministic eligibility checks
 """
 from enum import Enum
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Iterable, List, Sequence
 from dataclasses import dataclass
+import hashlib
 import re
 from config import settings
 
 
 class State(Enum):
-    """States in the eligibility flow"""
+    """Built-in states in the eligibility flow (question states come from ELIGIBILITY_QUESTIONS)"""
     INIT = "init"
     GREETING = "greeting"
     ASK_EMPLOYMENT = "ask_employment"
@@ -21,147 +22,294 @@ class State(Enum):
     END = "end"
 
 
-@dataclass
-class ConversationState:
-    """Stores conversation state and user responses"""
-    current_state: State = State.INIT
-    is_salaried: Optional[bool] = None
-    salary_above_threshold: Optional[bool] = None
-    in_metro_city: Optional[bool] = None
-    rejection_reason: Optional[str] = None
+@dataclass(frozen=True)
+class Question:
+    """One yes/no eligibility question; a "no" ends the call with rejection_reason"""
+    state: str
+    prompt: str
+    rejection_reason: str
 
 
-class EligibilityStateMachine:
+@dataclass(frozen=True)
+class TurnResult:
     """
-    Manages the eligibility screening conversation flow
-    Uses rule-based logic for fast, explainable decisions
+    Bot reply for one turn
+
+    Instances are built once per flow and shared by every session, so a turn
+    allocates nothing.
+    """
+    message: str
+    state: str
+    should_end: bool
+    is_eligible: Optional[bool]
+    rejection_reason: Optional[str]
+    is_valid: bool = True
+
+
+class YesNoClassifier:
+    """
+    Single-pass yes/no classifier
+
+    All vocabulary is compiled into one alternation regex (longest phrase
+    first, so "bilkul nahi" wins over "bilkul") and each match is classified
+    with a dict lookup on its casefolded text. Adding words does not add
+    passes over the text.
+    """
+
+    def __init__(self, yes_words: Iterable[str], no_words: Iterable[str]):
+        self._is_yes: Dict[str, bool] = {}
+        for word in no_words:
+            self._is_yes[word.casefold().strip()] = False
+        for word in yes_words:
+            self._is_yes[word.casefold().strip()] = True
+        self._is_yes.pop("", None)
+
+        phrases = sorted(self._is_yes, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"\b(?:" + "|".join(re.escape(p) for p in phrases) + r")\b",
+            re.IGNORECASE,
+        )
+
+    def classify(self, text: str) -> tuple[bool, bool]:
+        """
+        Returns:
+            tuple[bool, bool]: (is_valid, is_yes), same contract as
+            EligibilityStateMachine._parse_yes_no
+        """
+        has_yes = False
+        has_no = False
+
+        # One pass over the text; stop as soon as both kinds have been seen
+        for match in self._pattern.finditer(text):
+            # IGNORECASE can match text that casefolds to no phrase: count it as neither
+            is_yes = self._is_yes.get(match.group(0).casefold())
+            if is_yes is None:
+                continue
+            if is_yes:
+                has_yes = True
+            else:
+                has_no = True
+            if has_yes and has_no:
+                break
+
+        # Valid response if we found yes OR no (but not both)
+        if has_yes and not has_no:
+            return (True, True)  # Valid yes
+        elif has_no and not has_yes:
+            return (True, False)  # Valid no
+        else:
+            return (False, False)  # Invalid or ambiguous
+
+
+class EligibilityFlow:
     """
+    Eligibility conversation compiled into a transition table
+
+    Every state is a small integer step. Per step the table holds the next
+    step for a yes and for a no, and the TurnResult emitted on entering it.
+    Step layout: INIT, GREETING, one step per question, ELIGIBLE, one
+    NOT_ELIGIBLE step per question (so the step encodes the rejection
+    reason), END.
+    """
+
+    CLARIFICATION = "I'm sorry, I didn't understand. Please say Yes or No. "
+    NUMBER_WORDS = ("no", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten")
 
-    # Conversation scripts
-    SCRIPTS = {
-        State.GREETING: (
+    INIT = 0
+    GREETING = 1
+
+    def __init__(self, greeting: str, questions: Sequence[Question], eligible: str, not_eligible: str):
+        count = len(questions)
+        first_question = 2
+        self.ELIGIBLE = first_question + count
+        first_rejection = self.ELIGIBLE + 1
+        self.END = first_rejection + count
+
+        self.entry: List[TurnResult] = []
+        self.reask: List[Optional[TurnResult]] = []
+        self.on_yes: List[int] = []
+        self.on_no: List[int] = []
+        self.expects_answer: List[bool] = []
+        self.is_terminal: List[bool] = []
+
+        def add(result: TurnResult, on_yes: int, on_no: int, reask: Optional[TurnResult] = None, terminal=False):
+            self.entry.append(result)
+            self.reask.append(reask)
+            self.on_yes.append(on_yes)
+            self.on_no.append(on_no)
+            self.expects_answer.append(reask is not None)
+            self.is_terminal.append(terminal)
+
+        # Before start() any input ends the conversation, as does input after an outcome
+        add(TurnResult("", State.INIT.value, False, None, None), self.END, self.END)
+        add(TurnResult(greeting, State.GREETING.value, False, None, None), first_question, first_question)
+        for i, question in enumerate(questions):
+            add(
+                TurnResult(question.prompt, question.state, False, None, None),
+                on_yes=first_question + i + 1,  # the last question leads to ELIGIBLE
+                on_no=first_rejection + i,
+                reask=TurnResult(self.CLARIFICATION + question.prompt, question.state, False, None, None, False),
+            )
+        add(TurnResult(eligible, State.ELIGIBLE.value, True, True, None), self.END, self.END, terminal=True)
+        for question in questions:
+            add(
+                TurnResult(not_eligible, State.NOT_ELIGIBLE.value, True, False, question.rejection_reason),
+                self.END, self.END, terminal=True,
+            )
+        add(TurnResult("", State.END.value, False, None, None), self.END, self.END, terminal=True)
+
+        # First message per state name, for TTS preloading and lookups by name
+        self.scripts: Dict[str, str] = {}
+        for result in self.entry:
+            if result.message:
+                self.scripts.setdefault(result.state, result.message)
+
+        # Identifies this exact table, so snapshots from a different flow are not resumed
+        table = "\n".join(f"{r.state}|{r.message}|{y}|{n}" for r, y, n in zip(self.entry, self.on_yes, self.on_no))
+        self.fingerprint = hashlib.sha256(table.encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def from_settings(cls) -> "EligibilityFlow":
+        """Build the flow from ELIGIBILITY_QUESTIONS and the eligibility criteria"""
+        cities = [city.title() for city in settings.ELIGIBLE_CITIES]
+        spoken_cities = ", or ".join([", ".join(cities[:-1]), cities[-1]]) if len(cities) > 1 else "".join(cities)
+        questions = [
+            Question(
+                state=q["state"],
+                prompt=q["prompt"].format(min_salary=settings.MIN_SALARY, cities=spoken_cities),
+                rejection_reason=q["rejection_reason"],
+            )
+            for q in settings.ELIGIBILITY_QUESTIONS
+        ]
+        count = len(questions)
+        count_words = cls.NUMBER_WORDS[count] if count < len(cls.NUMBER_WORDS) else str(count)
+        greeting = (
             "Hello! Welcome to QuickRupee Personal Loans. "
-            "I'll ask you three quick questions to check your eligibility. "
+            f"I'll ask you {count_words} quick question{'s' if count != 1 else ''} to check your eligibility. "
             "Please answer with Yes or No. Let's begin."
-        ),
-        State.ASK_EMPLOYMENT: (
-            "Are you currently a salaried employee?"
-        ),
-        State.ASK_SALARY: (
-            f"Is your monthly in-hand salary above {settings.MIN_SALARY} rupees?"
-        ),
-        State.ASK_CITY: (
-            "Do you currently live in a metro city such as Delhi, Mumbai, or Bangalore?"
-        ),
-        State.ELIGIBLE: (
+        )
+        eligible = (
             "Great news! You are eligible for a QuickRupee personal loan. "
             "One of our agents will call you back within the next ten minutes. "
             "Thank you for calling QuickRupee!"
-        ),
-        State.NOT_ELIGIBLE: (
+        )
+        not_eligible = (
             "Thank you for your interest in QuickRupee. "
             "Unfortunately, you do not meet our current eligibility criteria. "
             "Please feel free to check back with us in the future. "
             "Goodbye."
-        ),
-    }
+        )
+        return cls(greeting, questions, eligible, not_eligible)
+
+    def messages(self) -> List[str]:
+        """Every distinct message the flow can speak, including re-asked questions"""
+        ordered = [r.message for r in self.entry] + [r.message for r in self.reask if r is not None]
+        return [m for m in dict.fromkeys(ordered) if m]
+
+
+class EligibilityStateMachine:
+    """
+    Manages the eligibility screening conversation flow
+    Uses rule-based logic for fast, explainable decisions
+
+    The flow table is shared by the class; a session only holds its current
+    step, a small integer.
+    """
 
-    def __init__(self):
-        self.state = ConversationState()
+    __slots__ = ("step",)
+
+    # Compiled once per class from config, shared by every session
+    FLOW = EligibilityFlow.from_settings()
+
+    # Conversation scripts by state name
+    SCRIPTS = FLOW.scripts
+
+    # Yes/no vocabulary (extend with YES_WORDS_EXTRA / NO_WORDS_EXTRA in config)
+    YES_WORDS = ("yes", "yeah", "yep", "yup", "sure", "affirmative", "correct", "right", "ha", "haan")
+    NO_WORDS = ("no", "nope", "nah", "negative", "not", "nahi", "nahin")
+
+    # Compiled once per class, shared by every session
+    _YES_NO = YesNoClassifier(
+        YES_WORDS + tuple(settings.YES_WORDS_EXTRA),
+        NO_WORDS + tuple(settings.NO_WORDS_EXTRA),
+    )
+
+    def __init__(self, step: int = EligibilityFlow.INIT):
+        self.step = step
 
     def start(self) -> str:
         """Initialize conversation and return greeting"""
-        self.state.current_state = State.GREETING
-        return self.SCRIPTS[State.GREETING]
+        self.step = EligibilityFlow.GREETING
+        return self.FLOW.entry[self.step].message
 
-    def process_response(self, user_input: str) -> Dict[str, Any]:
+    def process_response(self, user_input: str) -> TurnResult:
         """
         Process user response and advance state machine
 
         Returns:
-            dict: {
-                "message": str,           # Bot's next message
-                "state": str,             # Current state
-                "should_end": bool,       # Whether to end call
-                "is_eligible": bool|None  # Eligibility result
-                "is_valid": bool          # Whether response was valid
-            }
+            TurnResult: message (bot's next message), state, should_end,
+            is_eligible, rejection_reason and is_valid (False when the
+            question is re-asked)
         """
-        user_input = user_input.lower().strip()
-        is_valid, is_yes = self._parse_yes_no(user_input)
+        flow = self.FLOW
+        step = self.step
+        if flow.expects_answer[step]:
+            is_valid, is_yes = self._parse_yes_no(user_input)
+            if not is_valid:
+                # Don't change state - repeat the question
+                return flow.reask[step]
+            step = flow.on_yes[step] if is_yes else flow.on_no[step]
+        else:
+            step = flow.on_yes[step]
+        self.step = step
+        return flow.entry[step]
 
-        # State transitions
-        if self.state.current_state == State.GREETING:
-            return self._transition_to(State.ASK_EMPLOYMENT)
+    def early_answer(self, text: str, max_words: int) -> Optional[bool]:
+        """
+        Yes/no verdict on a partial transcript that is safe to act on before
+        the final transcript arrives
 
-        elif self.state.current_state == State.ASK_EMPLOYMENT:
-            if not is_valid:
-                return self._invalid_response(State.ASK_EMPLOYMENT)
-            self.state.is_salaried = is_yes
-            if not is_yes:
-                self.state.rejection_reason = "not_salaried"
-                return self._transition_to(State.NOT_ELIGIBLE)
-            return self._transition_to(State.ASK_SALARY)
-
-        elif self.state.current_state == State.ASK_SALARY:
-            if not is_valid:
-                return self._invalid_response(State.ASK_SALARY)
-            self.state.salary_above_threshold = is_yes
-            if not is_yes:
-                self.state.rejection_reason = "salary_below_threshold"
-                return self._transition_to(State.NOT_ELIGIBLE)
-            return self._transition_to(State.ASK_CITY)
-
-        elif self.state.current_state == State.ASK_CITY:
-            if not is_valid:
-                return self._invalid_response(State.ASK_CITY)
-            self.state.in_metro_city = is_yes
-            if not is_yes:
-                self.state.rejection_reason = "not_in_metro"
-                return self._transition_to(State.NOT_ELIGIBLE)
-            return self._transition_to(State.ELIGIBLE)
+        Confident means the current step expects an answer, the running text
+        has at most max_words words and is an unambiguous yes or no, and the
+        answer leads to another question. Outcomes that end the call wait for
+        the final transcript, since they cannot be walked back.
 
-        else:
-            # Shouldn't reach here, but handle gracefully
-            return self._transition_to(State.END)
-
-    def _transition_to(self, new_state: State) -> Dict[str, Any]:
-        """Transition to new state and return response"""
-        self.state.current_state = new_state
-
-        # Determine if call should end and eligibility status
-        should_end = new_state in [State.ELIGIBLE, State.NOT_ELIGIBLE]
-        is_eligible = None
-        if new_state == State.ELIGIBLE:
-            is_eligible = True
-        elif new_state == State.NOT_ELIGIBLE:
-            is_eligible = False
-
-        message = self.SCRIPTS.get(new_state, "")
-
-        return {
-            "message": message,
-            "state": new_state.value,
-            "should_end": should_end,
-            "is_eligible": is_eligible,
-            "rejection_reason": self.state.rejection_reason,
-            "is_valid": True,
-        }
-
-    def _invalid_response(self, current_state: State) -> Dict[str, Any]:
-        """Handle invalid response - ask user to say yes or no and repeat question"""
-        # Don't change state - stay in same question
-        clarification = "I'm sorry, I didn't understand. Please say Yes or No. "
-        question = self.SCRIPTS.get(current_state, "")
-
-        return {
-            "message": clarification + question,
-            "state": current_state.value,
-            "should_end": False,
-            "is_eligible": None,
-            "rejection_reason": None,
-            "is_valid": False,
-        }
+        Returns:
+            True/False for yes/no, or None when not confident
+        """
+        flow = self.FLOW
+        step = self.step
+        if not flow.expects_answer[step] or len(text.split()) > max_words:
+            return None
+        is_valid, is_yes = self._parse_yes_no(text)
+        if not is_valid:
+            return None
+        next_step = flow.on_yes[step] if is_yes else flow.on_no[step]
+        return None if flow.is_terminal[next_step] else is_yes
+
+    def current_prompt(self) -> str:
+        """The message for the current step, i.e. the question awaiting an answer"""
+        return self.FLOW.entry[self.step].message
+
+    def snapshot(self) -> Dict[str, object]:
+        """Serializable session state, restorable with from_snapshot()"""
+        return {"flow": self.FLOW.fingerprint, "step": self.step}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, object]) -> Optional["EligibilityStateMachine"]:
+        """
+        Restore a session from snapshot()
+
+        Returns:
+            The restored machine, or None if the snapshot was taken with a
+            different flow (questions or criteria changed since)
+        """
+        step = snapshot["step"]
+        if snapshot.get("flow") != cls.FLOW.fingerprint or not isinstance(step, int):
+            return None
+        if not 0 <= step < len(cls.FLOW.entry):
+            return None
+        return cls(step)
 
     def _parse_yes_no(self, text: str) -> tuple[bool, bool]:
         """
@@ -173,46 +321,17 @@ class EligibilityStateMachine:
             - is_valid: True if response is clearly yes or no, False otherwise
             - is_yes: True for yes, False for no (only meaningful if is_valid=True)
         """
-        # Affirmative patterns
-        yes_patterns = [
-            r'\byes\b', r'\byeah\b', r'\byep\b', r'\byup\b',
-            r'\bsure\b', r'\baffirmative\b', r'\bcorrect\b',
-            r'\bright\b', r'\bha\b', r'\bhaan\b'
-        ]
-
-        # Negative patterns
-        no_patterns = [
-            r'\bno\b', r'\bnope\b', r'\bnah\b', r'\bnegative\b',
-            r'\bnot\b', r'\bnahi\b', r'\bnahin\b'
-        ]
-
-        has_yes = False
-        has_no = False
+        return self._YES_NO.classify(text)
 
-        # Check for yes patterns
-        for pattern in yes_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                has_yes = True
-                break
-
-        # Check for no patterns
-        for pattern in no_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                has_no = True
-                break
-
-        # Valid response if we found yes OR no (but not both)
-        if has_yes and not has_no:
-            return (True, True)  # Valid yes
-        elif has_no and not has_yes:
-            return (True, False)  # Valid no
-        else:
-            return (False, False)  # Invalid or ambiguous
+    @property
+    def rejection_reason(self) -> Optional[str]:
+        """Why the caller was rejected, once the flow has reached NOT_ELIGIBLE"""
+        return self.FLOW.entry[self.step].rejection_reason
 
     def get_current_state(self) -> str:
         """Get current state name"""
-        return self.state.current_state.value
+        return self.FLOW.entry[self.step].state
 
     def is_complete(self) -> bool:
         """Check if conversation is complete"""
-        return self.state.current_state in [State.ELIGIBLE, State.NOT_ELIGIBLE, State.END]
+        return self.FLOW.is_terminal[self.step]
@@ -0,0 +1,266 @@
+"""
+Telephony Media Streams
+Phone audio (8 kHz G.711 μ-law) in and out, transcoded with NumPy in front of the Realtime API
+
+Carrier wire format (Twilio-style media stream, JSON text frames):
+    carrier -> server:
+        {"event": "connected"}
+        {"event": "start", "streamSid": ..., "start": {"callSid": ..., "mediaFormat": {...}}}
+        {"event": "media", "media": {"payload": <base64 μ-law>}}
+        {"event": "mark", "mark": {"name": ...}}   a mark we sent has finished playing
+        {"event": "stop"}
+    server -> carrier:
+        "media" (bot audio), "mark" (after each clip) and "clear" (drop queued audio)
+
+The session sees the same interface as BrowserChannel: 24 kHz PCM16 audio
+and control dicts out of receive(), control dicts into send_control().
+"""
+import base64
+import binascii
+import logging
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+
+from json_codec import dumps, loads
+from protocol import ProtocolError
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_TELEPHONY = "telephony"
+
+PHONE_RATE = 8000
+REALTIME_RATE = 24000  # Realtime API input and TTS "pcm" output
+RATIO = REALTIME_RATE // PHONE_RATE
+
+ULAW_BIAS = 0x84
+ULAW_CLIP = 32635
+
+
+def _ulaw_encode(samples: np.ndarray) -> np.ndarray:
+    """G.711 μ-law codes for int32 PCM16 values"""
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), ULAW_CLIP) + ULAW_BIAS
+    exponent = np.frexp(magnitude)[1] - 8  # Highest set bit above bit 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return ~(sign | (exponent << 4) | mantissa) & 0xFF
+
+
+def _ulaw_decode(codes: np.ndarray) -> np.ndarray:
+    """PCM16 values for G.711 μ-law codes"""
+    codes = ~codes & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = (((codes & 0x0F) << 3) + ULAW_BIAS << exponent) - ULAW_BIAS
+    return np.where(codes & 0x80, -magnitude, magnitude)
+
+
+# Lookup tables: decoding is one gather per frame, encoding one gather indexed by the raw 16-bit sample
+ULAW_DECODE = _ulaw_decode(np.arange(256, dtype=np.int32)).astype(np.int16)
+ULAW_ENCODE = _ulaw_encode(np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)).astype(np.uint8)
+
+
+def ulaw_to_pcm16(data: bytes) -> np.ndarray:
+    """Decode μ-law bytes to int16 samples"""
+    return ULAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def pcm16_to_ulaw(samples: np.ndarray) -> bytes:
+    """Encode int16 samples to μ-law bytes"""
+    return ULAW_ENCODE[samples.astype(np.int16, copy=False).view(np.uint16)].tobytes()
+
+
+def lowpass_taps(num_taps: int = 47, cutoff_hz: float = 3600.0, rate: int = REALTIME_RATE) -> np.ndarray:
+    """Hamming-windowed sinc low-pass filter, unity gain at DC"""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = np.sinc(2 * cutoff_hz / rate * n) * np.hamming(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class Upsampler:
+    """
+    8 kHz -> 24 kHz by linear interpolation, continuous across frames
+
+    Good enough for speech-to-text; each output sample lies between two
+    phone samples, and the last sample of a frame carries into the next.
+    """
+
+    STEPS = (np.arange(1, RATIO + 1, dtype=np.float32) / RATIO)[None, :]
+
+    def __init__(self):
+        self._last = np.float32(0.0)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if not len(samples):
+            return samples.astype(np.int16)
+        current = samples.astype(np.float32)
+        previous = np.empty_like(current)
+        previous[0] = self._last
+        previous[1:] = current[:-1]
+        self._last = current[-1]
+        out = previous[:, None] + (current - previous)[:, None] * self.STEPS
+        return np.rint(out.reshape(-1)).astype(np.int16)
+
+
+class Downsampler:
+    """
+    24 kHz -> 8 kHz: FIR low-pass below the phone band's Nyquist, then keep every third sample
+
+    Filter history and decimation phase carry across chunks, so a clip
+    streamed in arbitrary pieces comes out the same as if transcoded whole.
+    """
+
+    def __init__(self, taps: Optional[np.ndarray] = None):
+        self.taps = lowpass_taps() if taps is None else taps
+        self._history = np.zeros(len(self.taps) - 1, dtype=np.float32)
+        self._phase = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        signal = np.concatenate([self._history, samples.astype(np.float32)])
+        filtered = np.convolve(signal, self.taps, mode="valid")
+        out = filtered[self._phase::RATIO]
+        self._phase = (self._phase - len(filtered)) % RATIO
+        self._history = signal[len(signal) - len(self._history):]
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+
+class PhoneDecoder:
+    """Carrier μ-law frames -> 24 kHz PCM16 bytes for the Realtime API"""
+
+    def __init__(self):
+        self.upsampler = Upsampler()
+
+    def decode(self, ulaw: bytes) -> bytes:
+        return self.upsampler.process(ulaw_to_pcm16(ulaw)).tobytes()
+
+
+class PhoneEncoder:
+    """24 kHz PCM16 bytes (TTS "pcm" output, any chunking) -> 8 kHz μ-law bytes"""
+
+    def __init__(self):
+        self.downsampler = Downsampler()
+        self._odd = b""
+
+    def encode(self, pcm: bytes) -> bytes:
+        data = self._odd + bytes(pcm)
+        cut = len(data) - len(data) % 2
+        self._odd = data[cut:]
+        return pcm16_to_ulaw(self.downsampler.process(np.frombuffer(data[:cut], dtype="<i2")))
+
+
+def pcm24k_to_ulaw(pcm: bytes) -> bytes:
+    """Transcode a complete 24 kHz PCM16 clip to 8 kHz μ-law"""
+    return PhoneEncoder().encode(pcm)
+
+
+def encode_ulaw_payload(audio: bytes) -> str:
+    """Base64 text of a μ-law clip, as carried in media events (built once per cached clip)"""
+    return base64.b64encode(audio).decode("ascii")
+
+
+class TelephonyChannel:
+    """
+    Wraps a carrier media-stream WebSocket behind the BrowserChannel interface
+
+    Phone calls have no screen: transcripts, state updates and mic muting
+    are dropped, "cancel_audio" becomes a "clear" event and
+    "end_conversation" hangs up. Each bot clip is followed by a numbered
+    mark; the carrier echoes marks as playback reaches them, which the
+    session sees as "playback_complete".
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.stream_sid = ""
+        self.call_sid = ""
+        self.decoder = PhoneDecoder()
+        self.clips_sent = 0
+        self.frames_in = 0
+
+    @property
+    def protocol(self) -> str:
+        return PROTOCOL_TELEPHONY
+
+    async def _receive_event(self) -> Dict[str, Any]:
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        try:
+            return loads(message.get("text") or "{}")
+        except ValueError as e:
+            raise ProtocolError(f"Malformed media-stream event: {e}") from e
+
+    async def start(self) -> str:
+        """
+        Read the carrier handshake up to the "start" event
+
+        Returns:
+            The call id, used as the session id
+
+        Raises:
+            WebSocketDisconnect: the carrier hung up first
+            ProtocolError: the stream is not 8 kHz μ-law
+        """
+        while True:
+            event = await self._receive_event()
+            if event.get("event") == "stop":
+                raise WebSocketDisconnect(1000)
+            if event.get("event") != "start":
+                continue
+            start = event.get("start", {})
+            media_format = start.get("mediaFormat", {})
+            encoding = media_format.get("encoding", "audio/x-mulaw")
+            rate = int(media_format.get("sampleRate", PHONE_RATE))
+            if encoding != "audio/x-mulaw" or rate != PHONE_RATE:
+                raise ProtocolError(f"Unsupported media format: {encoding} at {rate} Hz")
+            self.stream_sid = event.get("streamSid") or start.get("streamSid", "")
+            self.call_sid = start.get("callSid") or self.stream_sid
+            return self.call_sid
+
+    async def receive(self) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+        """
+        Receive the next carrier event
+
+        Returns:
+            (control, audio) like BrowserChannel.receive: caller audio as
+            24 kHz PCM16, echoed marks as "playback_complete", "stop" as "end"
+        """
+        event = await self._receive_event()
+        kind = event.get("event")
+        if kind == "media":
+            try:
+                ulaw = base64.b64decode(event["media"]["payload"])
+            except (KeyError, TypeError, binascii.Error) as e:
+                raise ProtocolError(f"Malformed media event: {e}") from e
+            self.frames_in += 1
+            return None, self.decoder.decode(ulaw)
+        if kind == "mark":
+            name = event.get("mark", {}).get("name", "")
+            if name.isdigit():
+                return {"type": "playback_complete", "played": int(name)}, None
+        if kind == "stop":
+            return {"type": "end"}, None
+        return {"type": f"telephony_{kind}"}, None
+
+    async def send_control(self, message: Dict[str, Any]):
+        """Act on the control messages that mean something on a phone line"""
+        kind = message.get("type")
+        if kind == "cancel_audio":
+            await self._send({"event": "clear", "streamSid": self.stream_sid})
+        elif kind == "end_conversation":
+            await self.websocket.close()
+
+    async def send_ulaw(self, payload: str):
+        """Send base64 μ-law audio (a whole cached clip or one streamed chunk)"""
+        # Built by concatenation: the payload is already safe JSON text
+        await self.websocket.send_text(
+            '{"event":"media","streamSid":' + dumps(self.stream_sid)
+            + ',"media":{"payload":"' + payload + '"}}'
+        )
+
+    async def end_clip(self):
+        """Mark the end of a bot clip; the carrier echoes it once played"""
+        self.clips_sent += 1
+        await self._send({"event": "mark", "streamSid": self.stream_sid, "mark": {"name": str(self.clips_sent)}})
+
+    async def _send(self, event: Dict[str, Any]):
+        await self.websocket.send_text(dumps(event))
@@ -0,0 +1,77 @@
+"""
+Tests for admission control
+"""
+import asyncio
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, LoopLagMonitor
+
+
+def controller(**overrides) -> AdmissionController:
+    options = dict(max_sessions=1, queue_size=2, queue_timeout=1.0, max_lag=0.1, retry_after=7, poll_interval=0.01)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_callers_queue_in_order_and_overflow_is_rejected():
+    async def scenario():
+        gate = controller()
+        await gate.acquire()
+        positions = {"b": [], "c": []}
+
+        async def caller(name):
+            async def on_queued(position):
+                positions[name].append(position)
+            await gate.acquire(on_queued=on_queued)
+            return name
+
+        b = asyncio.create_task(caller("b"))
+        await asyncio.sleep(0.02)
+        c = asyncio.create_task(caller("c"))
+        await asyncio.sleep(0.02)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await gate.acquire()  # Queue of 2 is full
+
+        gate.release()
+        first = await b
+        gate.release()
+        second = await c
+        return gate, positions, [first, second], rejected.value
+
+    gate, positions, order, rejected = asyncio.run(scenario())
+    assert order == ["b", "c"]
+    assert positions == {"b": [1], "c": [2, 1]}
+    assert rejected.retry_after == 7
+    assert gate.stats()["active"] == 1 and gate.stats()["rejected"] == 1
+
+
+def test_queued_caller_times_out_while_upstream_has_no_capacity():
+    async def scenario():
+        gate = controller(max_sessions=10, queue_timeout=0.05, has_capacity=lambda: False)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await gate.acquire()
+        return gate, rejected.value
+
+    gate, rejected = asyncio.run(scenario())
+    assert rejected.reason == "upstream capacity exhausted"
+    assert gate.timed_out == 1 and gate.active == 0
+
+
+def test_event_loop_lag_holds_new_calls_until_it_recovers():
+    async def scenario():
+        monitor = LoopLagMonitor(interval=0.01)
+        gate = controller(max_sessions=10, max_lag=0.05, lag_monitor=monitor)
+        await monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.3)  # Block the loop
+        await asyncio.sleep(0.015)
+        blocked = gate.stats()["blocked_by"]
+        await gate.acquire()  # Admitted once the smoothed lag decays
+        await monitor.close()
+        return blocked, monitor.stats()
+
+    blocked, lag = asyncio.run(scenario())
+    assert blocked == "event loop lagging"
+    assert lag["max_lag_ms"] >= 250
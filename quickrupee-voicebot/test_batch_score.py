@@ -0,0 +1,44 @@
+"""
+Tests for batch re-scoring of archived calls
+"""
+import json
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from batch_score import main, score_record, score_stream
+
+CALLS = [
+    {"session_id": "eligible", "transcripts": ["yes", "haan", "sure"]},
+    {"session_id": "low-salary", "transcripts": ["yes", "maybe", "no", "yes"]},
+    {"session_id": "hung-up", "transcripts": ["yes"]},
+]
+
+
+def test_score_record_reports_outcome_and_reason():
+    outcome = score_record(CALLS[1])
+    assert outcome["rejection_reason"] == "salary_below_threshold"
+    assert outcome["is_eligible"] is False and outcome["complete"] is True
+    assert outcome["turns"] == 3 and outcome["invalid_answers"] == 1  # stops at the rejection
+
+    outcome = score_record(CALLS[2])
+    assert outcome["is_eligible"] is None and outcome["state"] == "ask_salary"
+
+
+def test_process_pool_matches_sequential_order_and_results():
+    lines = [json.dumps(call) for call in CALLS * 50] + ["not json"]
+    sequential = list(score_stream(lines, workers=1, chunk_size=7))
+    pooled = list(score_stream(lines, workers=2, chunk_size=7))
+    assert pooled == sequential
+    assert [label for label, _ in sequential[:3]] == ["eligible", "salary_below_threshold", "incomplete"]
+    assert sequential[-1][0] == "error"
+
+
+def test_cli_streams_jsonl_results(tmp_path):
+    source = tmp_path / "calls.jsonl"
+    source.write_text("\n".join(json.dumps(call) for call in CALLS) + "\n")
+    output = tmp_path / "results.jsonl"
+    assert main([str(source), "-o", str(output), "--workers", "1"]) == 0
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["session_id"] for r in results] == ["eligible", "low-salary", "hung-up"]
+    assert results[0]["is_eligible"] is True
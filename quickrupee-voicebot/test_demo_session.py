@@ -0,0 +1,459 @@
+"""
+End-to-end tests for /demo/voice sessions
+The demo server runs locally against fake OpenAI TTS and Realtime servers
+"""
+import asyncio
+import base64
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import asynccontextmanager
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import httpx
+import numpy as np
+import pytest
+import websockets
+
+import demo_server
+from admission import AdmissionController
+from fake_openai import FakeOpenAI, LocalServer, fake_mp3, fake_pcm
+from http_pool import HTTPPool
+from openai_realtime import OpenAIRealtimeClient
+from outcome_sink import OutcomeSink
+from protocol import KIND_MP3, KIND_PCM16, decode_frame, encode_frame
+from realtime_pool import RealtimePool
+from session_store import MemoryStore, ParkingLot, SessionRegistry
+from state_machine import EligibilityStateMachine, State
+from telephony import pcm16_to_ulaw, pcm24k_to_ulaw
+from tts_cache import TTSCache
+
+# 100 ms of a loud 440 Hz tone at 24 kHz: passes the VAD gate
+SPEECH = (8000 * np.sin(2 * np.pi * 440 * np.arange(2400) / 24000)).astype("<i2").tobytes()
+
+
+last_outcomes_db = ""  # Outcome store of the most recent demo_app run
+
+
+@asynccontextmanager
+async def demo_app(fake: FakeOpenAI, pool_size: int = 0, max_sessions: int = 100):
+    """Run the demo server wired to a fake OpenAI, with the TTS cache preloaded; globals are restored on exit"""
+    global last_outcomes_db
+    last_outcomes_db = os.path.join(tempfile.mkdtemp(), "outcomes.db")
+    async with LocalServer(fake.app) as openai_server:
+        with pytest.MonkeyPatch.context() as patch:
+            cache_dir = tempfile.mkdtemp()
+            patch.setattr(demo_server, "http_pool", HTTPPool(base_url=f"{openai_server.url}/v1", api_key="test-key", http2=False))
+            patch.setattr(demo_server, "tts_cache", TTSCache(cache_dir, "alloy", "tts-1", "mp3"))
+            patch.setattr(demo_server, "ulaw_cache", TTSCache(cache_dir, "alloy", "tts-1", "ulaw"))
+            patch.setattr(demo_server, "realtime_pool", RealtimePool(
+                size=pool_size,
+                refresh_interval=0.05,
+                client_factory=lambda: OpenAIRealtimeClient(url=f"{openai_server.ws_url}/v1/realtime"),
+            ))
+            patch.setattr(demo_server, "session_registry", SessionRegistry(MemoryStore(), ttl=60))
+            patch.setattr(demo_server, "parking_lot", ParkingLot(grace=5, max_sessions=10))
+            patch.setattr(demo_server, "admission", AdmissionController(
+                max_sessions=max_sessions, queue_size=1, queue_timeout=5.0, max_lag=1.0, retry_after=3
+            ))
+            patch.setattr(demo_server, "outcome_sink", OutcomeSink(f"sqlite:///{last_outcomes_db}", flush_interval=0.05))
+            await demo_server.http_pool.start()
+            await demo_server.outcome_sink.start()
+            await demo_server.preload_tts_cache(demo_server.tts_scripts())
+            await demo_server.realtime_pool.start()
+            try:
+                async with LocalServer(demo_server.app) as app_server:
+                    yield app_server
+            finally:
+                await demo_server.parking_lot.close()
+                await demo_server.realtime_pool.close()
+                await demo_server.http_pool.close()
+                await demo_server.outcome_sink.close()
+
+
+def recorded_outcomes() -> list:
+    """Outcome records written by the last demo_app run"""
+    db = sqlite3.connect(last_outcomes_db)
+    try:
+        return [json.loads(record) for (record,) in db.execute("SELECT record FROM outcomes ORDER BY id")]
+    finally:
+        db.close()
+
+
+async def receive(ws, timeout: float = 2.0):
+    """Next browser message as ("control", dict) or (frame kind, payload bytes)"""
+    message = await asyncio.wait_for(ws.recv(), timeout)
+    if isinstance(message, bytes):
+        kind, _, payload = decode_frame(message)
+        return kind, bytes(payload)
+    return "control", json.loads(message)
+
+
+def test_greeting_is_sent_before_realtime_connection_is_ready():
+    async def scenario():
+        fake = FakeOpenAI(latency=0.5)  # Slow Realtime handshake (and TTS, but that is preloaded)
+        async with demo_app(fake) as app:
+            async with websockets.connect(f"{app.ws_url}/demo/voice/s1?protocol=binary") as ws:
+                start = asyncio.get_running_loop().time()
+                received = []
+                while len([m for m in received if m[0] == KIND_MP3]) < 2:
+                    received.append(await receive(ws))
+                greeting_time = asyncio.get_running_loop().time() - start
+
+                # Audio sent before the upstream is ready is buffered, then flushed
+                await ws.send(encode_frame(KIND_PCM16, SPEECH))
+                await asyncio.sleep(1.0)
+                return fake, received, greeting_time
+
+    fake, received, greeting_time = asyncio.run(scenario())
+    audio = [payload for kind, payload in received if kind == KIND_MP3]
+    assert audio[0] == fake_mp3(EligibilityStateMachine.SCRIPTS[State.GREETING.value])
+    assert greeting_time < 0.3
+    assert fake.audio_bytes == len(SPEECH)
+
+
+async def play_and_ack(ws, played: int, until: str) -> tuple:
+    """Act as the browser: collect messages up to control type `until`, then ack playback"""
+    messages = []
+    while True:
+        kind, payload = await receive(ws)
+        messages.append((kind, payload))
+        if kind == KIND_MP3:
+            played += 1
+            await ws.send(json.dumps({"type": "playback_complete", "played": played}))
+        if kind == "control" and payload["type"] == until:
+            return played, messages
+
+
+def test_full_eligible_call_is_paced_by_acknowledgements():
+    async def scenario():
+        fake = FakeOpenAI()
+        fake.transcripts = ["yes", "yes", "yes"]
+        async with demo_app(fake, pool_size=1) as app:
+            await asyncio.sleep(0.2)  # Let the pool warm up
+            async with websockets.connect(f"{app.ws_url}/demo/voice/s2?protocol=binary") as ws:
+                start = asyncio.get_running_loop().time()
+                played, _ = await play_and_ack(ws, 0, until="unmute_mic")
+                states = []
+                for answer in range(3):
+                    await ws.send(encode_frame(KIND_PCM16, SPEECH))
+                    await ws.send(json.dumps({"type": "audio_end"}))
+                    until = "end_conversation" if answer == 2 else "unmute_mic"
+                    played, messages = await play_and_ack(ws, played, until=until)
+                    states += [p["state"] for k, p in messages if k == "control" and p["type"] == "state_update"]
+                call_time = asyncio.get_running_loop().time() - start
+                end = messages[-1][1]
+            async with httpx.AsyncClient() as client:
+                metrics = (await client.get(f"{app.url}/metrics")).text
+        return states, end, call_time, metrics
+
+    states, end, call_time, metrics = asyncio.run(scenario())
+    assert states == ["ask_salary", "ask_city", "eligible"]
+    assert end["is_eligible"] is True
+    assert call_time < 2.0  # No fixed 0.3 s / 5 s sleeps on the turn path
+    assert demo_server.call_summary()["turns"] >= 3
+    assert 'quickrupee_turn_stage_seconds_count{stage="tts_hit"}' in metrics
+    assert 'quickrupee_turn_stage_seconds_bucket{stage="transcription",le="+Inf"}' in metrics
+    assert 'quickrupee_session_event_seconds_count{stage="transcript_wait"}' in metrics
+
+    [outcome] = recorded_outcomes()
+    assert outcome["session_id"] == "s2"
+    assert outcome["is_eligible"] is True and outcome["rejection_reason"] is None
+    assert [a["question"] for a in outcome["answers"]] == ["ask_employment", "ask_salary", "ask_city"]
+    assert len(outcome["turn_latency_ms"]) == 3
+
+
+def test_answer_finished_before_realtime_connection_is_still_committed():
+    async def scenario():
+        fake = FakeOpenAI(handshake_latency=0.3)  # Caller answers before the Realtime connection is up
+        async with demo_app(fake) as app:
+            async with websockets.connect(f"{app.ws_url}/demo/voice/s3?protocol=binary") as ws:
+                played, _ = await play_and_ack(ws, 0, until="unmute_mic")
+                await ws.send(encode_frame(KIND_PCM16, SPEECH))
+                await ws.send(json.dumps({"type": "audio_end"}))
+                _, messages = await play_and_ack(ws, played, until="unmute_mic")
+        return [p["state"] for k, p in messages if k == "control" and p["type"] == "state_update"]
+
+    assert asyncio.run(scenario()) == ["ask_salary"]
+
+
+async def drop_after_first_answer(app, session_id: str) -> str:
+    """Answer the first question, then lose the connection; returns the resume token"""
+    async with websockets.connect(f"{app.ws_url}/demo/voice/{session_id}?protocol=binary") as ws:
+        played, messages = await play_and_ack(ws, 0, until="unmute_mic")
+        await ws.send(encode_frame(KIND_PCM16, SPEECH))
+        await ws.send(json.dumps({"type": "audio_end"}))
+        await play_and_ack(ws, played, until="unmute_mic")
+    await asyncio.sleep(0.1)
+    return messages[0][1]["resume_token"]
+
+
+async def finish_call(ws, answers: int) -> tuple:
+    """Reconnected browser: collect the replayed question, then answer until the call ends"""
+    played, resumed = await play_and_ack(ws, 0, until="unmute_mic")
+    states = []
+    for answer in range(answers):
+        await ws.send(encode_frame(KIND_PCM16, SPEECH))
+        await ws.send(json.dumps({"type": "audio_end"}))
+        until = "end_conversation" if answer == answers - 1 else "unmute_mic"
+        played, messages = await play_and_ack(ws, played, until=until)
+        states += [p["state"] for k, p in messages if k == "control" and p["type"] == "state_update"]
+    return [p for k, p in resumed if k == "control"], states
+
+
+def test_dropped_call_resumes_at_the_pending_question():
+    async def scenario():
+        fake = FakeOpenAI()
+        fake.transcripts = ["yes", "yes", "yes"]
+        async with demo_app(fake, pool_size=1) as app:
+            await asyncio.sleep(0.2)  # Let the pool warm up
+            token = await drop_after_first_answer(app, "s4")
+            parked = demo_server.parking_lot.stats()["with_realtime"]
+            async with websockets.connect(f"{app.ws_url}/demo/voice/s4?protocol=binary&resume={token}") as ws:
+                controls, states = await finish_call(ws, answers=2)
+            await asyncio.sleep(0.1)
+            ended = await demo_server.session_registry.load("s4", controls[0]["resume_token"])
+        return controls, states, parked, ended, fake.realtime_connections - 1  # minus the pool refill
+
+    controls, states, parked, ended, connections = asyncio.run(scenario())
+    assert controls[0]["type"] == "ready" and controls[0]["resumed"] is True
+    assert [p["text"] for p in controls if p["type"] == "bot_message"] == [EligibilityStateMachine.SCRIPTS["ask_salary"]]
+    assert states == ["ask_city", "eligible"]
+    assert parked == 1
+    assert connections == 1  # The parked Realtime session was reattached, not reconnected
+    assert ended is None  # Finished calls are not resumable
+
+
+def test_resume_from_the_session_store_needs_the_token():
+    async def scenario():
+        fake = FakeOpenAI()
+        fake.transcripts = ["yes", "yes", "yes"]
+        async with demo_app(fake) as app:
+            token = await drop_after_first_answer(app, "s5")
+            await demo_server.parking_lot.close()  # As if the caller reconnects to another worker
+            forged = await demo_server.session_registry.load("s5", "not-the-token")
+            async with websockets.connect(f"{app.ws_url}/demo/voice/s5?protocol=binary&resume={token}") as ws:
+                controls, states = await finish_call(ws, answers=2)
+        return forged, controls, states
+
+    forged, controls, states = asyncio.run(scenario())
+    assert forged is None
+    assert controls[0]["resumed"] is True
+    assert states == ["ask_city", "eligible"]
+
+
+def test_calls_over_the_limit_are_queued_then_shed():
+    async def scenario():
+        fake = FakeOpenAI()
+        async with demo_app(fake, max_sessions=1) as app:
+            url = f"{app.ws_url}/demo/voice/{{}}?protocol=binary"
+            async with websockets.connect(url.format("s6")) as first:
+                await play_and_ack(first, 0, until="unmute_mic")
+                async with websockets.connect(url.format("s7")) as second:
+                    _, queued = await receive(second)
+                    async with websockets.connect(url.format("s8")) as third:
+                        _, busy = await receive(third)
+                        await third.wait_closed()
+                        close_code = third.close_code
+                    await first.send(json.dumps({"type": "end"}))
+                    _, admitted = await receive(second)
+        return queued, busy, close_code, admitted
+
+    queued, busy, close_code, admitted = asyncio.run(scenario())
+    assert queued == {"type": "queued", "position": 1}
+    assert busy["type"] == "busy" and busy["retry_after"] == 3
+    assert close_code == 1013
+    assert admitted["type"] == "ready"
+
+
+def test_failed_resume_releases_the_admission_slot():
+    async def scenario():
+        fake = FakeOpenAI()
+        async with demo_app(fake, max_sessions=1) as app:
+            async def store_down(session_id, token):
+                raise ConnectionError("session store unreachable")
+
+            with pytest.MonkeyPatch.context() as patch:
+                patch.setattr(demo_server.parking_lot, "claim", store_down)
+                async with websockets.connect(f"{app.ws_url}/demo/voice/s11?protocol=binary&resume=t"):
+                    for _ in range(100):
+                        await asyncio.sleep(0.02)
+                        if not demo_server.admission.stats()["active"]:
+                            break
+            active = demo_server.admission.stats()["active"]
+            async with websockets.connect(f"{app.ws_url}/demo/voice/s12?protocol=binary") as ws:
+                _, ready = await receive(ws)
+        return active, ready
+
+    active, ready = asyncio.run(scenario())
+    assert active == 0
+    assert ready["type"] == "ready"
+
+
+async def answer_and_time(ws, played: int, until: str) -> tuple:
+    """Send one answer; returns (played, control messages, seconds from end of speech to bot audio)"""
+    await ws.send(encode_frame(KIND_PCM16, SPEECH))
+    await ws.send(json.dumps({"type": "audio_end"}))
+    start = asyncio.get_running_loop().time()
+    latency = None
+    controls = []
+    while True:
+        kind, payload = await receive(ws)
+        if kind == KIND_MP3:
+            if latency is None:
+                latency = asyncio.get_running_loop().time() - start
+            played += 1
+            await ws.send(json.dumps({"type": "playback_complete", "played": played}))
+        elif kind == "control":
+            controls.append(payload)
+            if payload["type"] == until:
+                return played, controls, latency
+
+
+def run_early_call(fake: FakeOpenAI, session_id: str, answers: int) -> tuple:
+    async def scenario():
+        async with demo_app(fake) as app:
+            async with websockets.connect(f"{app.ws_url}/demo/voice/{session_id}?protocol=binary") as ws:
+                played, _ = await play_and_ack(ws, 0, until="unmute_mic")
+                controls, latencies = [], []
+                for answer in range(answers):
+                    # The bot's reply plays meanwhile: the Realtime connection is up and the
+                    # previous final transcript is in
+                    await asyncio.sleep(fake.latency + 0.2)
+                    until = "end_conversation" if answer == answers - 1 else "unmute_mic"
+                    played, turn_controls, latency = await answer_and_time(ws, played, until)
+                    controls += turn_controls
+                    latencies.append(latency)
+                await asyncio.sleep(fake.latency + 0.2)  # Last final transcript
+        return controls, latencies
+
+    return asyncio.run(scenario())
+
+
+def test_confident_partial_transcript_answers_before_the_final_one():
+    fake = FakeOpenAI(latency=0.5, partials=True)  # Final transcripts arrive 0.5 s after the commit
+    before = dict(demo_server.early_stats)
+    controls, latencies = run_early_call(fake, "s9", answers=3)
+
+    states = [c["state"] for c in controls if c["type"] == "state_update"]
+    assert states == ["ask_salary", "ask_city", "eligible"]
+    assert latencies[0] < 0.3 and latencies[1] < 0.3  # Acted on the "yes" delta
+    assert latencies[2] >= 0.5  # Eligibility ends the call: waits for the final transcript
+    assert demo_server.early_stats["taken"] - before["taken"] == 2
+    assert demo_server.early_stats["confirmed"] - before["confirmed"] == 2
+
+
+def test_final_transcript_that_disagrees_replays_the_turn():
+    fake = FakeOpenAI(latency=0.3, partials=True)
+    fake.transcripts = [("yes", "no")]  # Heard "yes" early, but the caller said "no"
+    before = dict(demo_server.early_stats)
+    controls, _ = run_early_call(fake, "s10", answers=1)
+
+    events = [c.get("state", c["type"]) for c in controls if c["type"] in ("state_update", "cancel_audio")]
+    assert events == ["ask_salary", "cancel_audio", "not_eligible"]
+    assert controls[-1] == {"type": "end_conversation", "is_eligible": False}
+    assert demo_server.early_stats["corrected"] - before["corrected"] == 1
+
+    # The outcome keeps the corrected answer only
+    [outcome] = recorded_outcomes()
+    assert outcome["is_eligible"] is False and outcome["rejection_reason"]
+    assert [a["answer"] for a in outcome["answers"]] == ["no"]
+
+
+def test_final_transcript_after_an_early_call_ending_records_one_outcome():
+    def early_answer_even_if_final(self, text: str, max_words: int):
+        is_valid, is_yes = self._parse_yes_no(text)
+        return is_yes if is_valid and len(text.split()) <= max_words else None
+
+    fake = FakeOpenAI(latency=0.3, partials=True)
+    fake.transcripts = ["yes", "yes", ("no", "yes")]  # The call ends early on "no"; the final says "yes"
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(EligibilityStateMachine, "early_answer", early_answer_even_if_final)
+        controls, _ = run_early_call(fake, "s13", answers=3)
+
+    assert [c for c in controls if c["type"] == "end_conversation"] == [{"type": "end_conversation", "is_eligible": False}]
+    assert "cancel_audio" not in [c["type"] for c in controls]
+    [outcome] = recorded_outcomes()
+    assert outcome["session_id"] == "s13" and outcome["is_eligible"] is False
+
+
+def test_failed_final_transcript_keeps_the_early_decision():
+    fake = FakeOpenAI(latency=0.3, partials=True)
+    fake.transcripts = [("yes", None), "no"]  # Employment answered early, its transcription fails
+    before = dict(demo_server.early_stats)
+    controls, _ = run_early_call(fake, "s14", answers=2)
+
+    events = [c.get("state", c["type"]) for c in controls if c["type"] in ("state_update", "cancel_audio")]
+    assert events == ["ask_salary", "not_eligible"]
+    assert demo_server.early_stats["confirmed"] - before["confirmed"] == 1
+    assert demo_server.early_stats["corrected"] == before["corrected"]
+
+    # The "no" answers the salary question, not the employment one
+    [outcome] = recorded_outcomes()
+    assert outcome["rejection_reason"] == "salary_below_threshold"
+    assert [a["answer"] for a in outcome["answers"]] == ["yes", "no"]
+
+
+# 20 ms carrier frames at 8 kHz μ-law: a 440 Hz tone, and line silence
+PHONE_SPEECH = pcm16_to_ulaw((8000 * np.sin(2 * np.pi * 440 * np.arange(160) / 8000)).astype(np.int16))
+PHONE_SILENCE = b"\xff" * 160
+
+
+async def carrier_send(ws, stream_sid: str, frames: list):
+    for frame in frames:
+        await ws.send(json.dumps({
+            "event": "media",
+            "streamSid": stream_sid,
+            "media": {"track": "inbound", "payload": base64.b64encode(frame).decode("ascii")},
+        }))
+
+
+async def carrier_play(ws, clips: int) -> list:
+    """Act as the carrier: collect media events, echoing each mark as if played, until `clips` marks"""
+    events = []
+    while clips:
+        event = json.loads(await asyncio.wait_for(ws.recv(), 2.0))
+        events.append(event)
+        if event["event"] == "mark":
+            clips -= 1
+            await ws.send(json.dumps({"event": "mark", "streamSid": event["streamSid"], "mark": event["mark"]}))
+    return events
+
+
+def test_phone_call_over_a_mulaw_media_stream():
+    async def scenario():
+        fake = FakeOpenAI(server_vad=True)  # No audio_end on a phone line: turns end on trailing silence
+        async with demo_app(fake) as app:
+            tts_before = len(fake.tts_requests)
+            async with websockets.connect(f"{app.ws_url}/telephony/media") as ws:
+                await ws.send(json.dumps({"event": "connected", "protocol": "Call"}))
+                await ws.send(json.dumps({
+                    "event": "start",
+                    "streamSid": "MZ1",
+                    "start": {
+                        "streamSid": "MZ1",
+                        "callSid": "CA1",
+                        "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": 8000, "channels": 1},
+                    },
+                }))
+                events = await carrier_play(ws, clips=2)  # Greeting and first question
+                for _ in range(3):
+                    await carrier_send(ws, "MZ1", [PHONE_SPEECH] * 10 + [PHONE_SILENCE] * 50)
+                    events += await carrier_play(ws, clips=1)
+                # The bot hangs up after the closing message has played
+                closed = await asyncio.wait_for(ws.wait_closed(), 2.0) is None
+        return fake, events, closed, len(fake.tts_requests) - tts_before
+
+    fake, events, closed, tts_during_call = asyncio.run(scenario())
+    media = [e for e in events if e["event"] == "media"]
+    greeting = EligibilityStateMachine.SCRIPTS[State.GREETING.value]
+    assert all(e["streamSid"] == "MZ1" for e in events)
+    assert base64.b64decode(media[0]["media"]["payload"]) == pcm24k_to_ulaw(fake_pcm(greeting))
+    assert [e["mark"]["name"] for e in events if e["event"] == "mark"] == ["1", "2", "3", "4", "5"]
+    assert closed and tts_during_call == 0  # Every clip came pre-transcoded from the μ-law cache
+    assert fake.audio_bytes > 0
+
+    [outcome] = recorded_outcomes()
+    assert outcome["session_id"] == "CA1" and outcome["is_eligible"] is True
@@ -0,0 +1,87 @@
+"""
+Tests for the table-driven eligibility flow
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from state_machine import EligibilityFlow, EligibilityStateMachine, Question, YesNoClassifier
+
+
+def run(machine: EligibilityStateMachine, answers):
+    machine.start()
+    machine.process_response("")  # greeting -> first question
+    return [machine.process_response(answer) for answer in answers]
+
+
+def test_default_flow_outcomes():
+    assert run(EligibilityStateMachine(), ["yes", "haan", "sure"])[-1].is_eligible is True
+    for answers, reason in [
+        (["no"], "not_salaried"),
+        (["yes", "nahi"], "salary_below_threshold"),
+        (["yes", "yes", "nope"], "not_in_metro"),
+    ]:
+        machine = EligibilityStateMachine()
+        result = run(machine, answers)[-1]
+        assert (result.should_end, result.is_eligible, result.rejection_reason) == (True, False, reason)
+        assert machine.rejection_reason == reason and machine.is_complete()
+
+
+def test_invalid_answer_repeats_question_with_shared_result():
+    first, second = EligibilityStateMachine(), EligibilityStateMachine()
+    reask = run(first, ["maybe"])[-1]
+    assert not reask.is_valid
+    assert reask.message.endswith(EligibilityStateMachine.SCRIPTS["ask_employment"])
+    assert first.get_current_state() == "ask_employment"
+    # Turn results are preallocated: sessions share the same objects
+    assert run(second, ["maybe"])[-1] is reask
+
+
+def test_extra_question_needs_no_new_code():
+    class FourQuestionMachine(EligibilityStateMachine):
+        __slots__ = ()
+        FLOW = EligibilityFlow(
+            "Hi.",
+            [
+                Question("ask_employment", "Salaried?", "not_salaried"),
+                Question("ask_salary", "Salary above threshold?", "salary_below_threshold"),
+                Question("ask_city", "Metro city?", "not_in_metro"),
+                Question("ask_pan", "Do you have a PAN card?", "no_pan"),
+            ],
+            "Eligible.",
+            "Not eligible.",
+        )
+
+    results = run(FourQuestionMachine(), ["yes", "yes", "yes", "no"])
+    assert [r.state for r in results] == ["ask_salary", "ask_city", "ask_pan", "not_eligible"]
+    assert results[-1].rejection_reason == "no_pan"
+    assert run(FourQuestionMachine(), ["yes"] * 4)[-1].is_eligible is True
+
+
+def test_session_state_is_a_single_slot():
+    machine = EligibilityStateMachine()
+    assert not hasattr(machine, "__dict__")
+    run(machine, ["yes"])
+    assert isinstance(machine.step, int)
+
+
+def test_early_answer_only_acts_on_short_unambiguous_non_final_answers():
+    machine = EligibilityStateMachine()
+    assert machine.early_answer("yes", 3) is None  # Not asking anything yet
+    run(machine, [])
+    assert machine.early_answer("haan", 3) is True
+    assert machine.early_answer("yes I am", 3) is True
+    assert machine.early_answer("yes I am salaried", 3) is None  # Too long to trust yet
+    assert machine.early_answer("yes no", 3) is None
+    assert machine.early_answer("no", 3) is None  # Would end the call: wait for the final transcript
+    machine.process_response("yes")
+    machine.process_response("yes")
+    assert machine.early_answer("yes", 3) is None  # Last question: yes ends the call too
+
+
+def test_classifier_handles_matches_that_case_fold_differently():
+    classifier = YesNoClassifier(["yes", "sure", "si"], ["no"])
+    assert classifier.classify("ſure") == (True, True)  # Long s folds to "s"
+    assert classifier.classify("yeſ") == (True, True)
+    assert classifier.classify("SURE, No") == (False, False)
+    assert classifier.classify("Sİ") == (False, False)  # Matches "si" but folds to "si" + a dot: unclear
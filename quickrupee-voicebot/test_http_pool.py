@@ -0,0 +1,153 @@
+"""
+Tests for the shared HTTP pool
+Runs against a local stand-in of the OpenAI REST API (no network needed)
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from fake_openai import FakeOpenAI, LocalServer, fake_mp3
+from http_pool import HTTPPool
+from tts_cache import TTSCache, preload
+
+
+def test_sequential_requests_reuse_one_connection():
+    async def scenario():
+        fake = FakeOpenAI()
+        async with LocalServer(fake.app) as server:
+            pool = HTTPPool(base_url=f"{server.url}/v1", api_key="test-key", http2=False)
+            await pool.start()
+            for i in range(5):
+                response = await pool.post("/audio/speech", json={"input": f"hello {i}"})
+                assert response.status_code == 200
+            stats = pool.stats()
+            await pool.close()
+        return fake, stats
+
+    fake, stats = asyncio.run(scenario())
+    assert len(fake.tts_requests) == 5
+    assert len(fake.client_ports) == 1
+    assert stats["requests_total"] == 5
+    assert stats["open_connections"] == 1
+    assert stats["idle_connections"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_concurrent_requests_respect_pool_limit():
+    async def scenario():
+        fake = FakeOpenAI(latency=0.05)
+        async with LocalServer(fake.app) as server:
+            pool = HTTPPool(base_url=f"{server.url}/v1", api_key="test-key", max_connections=2, http2=False)
+            await pool.start()
+            responses = await asyncio.gather(
+                *(pool.post("/audio/speech", json={"input": f"hi {i}"}) for i in range(6))
+            )
+            await pool.close()
+        return fake, responses
+
+    fake, responses = asyncio.run(scenario())
+    assert all(r.status_code == 200 for r in responses)
+    assert len(fake.client_ports) <= 2
+
+
+def test_text_to_speech_and_preload_use_shared_pool(monkeypatch):
+    import demo_server
+
+    async def scenario():
+        fake = FakeOpenAI(fail_first=1)
+        async with LocalServer(fake.app) as server:
+            monkeypatch.setattr(
+                demo_server, "http_pool", HTTPPool(base_url=f"{server.url}/v1", api_key="test-key", http2=False)
+            )
+            await demo_server.http_pool.start()
+            cache = TTSCache(tempfile.mkdtemp(), "alloy", "tts-1", "mp3")
+            results = await preload(
+                cache, ["one", "two", "three"], demo_server.text_to_speech, concurrency=2, backoff=0.01
+            )
+            await demo_server.http_pool.close()
+        return fake, cache, results
+
+    fake, cache, results = asyncio.run(scenario())
+    assert all(r.ok for r in results)
+    assert sum(r.attempts for r in results) == 4  # one request retried after HTTP 500
+    assert bytes(cache.get("two")) == fake_mp3("two")
+    assert len(fake.client_ports) <= 2
+
+
+def test_stats_survive_missing_pool_internals(monkeypatch):
+    pool = HTTPPool(base_url="http://127.0.0.1:1/v1", api_key="test-key", http2=False)
+    assert pool.stats()["open_connections"] == 0
+
+    async def scenario():
+        await pool.start()
+        monkeypatch.setattr(pool.client, "_transport", object())  # e.g. after an httpx upgrade
+        stats = pool.stats()
+        monkeypatch.undo()
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["open_connections"] is None and stats["idle_connections"] is None
+    assert stats["requests_total"] == 0
+
+
+def test_stream_tts_yields_chunks_before_completion_and_caches_clip(monkeypatch):
+    import demo_server
+
+    text = "a longer sentence that is streamed back in several chunks"
+
+    async def scenario():
+        fake = FakeOpenAI(chunk_size=8, chunk_delay=0.02)
+        async with LocalServer(fake.app) as server:
+            monkeypatch.setattr(
+                demo_server, "http_pool", HTTPPool(base_url=f"{server.url}/v1", api_key="test-key", http2=False)
+            )
+            monkeypatch.setattr(demo_server, "tts_cache", TTSCache(tempfile.mkdtemp(), "alloy", "tts-1", "mp3"))
+            start = asyncio.get_running_loop().time()
+            arrivals, chunks = [], []
+            async for chunk in demo_server.stream_tts(text):
+                arrivals.append(asyncio.get_running_loop().time() - start)
+                chunks.append(chunk)
+            await demo_server.http_pool.close()
+        return arrivals, chunks, bytes(demo_server.tts_cache.get(text))
+
+    arrivals, chunks, cached = asyncio.run(scenario())
+    assert len(chunks) > 1
+    assert arrivals[0] < arrivals[-1] - 0.05  # first chunk long before the last
+    assert b"".join(chunks) == fake_mp3(text)
+    assert cached == fake_mp3(text)
+
+
+def test_streamed_miss_marks_audio_sent_at_the_first_chunk(monkeypatch):
+    import demo_server
+    from metrics import TurnTracer
+    from protocol import PROTOCOL_BINARY
+
+    class Channel:
+        protocol = PROTOCOL_BINARY
+
+        def __init__(self):
+            self.sent_at = []
+
+        async def send_mp3_chunk(self, chunk: bytes, final: bool = False):
+            self.sent_at.append(time.perf_counter())
+
+    async def scenario():
+        fake = FakeOpenAI(chunk_size=8, chunk_delay=0.02)
+        async with LocalServer(fake.app) as server:
+            monkeypatch.setattr(
+                demo_server, "http_pool", HTTPPool(base_url=f"{server.url}/v1", api_key="test-key", http2=False)
+            )
+            monkeypatch.setattr(demo_server, "tts_cache", TTSCache(tempfile.mkdtemp(), "alloy", "tts-1", "mp3"))
+            channel, trace = Channel(), TurnTracer().start("s1")
+            await demo_server.send_bot_audio(channel, "a sentence long enough to stream in chunks", trace)
+            await demo_server.http_pool.close()
+        return channel.sent_at, trace
+
+    sent_at, trace = asyncio.run(scenario())
+    assert trace.cache_hit is False
+    assert sent_at[0] - 0.01 <= trace.events["audio_sent"] <= sent_at[0]
+    assert trace.events["audio_sent"] < sent_at[-2] - 0.05
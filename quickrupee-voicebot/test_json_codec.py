@@ -0,0 +1,31 @@
+"""
+Tests for the pluggable JSON codec
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from json_codec import CODECS, get_codec
+
+MESSAGE = {"type": "transcript", "text": "haan ji, ₹30000", "role": "user", "is_eligible": None, "played": 3}
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_codecs_produce_identical_compact_text(name):
+    codec = get_codec(name)
+    text = codec.dumps(MESSAGE)
+    assert isinstance(text, str)
+    assert text == get_codec("json").dumps(MESSAGE)
+    assert codec.loads(text) == MESSAGE
+    assert codec.loads(text.encode("utf-8")) == MESSAGE
+
+
+def test_decode_errors_are_value_errors_and_unknown_codecs_rejected():
+    for name in CODECS:
+        with pytest.raises(ValueError):
+            get_codec(name).loads("{not json")
+    with pytest.raises(ValueError):
+        get_codec("simdjson")
+    assert get_codec("auto").name in CODECS
@@ -0,0 +1,24 @@
+"""
+Smoke test for the load harness: concurrent simulated callers against the
+demo server and fake OpenAI running in-process
+"""
+import asyncio
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from fake_openai import FakeOpenAI
+from load_test import run_load, synthetic_speech
+from test_demo_session import demo_app
+
+
+def test_concurrent_callers_complete_full_flows():
+    async def scenario():
+        fake = FakeOpenAI(latency=0.02, jitter=0.02)
+        async with demo_app(fake, pool_size=2) as app:
+            return await run_load(app.ws_url, sessions=12, concurrency=6, speech=synthetic_speech(300))
+
+    summary = asyncio.run(scenario())
+    assert summary["completed"] == 12 and summary["errors"] == 0
+    assert summary["turn_latency_ms"]["p50"] <= summary["turn_latency_ms"]["p99"]
+    assert summary["time_to_greeting_ms"]["p99"] < 1000
@@ -0,0 +1,63 @@
+"""
+Tests for turn tracing, stage histograms and the /metrics exposition
+"""
+import json
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from metrics import Histogram, TraceExporter, TurnTracer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_histogram_exposition_is_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", label="stage", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe("tts", value)
+    lines = list(histogram.expose())
+    assert 'latency_seconds_bucket{stage="tts",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="tts",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="tts",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{stage="tts"} 4' in lines
+
+
+def test_turn_stages_are_split_by_event_and_cache_result(tmp_path):
+    clock = FakeClock()
+    trace_file = tmp_path / "traces.jsonl"
+    tracer = TurnTracer(exporter=TraceExporter(str(trace_file), sample_rate=1.0), clock=clock)
+
+    trace = tracer.start("s1")
+    for event, at in [("speech_stopped", 0.0), ("transcript", 0.4), ("fsm_decision", 0.4001),
+                      ("tts_lookup", 0.45), ("audio_sent", 0.451)]:
+        clock.now = at
+        trace.mark(event)
+    clock.now = 9.0
+    trace.mark("transcript")  # Only the first occurrence counts
+    trace.cache_hit = True
+    trace.finish()
+
+    # A turn without speech_stopped (e.g. no server VAD event) starts at the transcript
+    trace = tracer.start("s2")
+    for event, at in [("transcript", 10.0), ("fsm_decision", 10.0), ("tts_lookup", 10.1), ("audio_sent", 10.6)]:
+        clock.now = at
+        trace.mark(event)
+    trace.cache_hit = False
+    trace.finish()
+    tracer.exporter.close()
+
+    stages = tracer.stages
+    assert stages.count("transcription") == 1
+    assert stages.count("tts_hit") == 1 and stages.count("tts_miss") == 1
+    assert stages.count("turn") == 2
+    assert abs(stages._series["turn"][-2] - (0.451 + 0.6)) < 1e-9
+
+    traces = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert traces[0]["session_id"] == "s1" and traces[0]["events_ms"]["transcript"] == 400.0
+    assert "quickrupee_turns_total 2" in list(tracer.expose())
@@ -0,0 +1,104 @@
+"""
+Tests for upstream audio batching and backpressure in the Realtime client
+Runs against a local fake Realtime WebSocket server (no network needed)
+"""
+import asyncio
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from config import settings
+from fake_openai import FakeOpenAI, LocalServer
+from openai_realtime import OpenAIRealtimeClient
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_small_audio_chunks_are_coalesced_into_fewer_appends():
+    async def scenario():
+        fake = FakeOpenAI()
+        async with LocalServer(fake.app) as server:
+            client = OpenAIRealtimeClient(url=f"{server.ws_url}/v1/realtime")
+            await client.connect()
+            for _ in range(50):
+                await client.send_audio(b"\x00" * 960)  # 20 ms telephony-sized chunks
+            await client.commit_audio()
+            await wait_for(lambda: fake.audio_bytes == 50 * 960)
+            stats = client.get_audio_stats()
+            await client.close()
+        return fake, stats
+
+    fake, stats = asyncio.run(scenario())
+    assert fake.append_events < 50
+    assert stats["chunks_queued"] == 50
+    assert stats["batches_sent"] == fake.append_events
+
+
+def test_audio_queued_after_a_clear_is_still_sent():
+    async def scenario():
+        fake = FakeOpenAI()
+        async with LocalServer(fake.app) as server:
+            client = OpenAIRealtimeClient(url=f"{server.ws_url}/v1/realtime")
+            await client.connect()
+            await client.send_audio(b"\x01" * 960)  # Batcher now waits for more
+            await client.clear_audio_buffer()
+            await client.send_audio(b"\x02" * 960)  # Next turn's audio, during the batching window
+            await client.commit_audio()
+            await wait_for(lambda: fake.items == 1)
+            await client.close()
+        return fake
+
+    fake = asyncio.run(scenario())
+    assert fake.audio_bytes == 960  # Only the cleared chunk is dropped
+
+
+def unsent_client(monkeypatch, max_chunks: int, timeout: float) -> OpenAIRealtimeClient:
+    """A "connected" client with no sender task, so its queue fills up"""
+    monkeypatch.setattr(settings, "AUDIO_QUEUE_MAX_CHUNKS", max_chunks)
+    monkeypatch.setattr(settings, "AUDIO_BACKPRESSURE_TIMEOUT", timeout)
+    client = OpenAIRealtimeClient(url="ws://unused")
+    client.is_connected, client.ws = True, object()
+    return client
+
+
+def test_full_queue_drops_a_chunk_after_the_backpressure_timeout(monkeypatch):
+    async def scenario():
+        client = unsent_client(monkeypatch, max_chunks=4, timeout=0.05)
+        for _ in range(4):
+            await client.send_audio(b"\x00" * 960)
+        start = asyncio.get_running_loop().time()
+        await client.send_audio(b"\x00" * 960)
+        return asyncio.get_running_loop().time() - start, client.get_audio_stats()
+
+    waited, stats = asyncio.run(scenario())
+    assert waited >= 0.05
+    assert stats["chunks_queued"] == 4 and stats["chunks_dropped"] == 1
+    assert stats["queue_depth"] == stats["max_queue_depth"] == 4
+
+
+def test_full_queue_holds_the_sender_until_space_frees(monkeypatch):
+    async def scenario():
+        client = unsent_client(monkeypatch, max_chunks=2, timeout=1.0)
+        for _ in range(2):
+            await client.send_audio(b"\x00" * 960)
+        blocked = asyncio.create_task(client.send_audio(b"\x01" * 960))
+        await asyncio.sleep(0.05)
+        held = not blocked.done()
+        client._audio_queue.get_nowait()  # The sender task takes a chunk
+        await asyncio.wait_for(blocked, 1.0)
+        return held, client.get_audio_stats()
+
+    held, stats = asyncio.run(scenario())
+    assert held
+    assert stats["chunks_queued"] == 3 and stats["chunks_dropped"] == 0
+
+
+def test_audio_for_a_disconnected_client_is_dropped():
+    client = OpenAIRealtimeClient(url="ws://unused")
+    asyncio.run(client.send_audio(b"\x00" * 960))
+    assert client.get_audio_stats()["chunks_dropped"] == 1
@@ -0,0 +1,137 @@
+"""
+Tests for prompt audio stitching: template plans, segment joins and the demo server fallback
+"""
+import asyncio
+import base64
+import json
+import os
+import struct
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import numpy as np
+
+import demo_server
+from config import settings
+from fake_openai import FakeOpenAI, LocalServer, fake_pcm
+from http_pool import HTTPPool
+from prompt_audio import PromptStitcher, number_words, trim_pcm, wav_clip
+from protocol import KIND_WAV, PROTOCOL_BINARY, PROTOCOL_JSON, decode_frame
+from state_machine import EligibilityStateMachine
+from telephony import PROTOCOL_TELEPHONY, pcm24k_to_ulaw
+from tts_cache import TTSCache
+
+SALARY = "Is your monthly in-hand salary above {min_salary} rupees?"
+CITIES = "Do you currently live in a metro city such as {cities}?"
+
+
+def test_numbers_are_spoken_in_lakhs_and_crores():
+    assert number_words(0) == ["zero"]
+    assert number_words(25000) == ["twenty", "five", "thousand"]
+    assert number_words(150000) == ["one", "lakh", "fifty", "thousand"]
+    assert number_words(12_345_678) == [
+        "one", "crore", "twenty", "three", "lakh", "forty", "five", "thousand",
+        "six", "hundred", "seventy", "eight",
+    ]
+
+
+def test_rendered_prompts_are_planned_back_into_segments():
+    stitcher = PromptStitcher([SALARY, CITIES, "Are you currently a salaried employee?"], ["delhi", "mumbai", "bangalore"])
+    assert len(stitcher.templates) == 2  # Fixed prompts are cached whole
+
+    assert stitcher.plan("Is your monthly in-hand salary above 25,000 rupees?") == [
+        "Is your monthly in-hand salary above", "twenty", "five", "thousand", "rupees?",
+    ]
+    assert stitcher.plan("Do you currently live in a metro city such as Delhi, Mumbai, or Bangalore?") == [
+        "Do you currently live in a metro city such as", "Delhi", "Mumbai", "or", "Bangalore",
+    ]
+    assert stitcher.plan("Do you currently live in a metro city such as Paris?") is None
+    assert set(stitcher.plan("Is your monthly in-hand salary above 30000 rupees?")) <= set(stitcher.segments())
+
+
+def test_stitch_joins_cached_segments_in_order_or_gives_up():
+    stitcher = PromptStitcher([SALARY], [])
+    cached = {s: s.encode() + b"|" for s in stitcher.segments()}
+    text = "Is your monthly in-hand salary above 40000 rupees?"
+    assert stitcher.stitch(text, cached.get) == b"Is your monthly in-hand salary above|forty|thousand|rupees?|"
+
+    del cached["forty"]
+    assert stitcher.stitch(text, cached.get) is None
+    assert stitcher.stats()["stitched"] == 1 and stitcher.stats()["missing_segments"] == 1
+
+
+def test_pcm_silence_is_trimmed_and_wrapped_as_wav():
+    silence = np.zeros(2400, dtype="<i2").tobytes()  # 100 ms at 24 kHz
+    speech = np.full(1200, 5000, dtype="<i2").tobytes()
+    assert trim_pcm(silence + speech + silence, pad_ms=10) == silence[:480] + speech + silence[:480]
+    assert trim_pcm(silence) == silence
+
+    wav = wav_clip(speech)
+    riff, riff_size, wave, _, _, fmt, channels, rate, byte_rate, _, bits, data, data_size = struct.unpack_from(
+        "<4sI4s4sIHHIIHH4sI", wav
+    )
+    assert (riff, wave, data) == (b"RIFF", b"WAVE", b"data")
+    assert (fmt, channels, rate, byte_rate, bits) == (1, 1, 24000, 48000, 16)
+    assert riff_size == len(wav) - 8 and data_size == len(speech) and wav.endswith(speech)
+
+
+class RecordingChannel:
+    """Stands in for BrowserChannel / TelephonyChannel, keeping what would be sent"""
+
+    def __init__(self, protocol: str):
+        self.protocol = protocol
+        self.sent = []
+
+    async def send_payload(self, payload):
+        self.sent.append(payload)
+
+    async def send_ulaw(self, payload: str):
+        self.sent.append(base64.b64decode(payload))
+
+    async def end_clip(self):
+        pass
+
+
+def test_configured_questions_are_stitched_without_tts_until_cached_whole(monkeypatch):
+    salary = EligibilityStateMachine.SCRIPTS["ask_salary"]
+    city = EligibilityStateMachine.SCRIPTS["ask_city"]
+
+    async def scenario():
+        fake = FakeOpenAI()
+        async with LocalServer(fake.app) as openai_server:
+            monkeypatch.setattr(
+                demo_server, "http_pool", HTTPPool(base_url=f"{openai_server.url}/v1", api_key="test-key", http2=False)
+            )
+            cache_dir = tempfile.mkdtemp()
+            for name, fmt in (("tts_cache", "mp3"), ("ulaw_cache", "ulaw"), ("segment_cache", "pcm")):
+                monkeypatch.setattr(demo_server, name, TTSCache(cache_dir, "alloy", "tts-1", fmt))
+            monkeypatch.setattr(demo_server, "prompt_stitcher", PromptStitcher(demo_server.prompt_templates(), settings.ELIGIBLE_CITIES))
+            await demo_server.http_pool.start()
+            try:
+                await demo_server.preload_prompt_segments()
+                requests = len(fake.tts_requests)
+
+                browser = RecordingChannel(PROTOCOL_BINARY)
+                legacy = RecordingChannel(PROTOCOL_JSON)
+                phone = RecordingChannel(PROTOCOL_TELEPHONY)
+                for _ in range(2):  # Later turns reuse the encoded payload
+                    assert await demo_server.send_bot_audio(browser, salary) is not None
+                    assert await demo_server.send_bot_audio(legacy, salary) is not None
+                    assert await demo_server.send_bot_audio(phone, city) is not None
+            finally:
+                await demo_server.http_pool.close()
+            return fake, requests, browser.sent, legacy.sent, phone.sent
+
+    fake, requests, browser, legacy, phone = asyncio.run(scenario())
+    assert len(fake.tts_requests) == requests  # No TTS for the prompt itself
+
+    def stitched(text: str) -> bytes:
+        return b"".join(trim_pcm(fake_pcm(s)) for s in demo_server.prompt_stitcher.plan(text))
+
+    assert decode_frame(browser[0])[:2] == (KIND_WAV, 0)
+    assert bytes(decode_frame(browser[0])[2]) == wav_clip(stitched(salary))
+    assert json.loads(legacy[0]) == {"type": "audio_wav", "data": base64.b64encode(wav_clip(stitched(salary))).decode()}
+    assert phone == [pcm24k_to_ulaw(stitched(city))] * 2
+    assert browser[1] is browser[0] and legacy[1] is legacy[0]
+    assert demo_server.prompt_stitcher.stats()["stitched"] == 2  # Once per prompt, not per turn
@@ -0,0 +1,96 @@
+"""
+Tests for the browser WebSocket protocol: binary frames and the legacy JSON fallback
+"""
+import asyncio
+import base64
+import json
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from protocol import (
+    FLAG_FINAL, KIND_MP3, KIND_MP3_CHUNK, KIND_PCM16, KIND_WAV, PROTOCOL_BINARY, PROTOCOL_JSON, BrowserChannel,
+    ProtocolError, decode_frame, encode_frame, encode_mp3_chunk_message, encode_mp3_message, encode_wav_message,
+)
+
+
+class ScriptedWebSocket:
+    """Replays ASGI receive messages and keeps what is sent"""
+
+    def __init__(self, *messages):
+        self.messages = list(messages)
+        self.sent = []
+        self.query_params = {}
+
+    async def receive(self):
+        return self.messages.pop(0)
+
+    async def send_text(self, text: str):
+        self.sent.append(text)
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+
+def receive_all(channel: BrowserChannel, count: int) -> list:
+    async def scenario():
+        return [await channel.receive() for _ in range(count)]
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("kind", [KIND_PCM16, KIND_MP3, KIND_MP3_CHUNK, KIND_WAV])
+@pytest.mark.parametrize("flags", [0, FLAG_FINAL])
+def test_frames_round_trip_for_every_kind_and_flag(kind, flags):
+    for payload in (b"", b"\x00\x01audio\xff"):
+        frame = encode_frame(kind, payload, flags)
+        assert len(frame) == 2 + len(payload)
+        assert decode_frame(frame) == (kind, flags, payload)
+
+
+def test_frames_shorter_than_the_header_are_rejected():
+    for data in (b"", b"\x01"):
+        with pytest.raises(ProtocolError):
+            decode_frame(data)
+    with pytest.raises(ProtocolError):
+        receive_all(BrowserChannel(ScriptedWebSocket({"type": "websocket.receive", "bytes": b"\x01"})), 1)
+    with pytest.raises(ProtocolError):  # Only audio is accepted from the browser
+        receive_all(BrowserChannel(ScriptedWebSocket({"type": "websocket.receive", "bytes": encode_frame(KIND_MP3, b"x")})), 1)
+
+
+def test_binary_and_legacy_json_messages_yield_the_same_audio():
+    pcm = b"\x10\x00\x20\x00"
+    websocket = ScriptedWebSocket(
+        {"type": "websocket.receive", "bytes": encode_frame(KIND_PCM16, pcm)},
+        {"type": "websocket.receive", "text": json.dumps({"type": "audio", "data": base64.b64encode(pcm).decode()})},
+        {"type": "websocket.receive", "text": json.dumps({"type": "audio", "data": ""})},
+        {"type": "websocket.receive", "text": json.dumps({"type": "audio_end"})},
+        {"type": "websocket.disconnect", "code": 1001},
+    )
+    received = receive_all(BrowserChannel(websocket), 4)
+    assert [(control, bytes(audio) if audio is not None else None) for control, audio in received] == [
+        (None, pcm), (None, pcm), (None, b""), ({"type": "audio_end"}, None),
+    ]
+    with pytest.raises(WebSocketDisconnect):
+        receive_all(BrowserChannel(websocket), 1)
+
+
+def test_outbound_audio_follows_the_negotiated_protocol():
+    assert decode_frame(encode_mp3_message(b"mp3", PROTOCOL_BINARY)) == (KIND_MP3, 0, b"mp3")
+    assert decode_frame(encode_mp3_chunk_message(b"", True, PROTOCOL_BINARY)) == (KIND_MP3_CHUNK, FLAG_FINAL, b"")
+    assert decode_frame(encode_wav_message(b"wav", PROTOCOL_BINARY)) == (KIND_WAV, 0, b"wav")
+    assert json.loads(encode_mp3_message(b"mp3", PROTOCOL_JSON)) == {"type": "audio_mp3", "data": "bXAz"}
+    assert json.loads(encode_wav_message(b"wav", PROTOCOL_JSON)) == {"type": "audio_wav", "data": "d2F2"}
+    assert json.loads(encode_mp3_chunk_message(b"mp3", False, PROTOCOL_JSON)) == {
+        "type": "audio_mp3_chunk", "final": False, "data": "bXAz",
+    }
+
+    websocket = ScriptedWebSocket()
+    websocket.query_params = {"protocol": PROTOCOL_BINARY}
+    channel = BrowserChannel.from_websocket(websocket)
+    asyncio.run(channel.send_mp3(b"mp3"))
+    assert channel.protocol == PROTOCOL_BINARY and websocket.sent == [encode_frame(KIND_MP3, b"mp3")]
+    assert BrowserChannel.from_websocket(ScriptedWebSocket()).protocol == PROTOCOL_JSON
@@ -0,0 +1,92 @@
+"""
+Tests for the pre-warmed Realtime connection pool
+Runs against a local fake Realtime WebSocket server (no network needed)
+"""
+import asyncio
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from fake_openai import FakeOpenAI, LocalServer
+from openai_realtime import OpenAIRealtimeClient
+from realtime_pool import RealtimePool
+
+
+def client_factory(server: LocalServer):
+    return lambda: OpenAIRealtimeClient(url=f"{server.ws_url}/v1/realtime")
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_warm_client_is_handed_out_and_replenished():
+    async def scenario():
+        fake = FakeOpenAI(transcript="haan")
+        transcripts = []
+
+        async def on_transcript(text):
+            transcripts.append(text)
+
+        async with LocalServer(fake.app) as server:
+            pool = RealtimePool(size=2, refresh_interval=0.05, client_factory=client_factory(server))
+            await pool.start()
+            await wait_for(lambda: pool.stats()["idle"] == 2)
+
+            start = asyncio.get_running_loop().time()
+            client = await pool.acquire(on_transcript=on_transcript)
+            acquire_time = asyncio.get_running_loop().time() - start
+
+            await client.send_audio(b"\x00\x01" * 2400)
+            await client.commit_audio()
+            await wait_for(lambda: transcripts)
+            await wait_for(lambda: pool.stats()["idle"] == 2)  # replenished in background
+
+            stats = pool.stats()
+            await client.close()
+            await pool.close()
+        return fake, stats, transcripts, acquire_time
+
+    fake, stats, transcripts, acquire_time = asyncio.run(scenario())
+    assert transcripts == ["haan"]
+    assert stats["hits"] == 1 and stats["misses"] == 0
+    assert stats["hit_rate"] == 1.0
+    assert fake.realtime_connections == 3
+    assert acquire_time < 0.05
+
+
+def test_empty_pool_connects_on_demand():
+    async def scenario():
+        fake = FakeOpenAI()
+        async with LocalServer(fake.app) as server:
+            pool = RealtimePool(size=0, client_factory=client_factory(server))
+            await pool.start()
+            client = await pool.acquire()
+            connected = client.is_connected
+            stats = pool.stats()
+            await client.close()
+            await pool.close()
+        return stats, connected
+
+    stats, connected = asyncio.run(scenario())
+    assert connected
+    assert stats["misses"] == 1 and stats["hit_rate"] == 0.0
+
+
+def test_expired_warm_clients_are_retired():
+    async def scenario():
+        fake = FakeOpenAI()
+        async with LocalServer(fake.app) as server:
+            pool = RealtimePool(size=1, max_idle=0.1, refresh_interval=0.05, client_factory=client_factory(server))
+            await pool.start()
+            await wait_for(lambda: pool.stats()["retired"] >= 1)
+            await wait_for(lambda: pool.stats()["idle"] == 1)
+            await pool.close()
+            await wait_for(lambda: fake.open_realtime == 0)
+        return fake
+
+    fake = asyncio.run(scenario())
+    assert fake.realtime_connections >= 2
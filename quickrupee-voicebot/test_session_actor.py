@@ -0,0 +1,63 @@
+"""
+Tests for the per-session actor that runs turn work off the Realtime receive loop
+"""
+import asyncio
+
+from metrics import Histogram
+from session_actor import SessionActor
+
+
+def test_slow_turn_does_not_stall_event_intake():
+    async def scenario():
+        handled = []
+        release = asyncio.Event()
+
+        async def slow_transcript(text):
+            await release.wait()  # e.g. waiting on playback of the closing message
+            handled.append(text)
+
+        async def error(message):
+            handled.append(message)
+
+        stages = Histogram("events", "test", label="stage")
+        actor = SessionActor("s", {"transcript": slow_transcript, "error": error}, maxsize=2, stages=stages)
+        actor.start()
+
+        accepted = [actor.post("transcript", "yes")]
+        await asyncio.sleep(0.01)  # Consumer is now blocked inside the first turn
+        accepted += [actor.post("error", "boom"), actor.post("transcript", "no"), actor.post("transcript", "late")]
+        intake_returned = len(handled) == 0
+
+        release.set()
+        await asyncio.sleep(0.01)
+        await actor.close()
+        return accepted, intake_returned, handled, actor.stats(), stages
+
+    accepted, intake_returned, handled, stats, stages = asyncio.run(scenario())
+    assert intake_returned
+    assert accepted == [True, True, True, False]  # Mailbox of 2 overflows, the newest event is dropped
+    assert handled == ["yes", "boom", "no"]  # In order, one at a time
+    assert stats["dropped"] == 1 and stats["handled"] == 3
+    assert stages.count("transcript_wait") == 2 and stages.count("error_handle") == 1
+
+
+def test_failing_handler_does_not_stop_the_actor():
+    async def scenario():
+        handled = []
+
+        async def transcript(text):
+            if text == "bad":
+                raise RuntimeError("TTS failed")
+            handled.append(text)
+
+        actor = SessionActor("s", {"transcript": transcript}, maxsize=4)
+        actor.start()
+        actor.post("transcript", "bad")
+        actor.post("transcript", "yes")
+        await asyncio.sleep(0.01)
+        await actor.close()
+        return handled, actor.stats()
+
+    handled, stats = asyncio.run(scenario())
+    assert handled == ["yes"]
+    assert stats["failed"] == 1
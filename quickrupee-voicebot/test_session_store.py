@@ -0,0 +1,141 @@
+"""
+Tests for the shared session store and FSM snapshots
+"""
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import pytest
+
+from session_store import MemoryStore, ParkingLot, SessionRegistry, SQLiteStore, create_store
+from state_machine import EligibilityStateMachine
+
+
+def make_store(kind: str, path: str):
+    return MemoryStore() if kind == "memory" else SQLiteStore(path)
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_store_commands_follow_redis_semantics(kind):
+    async def scenario(store):
+        await store.set("a", "1")
+        await store.set("b", b"2", ex=0.05)
+        assert await store.get("a") == b"1"
+        assert await store.get("b") == b"2"
+        await asyncio.sleep(0.1)
+        assert await store.get("b") is None  # Expired
+        assert await store.delete("a", "missing") == 1
+        assert await store.zadd("z", {"x": 1.0, "y": 2.0}) == 2
+        assert await store.zadd("z", {"x": 3.0}) == 0  # Updates the score
+        assert await store.zremrangebyscore("z", float("-inf"), 2.5) == 1  # y
+        assert await store.zrem("z", "x", "missing") == 1
+        assert await store.zcard("z") == 0
+        await store.close()
+
+    asyncio.run(scenario(make_store(kind, os.path.join(tempfile.mkdtemp(), "sessions.db"))))
+
+
+def test_concurrent_sqlite_reads_see_their_own_rows():
+    async def scenario(store):
+        await asyncio.gather(*(store.set(f"k{i}", f"v{i}") for i in range(50)))
+        values = await asyncio.gather(*(store.get(f"k{i}") for i in range(50)))
+        counts = await asyncio.gather(*(store.zcard("z") for _ in range(20)), store.zadd("z", {"a": 1.0}))
+        await store.close()
+        return values, counts
+
+    values, counts = asyncio.run(scenario(SQLiteStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))))
+    assert values == [f"v{i}".encode() for i in range(50)]
+    assert set(counts[:-1]) <= {0, 1}
+
+
+def test_calls_left_active_by_a_dead_worker_age_out():
+    async def scenario():
+        store = MemoryStore()
+        dead = SessionRegistry(store, ttl=0.1)
+        alive = SessionRegistry(store, ttl=0.1)
+        machine = EligibilityStateMachine()
+        machine.start()
+        await dead.save("orphan", machine, token="t")  # Never released
+        before = await alive.active_count()
+        await asyncio.sleep(0.15)
+        await alive.save("call-2", machine, token="t")
+        return before, await alive.active_count()
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_call_saved_by_one_worker_resumes_on_another():
+    path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+
+    async def scenario():
+        worker_a = SessionRegistry(create_store(f"sqlite:///{path}"), ttl=60)
+        worker_b = SessionRegistry(create_store(f"sqlite:///{path}"), ttl=60)
+
+        machine = EligibilityStateMachine()
+        machine.start()
+        machine.process_response("")
+        machine.process_response("yes")
+        await worker_a.save("call-1", machine, token="t0k3n")
+        assert await worker_b.active_count() == 1
+
+        await worker_a.release("call-1")  # Caller dropped
+        forged = await worker_b.load("call-1", token="guess")
+        resumed = await worker_b.load("call-1", token="t0k3n")
+        count = await worker_b.active_count()
+        await worker_a.close()
+        await worker_b.close()
+        return machine, forged, resumed, count
+
+    machine, forged, resumed, count = asyncio.run(scenario())
+    assert forged is None
+    assert count == 0
+    assert resumed.get_current_state() == "ask_salary"
+    assert resumed.process_response("no").rejection_reason == machine.process_response("no").rejection_reason
+
+
+def test_snapshot_from_a_different_flow_is_not_resumed():
+    machine = EligibilityStateMachine()
+    machine.start()
+    snapshot = machine.snapshot()
+
+    assert EligibilityStateMachine.from_snapshot(snapshot).step == machine.step
+    assert EligibilityStateMachine.from_snapshot(dict(snapshot, flow="0" * 16)) is None
+    assert EligibilityStateMachine.from_snapshot(dict(snapshot, step=10_000)) is None
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+        self.callbacks = None
+
+    def attach(self, **callbacks):
+        self.callbacks = callbacks
+
+    async def close(self):
+        self.closed = True
+
+
+def test_parking_lot_is_bounded_by_size_and_grace_period():
+    now = [0.0]
+    lot = ParkingLot(grace=30, max_sessions=2, clock=lambda: now[0])
+    clients = [FakeClient() for _ in range(3)]
+
+    async def scenario():
+        for i, client in enumerate(clients):
+            await lot.park(f"call-{i}", f"token-{i}", EligibilityStateMachine(), client)
+            now[0] += 10
+        wrong_token = await lot.claim("call-1", "token-2")
+        claimed = await lot.claim("call-1", "token-1")
+        now[0] += 25
+        expired = await lot.evict_expired()
+        return wrong_token, claimed, expired
+
+    wrong_token, claimed, expired = asyncio.run(scenario())
+    assert clients[0].closed  # Evicted when the third call was parked
+    assert wrong_token is None
+    assert claimed.client is clients[1] and not clients[1].closed
+    assert clients[1].callbacks == {}  # Detached while parked
+    assert expired == 1 and clients[2].closed
+    assert lot.stats() == {"parked": 0, "with_realtime": 0, "parked_total": 3, "resumed": 1, "expired": 1, "evicted": 1}
@@ -22,17 +22,17 @@ def test_scenario(name: str, responses: list):
         print(f"User: {response}")
         result = sm.process_response(response)
 
-        print(f"Bot: {result['message']}")
-        print(f"State: {result['state']}")
+        print(f"Bot: {result.message}")
+        print(f"State: {result.state}")
 
-        if not result.get('is_valid', True):
+        if not result.is_valid:
             print(f"⚠️  Invalid response - re-asking question")
 
-        if result['should_end']:
+        if result.should_end:
             print(f"\n✓ Call ended")
-            print(f"✓ Eligible: {result['is_eligible']}")
-            if result['rejection_reason']:
-                print(f"✓ Reason: {result['rejection_reason']}")
+            print(f"✓ Eligible: {result.is_eligible}")
+            if result.rejection_reason:
+                print(f"✓ Reason: {result.rejection_reason}")
             break
 
         print()
@@ -90,6 +90,12 @@ def run_tests():
         ["maybe", "I'm not sure", "yes", "yes", "yes"]
     )
 
+    # Scenario 9: Hindi answers
+    test_scenario(
+        "Hinglish Answers (haan ji, nahin)",
+        ["haan ji", "haan", "haan", "nahin"]
+    )
+
     print(f"\n{'='*60}")
     print("✅ All tests completed!")
     print('='*60)
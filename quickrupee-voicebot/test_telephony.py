@@ -0,0 +1,62 @@
+"""
+Tests for telephony transcoding: G.711 μ-law and 8 kHz <-> 24 kHz resampling
+"""
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import numpy as np
+
+from telephony import Downsampler, PhoneDecoder, PhoneEncoder, Upsampler, pcm16_to_ulaw, ulaw_to_pcm16
+
+
+def tone(freq: float, rate: int, seconds: float, amplitude: float = 8000) -> np.ndarray:
+    return (amplitude * np.sin(2 * np.pi * freq * np.arange(int(rate * seconds)) / rate)).astype(np.int16)
+
+
+def test_ulaw_matches_g711_reference_points_and_round_trips():
+    assert ulaw_to_pcm16(bytes([0xFF, 0x80, 0x00, 0x7F])).tolist() == [0, 32124, -32124, 0]
+    assert pcm16_to_ulaw(np.array([0, 32767, -32768], dtype=np.int16)) == bytes([0xFF, 0x80, 0x00])
+
+    # Every code decodes to a value that encodes back to it (0x7F is "negative zero")
+    codes = bytes(range(256))
+    round_trip = pcm16_to_ulaw(ulaw_to_pcm16(codes))
+    assert [c for c in range(256) if round_trip[c] != c] == [0x7F]
+
+    # Quantization error is at most half a step; steps are 1/16 of the biased magnitude
+    samples = np.arange(-32000, 32000, 7, dtype=np.int16)
+    decoded = ulaw_to_pcm16(pcm16_to_ulaw(samples)).astype(np.int32)
+    assert np.all(np.abs(decoded - samples) <= (np.abs(samples.astype(np.int32)) + 0x84) / 32)
+
+
+def test_resamplers_are_continuous_across_frames():
+    phone = tone(440, 8000, 0.2)
+    whole = Upsampler().process(phone)
+    upsampler = Upsampler()
+    framed = np.concatenate([upsampler.process(phone[i:i + 160]) for i in range(0, len(phone), 160)])
+    assert len(whole) == 3 * len(phone) and np.array_equal(whole, framed)
+
+    wideband = tone(440, 24000, 0.2)
+    whole = Downsampler().process(wideband)
+    downsampler = Downsampler()
+    framed = np.concatenate([downsampler.process(wideband[i:i + 317]) for i in range(0, len(wideband), 317)])
+    assert len(whole) == len(wideband) // 3 and np.array_equal(whole, framed)
+
+
+def test_downsampler_keeps_the_phone_band_and_rejects_aliases():
+    settle = 50  # Filter warm-up samples at 8 kHz
+    voice = Downsampler().process(tone(1000, 24000, 0.2))[settle:]
+    alias = Downsampler().process(tone(10000, 24000, 0.2))[settle:]  # Would fold onto 2 kHz
+    assert np.abs(voice).max() > 7000
+    assert np.abs(alias).max() < 100
+
+
+def test_phone_codecs_accept_any_chunking():
+    pcm = tone(440, 24000, 0.1).tobytes()
+    whole = PhoneEncoder().encode(pcm)
+    encoder = PhoneEncoder()
+    pieces = b"".join(encoder.encode(pcm[i:i + 101]) for i in range(0, len(pcm), 101))  # Splits samples
+    assert len(whole) == 800 and pieces == whole
+
+    decoded = PhoneDecoder().decode(whole)
+    assert len(decoded) == 800 * 3 * 2  # 24 kHz PCM16 for the Realtime API
@@ -0,0 +1,123 @@
+"""
+Tests for the persistent content-addressed TTS cache
+"""
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+import demo_server
+import tts_cache
+from tts_cache import TTSCache, preload
+
+
+def test_key_is_stable_and_covers_voice_and_format():
+    key = TTSCache.make_key("Hello", "alloy", "tts-1", "mp3")
+    assert key == TTSCache.make_key("Hello", "alloy", "tts-1", "mp3")
+    assert key == TTSCache(tempfile.mkdtemp(), "alloy", "tts-1", "mp3").key_for("Hello")
+    assert len({
+        key,
+        TTSCache.make_key("Hello!", "alloy", "tts-1", "mp3"),
+        TTSCache.make_key("Hello", "nova", "tts-1", "mp3"),
+        TTSCache.make_key("Hello", "alloy", "tts-1-hd", "mp3"),
+        TTSCache.make_key("Hello", "alloy", "tts-1", "ulaw"),
+    }) == 5
+
+    cache_dir = tempfile.mkdtemp()
+    TTSCache(cache_dir, "alloy", "tts-1", "mp3").put("Hello", b"alloy audio")
+    assert TTSCache(cache_dir, "nova", "tts-1", "mp3").get("Hello") is None
+    assert TTSCache(cache_dir, "alloy", "tts-1", "ulaw").get("Hello") is None
+
+
+def test_entries_persist_across_instances():
+    cache_dir = tempfile.mkdtemp()
+    writer = TTSCache(cache_dir, "alloy", "tts-1", "mp3")
+    writer.put("Hello", b"audio bytes")
+    writer.close()
+
+    reader = TTSCache(cache_dir, "alloy", "tts-1", "mp3")
+    assert "Hello" in reader
+    assert bytes(reader.get("Hello")) == b"audio bytes"
+    assert reader.get_encoded("Hello", "upper", lambda audio: bytes(audio).upper()) == b"AUDIO BYTES"
+    assert reader.get("Goodbye") is None
+    reader.close()
+
+
+def test_interrupted_write_leaves_no_partial_entry(monkeypatch):
+    cache_dir = tempfile.mkdtemp()
+    cache = TTSCache(cache_dir, "alloy", "tts-1", "mp3")
+
+    def crash(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(tts_cache.os, "replace", crash)
+    cache.put("Hello", b"audio bytes")
+    assert "Hello" not in cache
+    assert cache.get("Hello") is None
+    assert os.listdir(cache_dir) == []  # Temp file removed, nothing under the final name
+
+    monkeypatch.undo()
+    cache.put("Hello", b"audio bytes")
+    assert bytes(TTSCache(cache_dir, "alloy", "tts-1", "mp3").get("Hello")) == b"audio bytes"
+
+
+def test_preload_bounds_concurrency_retries_and_reports_failures():
+    in_flight, peak = 0, 0
+    attempts: dict = {}
+
+    async def synthesize(text: str):
+        nonlocal in_flight, peak
+        attempts[text] = attempts.get(text, 0) + 1
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if text == "broken" or (text == "flaky" and attempts[text] == 1):
+            return None
+        return text.encode()
+
+    cache = TTSCache(tempfile.mkdtemp(), "alloy", "tts-1", "mp3")
+    texts = [f"script {i}" for i in range(8)] + ["flaky", "broken"]
+    results = asyncio.run(preload(cache, texts, synthesize, concurrency=3, retries=2, backoff=0.01))
+    assert peak == 3
+    assert [r.text for r in results] == texts
+    assert [r.text for r in results if not r.ok] == ["broken"]
+    assert [(r.attempts, r.from_disk) for r in results[-2:]] == [(2, False), (2, False)]
+    assert bytes(cache.get("flaky")) == b"flaky"
+
+    again = asyncio.run(preload(cache, texts, synthesize, concurrency=3, retries=2, backoff=0.01))
+    assert all(r.from_disk for r in again[:-1]) and attempts["script 0"] == 1
+
+
+async def fake_tts(calls: list, slow: set, text: str, *args, **kwargs):
+    """Stand-in for demo_server.text_to_speech; texts in `slow` take a while"""
+    calls.append(text)
+    await asyncio.sleep(0.3 if text in slow else 0.0)
+    return b"audio:" + text.encode()
+
+
+def test_startup_waits_for_critical_scripts_only_and_warm_cache_skips_tts(monkeypatch):
+    critical = demo_server.critical_tts_scripts()
+    rest = [s for s in demo_server.tts_scripts() if s not in critical]
+    cache_dir = tempfile.mkdtemp()
+
+    async def start(calls: list):
+        monkeypatch.setattr(demo_server, "text_to_speech", lambda *args, **kw: fake_tts(calls, set(rest), *args, **kw))
+        monkeypatch.setattr(demo_server, "tts_cache", TTSCache(cache_dir, "alloy", "tts-1", "mp3"))
+        monkeypatch.setattr(demo_server, "ulaw_cache", TTSCache(cache_dir, "alloy", "tts-1", "ulaw"))
+        background = await demo_server.start_tts_preload()
+        state = (background.done(), [s in demo_server.tts_cache for s in critical], [s in demo_server.tts_cache for s in rest])
+        await background
+        return state, [s in demo_server.tts_cache for s in rest]
+
+    cold_calls: list = []
+    (done, critical_cached, rest_cached), rest_after = asyncio.run(start(cold_calls))
+    assert not done
+    assert all(critical_cached) and not any(rest_cached)
+    assert all(rest_after)
+    assert cold_calls
+
+    warm_calls: list = []
+    asyncio.run(start(warm_calls))
+    assert warm_calls == []
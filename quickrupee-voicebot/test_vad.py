@@ -0,0 +1,40 @@
+"""
+Tests for the voice activity gate
+"""
+import numpy as np
+
+from vad import EnergyGate
+
+SAMPLE_RATE = 24000
+FRAME = 480  # 20 ms at 24 kHz
+
+
+def tone(frames: int, amplitude: int = 8000) -> bytes:
+    t = np.arange(frames * FRAME) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes()
+
+
+def silence(frames: int) -> bytes:
+    return np.zeros(frames * FRAME, dtype="<i2").tobytes()
+
+
+def test_pure_silence_is_dropped():
+    gate = EnergyGate(preroll_ms=100, hangover_ms=100)
+    assert gate.process(silence(50)) == b""
+    assert gate.bytes_saved == len(silence(50))
+
+
+def test_speech_keeps_preroll_and_hangover():
+    gate = EnergyGate(preroll_ms=100, hangover_ms=200)  # 5 frames pre-roll, 10 hangover
+    audio = silence(20) + tone(10) + silence(30)
+    out = gate.process(audio)
+    assert out == silence(5) + tone(10) + silence(10)
+    assert gate.bytes_saved == len(audio) - len(out)
+    assert not gate.in_speech
+
+
+def test_partial_frames_carry_over_between_chunks():
+    gate = EnergyGate(preroll_ms=0, hangover_ms=0)
+    speech = tone(4)
+    out = b"".join(gate.process(speech[i:i + 333]) for i in range(0, len(speech), 333))
+    assert out == speech
@@ -0,0 +1,212 @@
+"""
+Persistent TTS Audio Cache
+Content-addressed on-disk store for synthesized audio, shared by all workers on a host
+"""
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    Content-addressed cache for TTS audio
+
+    Each entry is stored as one file named by the SHA-256 of
+    (text, voice, model, format). Files are written atomically and read back
+    through read-only memory maps, so every uvicorn worker on the host shares
+    the same page-cache copy of the audio.
+    """
+
+    def __init__(self, cache_dir: str, voice: str, model: str, response_format: str):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding cached audio files
+            voice: TTS voice the audio was generated with
+            model: TTS model the audio was generated with
+            response_format: Audio container format (e.g. "mp3")
+        """
+        self.cache_dir = cache_dir
+        self.voice = voice
+        self.model = model
+        self.response_format = response_format
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._keys: Dict[str, str] = {}
+        self._encoded: Dict[Tuple[str, str], Any] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str, response_format: str) -> str:
+        """Build the content address for a piece of synthesized audio"""
+        digest = hashlib.sha256()
+        for part in (text, voice, model, response_format):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def key_for(self, text: str) -> str:
+        """Get the content address of text under this cache's voice settings"""
+        key = self._keys.get(text)
+        if key is None:
+            key = self.make_key(text, self.voice, self.model, self.response_format)
+            self._keys[text] = key
+        return key
+
+    def path_for(self, key: str) -> str:
+        """Get the file path for a cache key"""
+        return os.path.join(self.cache_dir, f"{key}.{self.response_format}")
+
+    def get(self, text: str) -> Optional[memoryview]:
+        """
+        Look up audio for text, mapping it from disk on first access
+
+        Returns:
+            Read-only view of the audio bytes, or None on a miss
+        """
+        key = self.key_for(text)
+        mapped = self._maps.get(key)
+        if mapped is None:
+            mapped = self._map_file(key)
+            if mapped is None:
+                return None
+            self._maps[key] = mapped
+        return memoryview(mapped)
+
+    def get_encoded(self, text: str, fmt: str, encode: Callable[[memoryview], Any]) -> Optional[Any]:
+        """
+        Look up a ready-to-send payload for text, encoding it on first use
+
+        Scripts never change, so the outbound message (e.g. a binary frame or
+        a serialized JSON message) is built once per format and reused for
+        every turn of every session in this worker.
+
+        Args:
+            text: Script text
+            fmt: Name of the wire format, part of the memo key
+            encode: Builds the payload from the raw audio
+        """
+        key = self.key_for(text)
+        payload = self._encoded.get((key, fmt))
+        if payload is None:
+            audio = self.get(text)
+            if audio is None:
+                return None
+            payload = encode(audio)
+            self._encoded[(key, fmt)] = payload
+        return payload
+
+    def put(self, text: str, audio: bytes) -> None:
+        """Store audio for text on disk and map it for reads"""
+        if not audio:
+            return
+
+        key = self.key_for(text)
+        if key in self._maps:
+            # Content-addressed: an existing entry already holds this audio
+            return
+
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to write TTS cache entry {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        mapped = self._map_file(key)
+        if mapped is not None:
+            self._maps[key] = mapped
+
+    def __contains__(self, text: str) -> bool:
+        key = self.key_for(text)
+        return key in self._maps or os.path.exists(self.path_for(key))
+
+    def __len__(self) -> int:
+        """Number of entries currently mapped by this worker"""
+        return len(self._maps)
+
+    def _map_file(self, key: str) -> Optional[mmap.mmap]:
+        """Memory-map a cache file read-only, or return None if absent or empty"""
+        try:
+            with open(self.path_for(key), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to map TTS cache entry {key}: {e}")
+            return None
+
+    def close(self) -> None:
+        """Release all memory maps and encoded payloads held by this worker"""
+        self._encoded.clear()
+        for mapped in self._maps.values():
+            try:
+                mapped.close()
+            except BufferError:
+                # A caller still holds a view; the map is freed with it
+                pass
+        self._maps.clear()
+
+
+@dataclass
+class PreloadResult:
+    """Outcome of preloading one script into the cache"""
+    text: str
+    ok: bool
+    from_disk: bool
+    attempts: int
+    elapsed: float  # seconds
+
+
+async def preload(
+    cache: TTSCache,
+    texts: Iterable[str],
+    synthesize: Callable[[str], Awaitable[Optional[bytes]]],
+    concurrency: int = 4,
+    retries: int = 3,
+    backoff: float = 0.5,
+) -> List[PreloadResult]:
+    """
+    Fill the cache for texts with bounded concurrency
+
+    Entries already on disk are mapped without calling synthesize. Misses are
+    fetched at most `concurrency` at a time and retried with exponential
+    backoff (backoff, 2*backoff, ...) when synthesize returns nothing.
+
+    Returns:
+        One PreloadResult per text, in input order
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def load_one(text: str) -> PreloadResult:
+        start = time.perf_counter()
+        if cache.get(text) is not None:
+            return PreloadResult(text, True, True, 0, time.perf_counter() - start)
+
+        for attempt in range(1, retries + 1):
+            async with semaphore:
+                audio = await synthesize(text)
+            if audio:
+                cache.put(text, audio)
+                return PreloadResult(text, True, False, attempt, time.perf_counter() - start)
+            if attempt < retries:
+                await asyncio.sleep(backoff * 2 ** (attempt - 1))
+
+        return PreloadResult(text, False, False, retries, time.perf_counter() - start)
+
+    return list(await asyncio.gather(*(load_one(text) for text in texts)))
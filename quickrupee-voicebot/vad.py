@@ -0,0 +1,119 @@
+"""
+Voice Activity Gate
+Drops silent PCM16 audio before it is sent upstream to the Realtime API
+"""
+from collections import deque
+from typing import Any, Deque, Dict, List
+import numpy as np
+
+
+class EnergyGate:
+    """
+    Frame-level energy gate over 16-bit mono PCM
+
+    Audio is cut into fixed-size frames and the energy of every frame in a
+    chunk is computed in one vectorized pass. Silent frames are dropped,
+    except for:
+      - pre-roll: the last `preroll_ms` of silence before speech is sent with
+        it so word onsets are not clipped
+      - hangover: silence for `hangover_ms` after speech keeps flowing, so the
+        Realtime API's own server VAD still sees the pause that ends a turn
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 24000,
+        frame_ms: int = 20,
+        threshold_dbfs: float = -45.0,
+        preroll_ms: int = 300,
+        hangover_ms: int = 800,
+    ):
+        """
+        Args:
+            sample_rate: Input sample rate in Hz
+            frame_ms: Analysis frame length
+            threshold_dbfs: Frames with RMS level above this count as speech
+            preroll_ms: Silence kept in front of speech onsets
+            hangover_ms: Silence still forwarded after speech ends
+        """
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2
+        # Compare mean square energy against the threshold, avoiding sqrt/log per frame
+        self.threshold_energy = (32768.0 * 10 ** (threshold_dbfs / 20)) ** 2
+        self.hangover_frames = hangover_ms // frame_ms
+        self._preroll: Deque[bytes] = deque(maxlen=max(0, preroll_ms // frame_ms))
+        self._remainder = b""
+        self._hangover_left = 0
+
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.speech_frames = 0
+        self.silent_frames = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+    @property
+    def in_speech(self) -> bool:
+        """True while speech (or its hangover) is being forwarded"""
+        return self._hangover_left > 0
+
+    def process(self, audio: bytes) -> bytes:
+        """
+        Gate one chunk of PCM16 audio
+
+        Returns:
+            The audio to forward upstream (possibly empty). A partial trailing
+            frame is held back until the next chunk completes it.
+        """
+        self.bytes_in += len(audio)
+        data = self._remainder + bytes(audio) if self._remainder else bytes(audio)
+        frame_count = len(data) // self.frame_bytes
+        usable = frame_count * self.frame_bytes
+        self._remainder = data[usable:]
+        if frame_count == 0:
+            return b""
+
+        samples = np.frombuffer(data, dtype="<i2", count=frame_count * self.frame_samples)
+        frames = samples.reshape(frame_count, self.frame_samples).astype(np.float32)
+        voiced = np.einsum("ij,ij->i", frames, frames) / self.frame_samples > self.threshold_energy
+
+        out: List[bytes] = []
+        for i, is_voiced in enumerate(voiced.tolist()):
+            frame = data[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            if is_voiced:
+                self.speech_frames += 1
+                if self._hangover_left == 0 and self._preroll:
+                    out.extend(self._preroll)
+                    self._preroll.clear()
+                self._hangover_left = self.hangover_frames + 1
+                out.append(frame)
+            else:
+                self.silent_frames += 1
+                if self._hangover_left > 0:
+                    self._hangover_left -= 1
+                if self._hangover_left > 0:
+                    out.append(frame)
+                else:
+                    self._preroll.append(frame)
+
+        result = b"".join(out)
+        self.bytes_out += len(result)
+        return result
+
+    def reset(self):
+        """Forget buffered audio (e.g. when the mic is muted for bot speech)"""
+        self._preroll.clear()
+        self._remainder = b""
+        self._hangover_left = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-session gate counters"""
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_saved,
+            "speech_frames": self.speech_frames,
+            "silent_frames": self.silent_frames,
+        }